@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+# bench.py: Benchmarks of the hot paths of pfspwt
+# author : Antoine Passemiers
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pfspwt.aco import COLONIES
+from pfspwt.generator import generate_instance
+from pfspwt.heuristics import neh_algorithm
+from pfspwt.neighbourhood import swap_search, interchange_search
+from pfspwt.neighbourhood import insertion_search
+from pfspwt.objective import computation_times, weighted_tardiness, makespan
+from pfspwt.optimizer import Optimizer
+
+import argparse
+import datetime
+import json
+import platform
+import re
+import subprocess
+import time
+import warnings
+import numba
+import numpy as np
+
+
+SIZES = [(n, m) for n in (20, 50, 100, 200, 500) for m in (5, 10, 20)]
+
+QUICK_SIZES = [(20, 5), (50, 10), (100, 20)]
+
+
+def measure(func, min_time=0.2, repeat=3):
+    """Measures the execution time of a function.
+
+    The function is called once beforehand, which compiles
+    the kernels it relies on. It is then called in batches
+    lasting at least `min_time` seconds.
+
+    Parameters:
+        func (function): Function without arguments.
+        min_time (float): Minimum duration of a batch of calls.
+        repeat (int): Number of batches.
+
+    Returns:
+        float: Lowest time per call across batches, in seconds.
+    """
+    func()
+    number, best = 1, np.inf
+    for _ in range(repeat):
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time or number >= 1e6:
+                break
+            number = max(number * 2, int(number * min_time / max(
+                    elapsed, 1e-9)))
+        best = min(best, elapsed / number)
+    return best
+
+
+def objective_benchmarks(instance, solution):
+    """Benchmarks of the evaluation of a solution.
+
+    Returns:
+        dict: Functions to be timed, by benchmark name.
+    """
+    ws = instance.workspace
+    np.take(instance.p, solution, axis=0, out=ws.p)
+    return {
+        'computation_times': lambda: computation_times(ws.c, ws.p),
+        'weighted_tardiness': lambda: weighted_tardiness(instance, solution),
+        'makespan': lambda: makespan(instance, solution),
+        'weighted_tardiness.no_refresh': lambda: weighted_tardiness(
+                instance, solution, refresh=False)
+    }
+
+
+def neighbourhood_benchmarks(instance, solution):
+    """Benchmarks of the exploration of neighbourhoods, and of NEH.
+
+    Returns:
+        dict: Functions to be timed, by benchmark name.
+    """
+    return {
+        'swap_search': lambda: swap_search(instance, solution),
+        'interchange_search': lambda: interchange_search(instance, solution),
+        'insertion_search': lambda: insertion_search(instance, solution),
+        'neh_algorithm': lambda: neh_algorithm(instance)
+    }
+
+
+def colony_benchmarks(instance, method, n_ants, ls):
+    """Benchmarks of the building blocks of a colony.
+
+    The colony is only initialized once one of
+    the functions is called.
+
+    Returns:
+        dict: Functions to be timed, by benchmark name.
+    """
+    optimizer = Optimizer(seed=0)
+    colony = COLONIES[method](optimizer, n_ants=n_ants, ls=ls)
+    ants = list()
+
+    def setup():
+        if not ants:
+            colony.initialize(instance)
+            ants.append(colony.create_solution())
+            colony.evaluate(ants[0])
+
+    def create_solution():
+        setup()
+        colony.create_solution()
+
+    def update_pheromones():
+        setup()
+        colony.update_pheromones(ants[0])
+
+    def step():
+        setup()
+        colony.step()
+        optimizer.step()
+
+    return {
+        '%s.create_solution' % method: create_solution,
+        '%s.update_pheromones' % method: update_pheromones,
+        '%s.step' % method: step
+    }
+
+
+def git_revision():
+    """Returns the current git commit, or None outside of a repository."""
+    try:
+        return subprocess.check_output(
+                ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                cwd=os.path.dirname(os.path.abspath(__file__))
+                ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_arguments():
+    """Parses command line arguments."""
+    parser = argparse.ArgumentParser(
+            description='Benchmarks of the hot paths of pfspwt')
+    parser.add_argument(
+            '--output',
+            default='benchmarks.json',
+            type=str,
+            help='Path to the JSON file where results are written')
+    parser.add_argument(
+            '--sizes',
+            default=None,
+            type=str,
+            help='Comma-separated instance sizes, like "20x5,50x10" '
+                 '(Taillard-size grid by default)')
+    parser.add_argument(
+            '--quick',
+            action='store_true',
+            help='Only run a few small instance sizes')
+    parser.add_argument(
+            '--filter',
+            default=None,
+            type=str,
+            help='Regular expression selecting benchmarks by name')
+    parser.add_argument(
+            '--min-time',
+            default=0.2,
+            type=float,
+            help='Minimum duration of a batch of calls (in seconds)')
+    parser.add_argument(
+            '--n-ants',
+            default=20,
+            type=int,
+            help='Number of ants of the colonies')
+    parser.add_argument(
+            '--local-search',
+            default='none',
+            type=str,
+            help='Local search method of the colonies')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+
+    args = parse_arguments()
+    warnings.simplefilter('ignore')
+    if args.sizes is not None:
+        sizes = [tuple(map(int, size.split('x')))
+                 for size in args.sizes.split(',')]
+    else:
+        sizes = QUICK_SIZES if args.quick else SIZES
+    pattern = re.compile(args.filter or '')
+
+    results = list()
+    for n, m in sizes:
+        instance = generate_instance(n, m)
+        solution = np.random.RandomState(0).permutation(n).astype(np.int32)
+        benchmarks = dict()
+        benchmarks.update(objective_benchmarks(instance, solution))
+        benchmarks.update(neighbourhood_benchmarks(instance, solution))
+        for method in COLONIES:
+            benchmarks.update(colony_benchmarks(
+                    instance, method, args.n_ants, args.local_search))
+
+        for name, func in benchmarks.items():
+            if not pattern.search(name):
+                continue
+            seconds = measure(func, args.min_time)
+
+            # Steps evaluate one solution per ant, other benchmarks
+            # are counted in calls
+            record = {
+                'benchmark': name, 'n': n, 'm': m,
+                'seconds_per_call': seconds,
+                'calls_per_second': 1. / seconds
+            }
+            if name.endswith('.step'):
+                record['iterations_per_second'] = 1. / seconds
+                record['evaluations_per_second'] = args.n_ants / seconds
+            results.append(record)
+            print('%-34s n=%-4d m=%-3d %12.1f us %14.1f /s' % (
+                    name, n, m, seconds * 1e6, 1. / seconds))
+
+    report = {
+        'date': datetime.datetime.now().isoformat(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'numba': numba.__version__,
+        'machine': platform.machine(),
+        'n_ants': args.n_ants,
+        'local_search': args.local_search,
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
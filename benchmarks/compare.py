@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# compare.py: Comparison of two benchmark reports
+# author : Antoine Passemiers
+
+import argparse
+import json
+import sys
+
+
+def load_results(filepath):
+    """Loads the results of a benchmark report.
+
+    Parameters:
+        filepath (str): Path to a report written by `bench.py`.
+
+    Returns:
+        dict: Time per call (in seconds) of each benchmark,
+            by (benchmark name, n, m).
+    """
+    with open(filepath, 'r') as f:
+        report = json.load(f)
+    return {(r['benchmark'], r['n'], r['m']): r['seconds_per_call']
+            for r in report['results']}
+
+
+def parse_arguments():
+    """Parses command line arguments."""
+    parser = argparse.ArgumentParser(
+            description='Detects regressions between two benchmark reports')
+    parser.add_argument(
+            'baseline',
+            type=str,
+            help='Report of the reference version')
+    parser.add_argument(
+            'candidate',
+            type=str,
+            help='Report of the new version')
+    parser.add_argument(
+            '--threshold',
+            default=0.1,
+            type=float,
+            help='Relative slowdown above which a benchmark regresses')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+
+    args = parse_arguments()
+    baseline = load_results(args.baseline)
+    candidate = load_results(args.candidate)
+
+    # Speedups are given in calls (or iterations, evaluations)
+    # per second, relative to the baseline
+    regressions = list()
+    for key in sorted(set(baseline) & set(candidate)):
+        speedup = baseline[key] / candidate[key]
+        flag = ''
+        if speedup < 1. / (1. + args.threshold):
+            flag = 'REGRESSION'
+            regressions.append(key)
+        print('%-34s n=%-4d m=%-3d %8.2fx %s' % (key + (speedup, flag)))
+
+    missing = sorted(set(baseline) ^ set(candidate))
+    if missing:
+        print('%d benchmarks are only in one of the reports' % len(missing))
+    print('%d regressions' % len(regressions))
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# startup.py: Benchmarks of the startup time of pfspwt
+# author : Antoine Passemiers
+
+import os
+import sys
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from pfspwt.generator import generate_instance
+from pfspwt.io import PFSPWTIO
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import tempfile
+import time
+
+
+METHODS = ['MMAS', 'M-MMAS', 'PACO']
+
+
+def elapsed(command, cache_dir):
+    """Measures the wall time of a command run in a new process.
+
+    Parameters:
+        command (list): Arguments of the Python interpreter.
+        cache_dir (str): Directory of the cache of compiled kernels.
+
+    Returns:
+        float: Wall time of the process, in seconds.
+    """
+    env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+    start = time.perf_counter()
+    subprocess.check_call([sys.executable] + command, cwd=ROOT, env=env,
+                          stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def startup_benchmarks(filepath, method, tmp_dir, repeat):
+    """Measures the startup time of a method, with and without
+    compiled kernels in the cache.
+
+    The first process runs with an empty cache, and has to compile
+    all the kernels it needs. The next processes load them from
+    the cache.
+
+    Parameters:
+        filepath (str): Location of the instance file.
+        method (str): Name of the algorithm.
+        tmp_dir (str): Directory where the cache is created.
+        repeat (int): Number of processes with a warm cache.
+
+    Returns:
+        dict: Time (in seconds) of each benchmark, by name.
+    """
+    cache_dir = os.path.join(tmp_dir, method)
+    load = ['-c', 'from pfspwt.aco import COLONIES; COLONIES[%r]' % method]
+    run = ['run.py', filepath, '--method', method, '--iterations', '1']
+    results = dict()
+    results['run.cold.%s' % method] = elapsed(run, cache_dir)
+    results['run.warm.%s' % method] = min(
+            elapsed(run, cache_dir) for _ in range(repeat))
+    results['import.warm.%s' % method] = min(
+            elapsed(load, cache_dir) for _ in range(repeat))
+    return results
+
+
+def parse_arguments():
+    """Parses command line arguments."""
+    parser = argparse.ArgumentParser(
+            description='Benchmarks of the startup time of pfspwt')
+    parser.add_argument(
+            '--output',
+            default='startup.json',
+            type=str,
+            help='Path to the JSON file where results are written')
+    parser.add_argument(
+            '--size',
+            default='50x10',
+            type=str,
+            help='Size of the instance, like "50x10"')
+    parser.add_argument(
+            '--methods',
+            default=','.join(METHODS),
+            type=str,
+            help='Comma-separated names of the algorithms')
+    parser.add_argument(
+            '--repeat',
+            default=3,
+            type=int,
+            help='Number of runs with a warm cache')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+
+    args = parse_arguments()
+    n, m = map(int, args.size.split('x'))
+
+    results = list()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = os.path.join(tmp_dir, 'instance.txt')
+        PFSPWTIO.write(filepath, generate_instance(n, m))
+        for method in args.methods.split(','):
+            timings = startup_benchmarks(
+                    filepath, method, tmp_dir, args.repeat)
+            for name, seconds in timings.items():
+
+                # Same format as the reports of `bench.py`,
+                # hence reports can be compared with `compare.py`
+                results.append({
+                    'benchmark': name, 'n': n, 'm': m,
+                    'seconds_per_call': seconds,
+                    'calls_per_second': 1. / seconds
+                })
+                print('%-34s n=%-4d m=%-3d %10.3f s' % (name, n, m, seconds))
+
+    report = {
+        'date': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
@@ -3,7 +3,7 @@
 # author : Antoine Passemiers
 
 from pfspwt.aco import MMAS, MMMAS, PACO
-from pfspwt.io import PFSPWTIO
+from pfspwt.io import InstanceBundle
 from pfspwt.optimizer import Optimizer
 from pfspwt.hpo import Hyperoptimizer
 
@@ -12,24 +12,41 @@ import numpy as np
 
 
 DATA_DIR = 'data'
+BUNDLE_PATH = os.path.join(DATA_DIR, 'instances.bundle')
 MAX_TIME = 10.
 
 
+def load_bundle():
+    """Opens the bundle of all the instances of the data folder.
+
+    The bundle is created again if instance files have been
+    added, removed or modified since it was written.
+
+    Returns:
+        :obj:`pfspwt.io.InstanceBundle`: Bundle of instances.
+    """
+    filenames = sorted(filename for filename in os.listdir(DATA_DIR)
+                       if filename.endswith('.txt'))
+    if os.path.exists(BUNDLE_PATH):
+        bundle = InstanceBundle(BUNDLE_PATH)
+        mtime = os.path.getmtime(BUNDLE_PATH)
+        if bundle.names() == [filename[:-4] for filename in filenames] \
+                and all(os.path.getmtime(os.path.join(DATA_DIR, filename))
+                        <= mtime for filename in filenames):
+            return bundle
+    return InstanceBundle.from_directory(DATA_DIR, BUNDLE_PATH)
+
+
 if __name__ == '__main__':
 
-    # Load all instances from data folder
-    instances = dict()
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith('.txt'):
-            name = filename.split('.')[0]
-            filepath = os.path.join(DATA_DIR, filename)
-            instances[name] = PFSPWTIO.read(filepath)
+    # Instances of the data folder are loaded lazily, one at a time
+    bundle = load_bundle()
 
     # Define HPO objective function as the sum of objective functions
     # across the whole dataset
     def objective(params):
         scores = list()
-        for instance in instances.values():
+        for name, instance in bundle:
             optimizer = Optimizer(max_time=MAX_TIME)
             aco = MMAS(optimizer, n_ants=params['n_ants'], rho=params['rho'])
             aco.initialize(instance)
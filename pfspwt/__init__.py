@@ -1 +1,106 @@
-from .ant import *
\ No newline at end of file
+# -*- coding: utf-8 -*-
+# __init__.py: Location of the cache of compiled kernels
+# author : Antoine Passemiers
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+try:
+    from numba.core import caching
+except ImportError:  # Numba < 0.49
+    from numba import caching
+
+
+_PACKAGE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _cache_dir():
+    """Returns the directory where compiled kernels are cached.
+
+    Numba only invalidates the cache of a kernel when the module
+    defining it changes, while kernels inline kernels of other
+    modules: a cached kernel could then run stale code. Kernels
+    are thus cached in a directory named after a hash of the
+    sources of the whole package, in the directory given by the
+    NUMBA_CACHE_DIR environment variable, or else in the
+    "__pycache__" folder of the package if it is writable.
+
+    Returns:
+        str: Location of the cache.
+    """
+    digest = hashlib.sha1()
+    for directory, dirnames, filenames in os.walk(_PACKAGE):
+        dirnames[:] = sorted(
+                dirname for dirname in dirnames if dirname != '__pycache__')
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                filepath = os.path.join(directory, filename)
+                digest.update(os.path.relpath(filepath, _PACKAGE).encode())
+                with open(filepath, 'rb') as f:
+                    digest.update(f.read())
+    root = os.environ.get('NUMBA_CACHE_DIR')
+    if not root:
+        root = os.path.join(_PACKAGE, '__pycache__')
+        if not os.access(_PACKAGE, os.W_OK) and not os.access(root, os.W_OK):
+            root = os.path.join(tempfile.gettempdir(), 'pfspwt')
+    return os.path.join(root, 'numba-%s' % digest.hexdigest()[:16])
+
+
+def _prune_cache(cache_dir):
+    """Creates the cache directory, and removes the caches of
+    former versions of the package when doing so.
+
+    Parameters:
+        cache_dir (str): Location of the cache.
+    """
+    if os.path.isdir(cache_dir):
+        return
+    try:
+        os.makedirs(cache_dir)
+    except OSError:
+        return
+    root, name = os.path.split(cache_dir)
+    for other in os.listdir(root):
+        if other != name and re.match(r'numba-[0-9a-f]{16}$', other):
+            shutil.rmtree(os.path.join(root, other), ignore_errors=True)
+
+
+class _PackageCacheLocator(caching._SourceFileBackedLocatorMixin,
+                           caching._CacheLocator):
+    """Locates the cache of the kernels defined in the package.
+
+    Only the kernels of the package are cached in `_CACHE_DIR`,
+    the global settings of Numba being left untouched.
+    """
+
+    def __init__(self, py_func, py_file):
+        self._py_file = py_file
+        self._lineno = py_func.__code__.co_firstlineno
+        directory = os.path.dirname(os.path.abspath(py_file))
+        self._cache_path = os.path.normpath(os.path.join(
+                _CACHE_DIR, os.path.relpath(directory, _PACKAGE)))
+
+    def get_cache_path(self):
+        return self._cache_path
+
+    @classmethod
+    def from_function(cls, py_func, py_file):
+        if not os.path.abspath(py_file).startswith(_PACKAGE + os.sep):
+            return None
+        return super(_PackageCacheLocator, cls).from_function(
+                py_func, py_file)
+
+
+_CACHE_DIR = _cache_dir()
+_prune_cache(_CACHE_DIR)
+
+# Must be registered before any kernel is defined
+_locators = getattr(caching, 'CacheImpl', None) or caching._CacheImpl
+_locators._locator_classes[:] = [_PackageCacheLocator] + [
+        locator for locator in _locators._locator_classes
+        if locator.__module__ != __name__]
+
+from .ant import *
@@ -1,4 +1,30 @@
-from pfspwt.aco.base import *
-from pfspwt.aco.mmas import *
-from pfspwt.aco.mmmas import *
-from pfspwt.aco.paco import *
\ No newline at end of file
+import importlib
+
+
+# Submodule defining each public name. Submodules are only imported
+# when one of their names is accessed, hence only the kernels of the
+# algorithms in use are compiled (or loaded from the cache).
+_SUBMODULES = {
+    'ACO': 'base',
+    'MMAS': 'mmas',
+    'MMMAS': 'mmmas',
+    'PACO': 'paco',
+    'PheromoneTrails': 'pheromones',
+    'BandedPheromoneTrails': 'pheromones',
+    'COLONIES': 'island',
+    'IslandModel': 'island',
+    'pack_ant': 'island',
+    'unpack_ant': 'island'
+}
+
+__all__ = list(_SUBMODULES)
+
+
+def __getattr__(name):
+    if name not in _SUBMODULES:
+        raise AttributeError(
+                "module '%s' has no attribute '%s'" % (__name__, name))
+    module = importlib.import_module('%s.%s' % (__name__, _SUBMODULES[name]))
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
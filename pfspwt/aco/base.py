@@ -5,8 +5,11 @@
 from pfspwt.ant import Ant
 from pfspwt.neighbourhood import *
 from pfspwt.objective import weighted_tardiness
+from pfspwt.rng import RandomStreams
 
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import time
 import numpy as np
 
 
@@ -19,43 +22,128 @@ class ACO(metaclass=ABCMeta):
         n_ants (int): Number of ants treated at each iteration.
         rho (float): Pheromone trail persistence.
         _ls (str): Local search method to use. "none" corresponds
-            to no local search at all.
-        _tau (:obj:`np.ndarray`): Array of shape (n, n) where
-            element `_tau[i, j]` if the pheromone trail
-            associated to the desire of placing job i
-            at position j in the solution.
+            to no local search at all. Methods ending with "-first"
+            or "-best" run to a local optimum, with first or best
+            improvement (see `pfspwt.neighbourhood.descent`).
+        _tau (:obj:`pfspwt.aco.pheromones.PheromoneTrails`):
+            Pheromone trails, where trail (i, j) is associated to
+            the desire of placing job i at position j in the solution.
         _best (:obj:`np.ndarray`): Array of shape (n,)
             representing the best scheduling solution.
         _Zbest (float): Weighted tardiness of the `best`
             solution.
         _instance (:obj:`pfspwt.Instance`): Instance of the
             PFSP-WT problem.
+        _workspace (:obj:`pfspwt.workspace.Workspace`): Scratch
+            buffers of the colony, which makes it possible to run
+            several colonies on the same instance concurrently.
+        n_jobs (int): Number of threads used for building
+            and improving the ants of an iteration.
+        seed (int): Seed of the random number generator of the colony,
+            or None for drawing it from the global NumPy generator
+            when the colony is initialized.
+        _rng (:obj:`pfspwt.rng.RandomStreams`): Random number generator
+            of the colony. Each ant draws its random numbers from
+            its own stream.
+        _executor (:obj:`concurrent.futures.ThreadPoolExecutor`):
+            Pool of threads, if `n_jobs` > 1.
+        _workspaces (list): Workspaces of the threads.
+        compiled (bool): Whether to apply whole iterations with a
+            single call to a compiled kernel, when the algorithm
+            supports it (see `iterate`), `n_jobs` is 1 and
+            profiling is disabled.
+        iterate (function): Method applying a whole iteration with
+            a single call to a compiled kernel, or None if the algorithm
+            does not support it. Ants are built, improved by local
+            search and evaluated, and pheromone trails are updated.
+            The method is called as `iterate(streams, best, solutions,
+            wt, ms)`, where `streams` contains the states of the random
+            number streams of the ants (see `pfspwt.rng.RandomStreams`),
+            `best` is a copy of the best sequence found so far, replaced
+            inplace by the best sequence of the iteration if the latter
+            is better, and `solutions`, `wt` and `ms` are arrays where
+            the solutions, weighted tardiness and makespans of the ants
+            are stored. It returns the weighted tardiness of `best`.
     """
 
-    def __init__(self, optimizer, n_ants=40, rho=.75, ls='none'):
+    iterate = None
+
+    def __init__(self, optimizer, n_ants=40, rho=.75, ls='none', n_jobs=1,
+                 compiled=True, seed=None):
         self._optimizer = optimizer
         self.n_ants = n_ants
         self.rho = rho
+        self.n_jobs = n_jobs
+        self.compiled = compiled
+        self.seed = seed
         self._ls = ls
         if ls is not None:
             self._ls = ls.lower().strip()
-            lss = ['none', 'swap', 'interchange', 'insertion']
-            assert(self._ls in lss)
+            assert(self._ls in LOCAL_SEARCHES)
         self._tau = None
         self._best = None
         self._Zbest = None
         self._instance = None
+        self._workspace = None
+        self._rng = None
+        self._executor = None
+        self._workspaces = list()
 
     def evaluate(self, ant):
         """Evaluates a solution newly found by an ant.
 
+        The objective value carried by the ant is reused if it is
+        known, and the ant is otherwise assigned its objective value.
+        In both cases, the solution is accounted for by the optimizer.
+
+        Parameters:
+            ant (:obj:`pfspwt.Ant`): Ant.
+
+        Returns:
+            float: Weighted tardiness
+        """
+        with self._optimizer.phase('evaluation'):
+            ant.objective = self._optimizer.evaluate(
+                    self._instance, ant.asarray(), objectives=ant.objectives(),
+                    workspace=self._workspace)
+        return ant.objective
+
+    def evaluate_batch(self, ants):
+        """Evaluates the solutions newly found by a group of ants.
+
+        Only the ants whose objective value is unknown are evaluated.
+
+        Parameters:
+            ants (list): List of ants.
+
+        Returns:
+            :obj:`np.ndarray`: Weighted tardiness of each ant.
+        """
+        solutions = [ant.asarray() for ant in ants]
+        with self._optimizer.phase('evaluation'):
+            scores = self._optimizer.evaluate_batch(
+                    self._instance, solutions,
+                    objectives=[ant.objectives() for ant in ants],
+                    workspace=self._workspace)
+        for ant, score in zip(ants, scores):
+            ant.objective = score
+        return scores
+
+    def score(self, ant):
+        """Returns the weighted tardiness of an ant that has
+        already been evaluated.
+
+        The ant is evaluated if its objective value is unknown.
+
         Parameters:
             ant (:obj:`pfspwt.Ant`): Ant.
 
         Returns:
             float: Weighted tardiness
         """
-        return self._optimizer.evaluate(self._instance, ant.asarray())
+        if ant.objective is None:
+            return self.evaluate(ant)
+        return ant.objective
 
     def initialize(self, instance):
         """Initialize the ant colony for an instance of the PFSP-WT problem.
@@ -66,31 +154,49 @@ class ACO(metaclass=ABCMeta):
         3) Initialize the parameters of the algorithm.
         4) Initialize the pheromone trails.
 
+        If profiling is enabled, the initial solution is accounted
+        for in the "neh" phase of the profiler of the optimizer.
+
         Parameters:
             instance (:obj:`pfspwt.Instance`): Instance
                 of the PFSP-WT problem.
         """
         # Start keeping track of optimal solutions
         self._optimizer.start()
+        seed = self.seed
+        if seed is None:
+            seed = np.random.randint(np.iinfo(np.int32).max)
+        self._rng = RandomStreams(seed)
 
         # Find initial solution
         self._instance = instance
-        ant = self.initial_solution(instance)
+        self._workspace = instance.create_workspace()
+        if self.n_jobs > 1:
+            self._workspaces = [
+                    instance.create_workspace() for _ in range(self.n_jobs)]
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.n_jobs)
+        with self._optimizer.phase('neh'):
+            ant = self.initial_solution(instance)
         self._Zbest = self.evaluate(ant)
         self._best = ant.copy()
 
         # Apply local search
-        ant = self.local_search(ant)
-        Z = self.evaluate(ant)
-        if Z < self._Zbest:
-            self._Zbest = Z
-            self._best = ant.copy()
+        with self._optimizer.phase('local_search'):
+            improved = self.local_search(ant)
+        if improved is not ant:
+            Z = self.evaluate(improved)
+            if Z < self._Zbest:
+                self._Zbest = Z
+                self._best = improved.copy()
 
         # Initialize parameter values
-        self.update_parameters()
+        with self._optimizer.phase('parameter_update'):
+            self.update_parameters()
 
         # Initialize pheromone trails
-        self.init_pheromones()
+        with self._optimizer.phase('pheromone_update'):
+            self.init_pheromones()
 
     def step(self):
         """Applies one ACO step.
@@ -98,69 +204,198 @@ class ACO(metaclass=ABCMeta):
         An ACO step consists in creating multiple
         ants to find new solutions, eventually
         applying local search on them, and updating
-        the pheromones and parameters.
+        the pheromones and parameters. When pheromones
+        are updated by the best ant of the iteration only,
+        the solutions of the whole colony are evaluated at once.
+
+        If `n_jobs` > 1, ants are built and improved concurrently
+        (see `create_colony`). When pheromones are updated by each
+        ant, a batched variant of the update is then used: all
+        the ants of the iteration follow the same trails, and
+        their updates are applied in order once the whole colony
+        has been built.
+
+        If the iteration is applied by a compiled kernel (see
+        `compiled`), the ants are only accounted for by the optimizer
+        once the whole colony has been built.
+
+        If profiling is enabled, the time spent in each phase
+        (construction, local search, evaluation, pheromone update and
+        parameter update) is accounted for by the profiler of the
+        optimizer (see `pfspwt.optimizer.Profiler`). Iterations are
+        then never applied by a compiled kernel, which would not
+        tell the phases apart. Both paths give the same results.
         """
-        solutions, scores = list(), list()
-        for k in range(self.n_ants):
-
-            # Create ant
-            ant = self.create_solution()
+        phase = self._optimizer.phase
+        if self.compiled and self.n_jobs == 1 and self.iterate is not None \
+                and self._optimizer.profiler is None:
+            self.compiled_step()
+            with phase('parameter_update'):
+                self.update_parameters()
+            return
 
-            # Apply local search
-            ant = self.local_search(ant)
-
-            # Update pheromones with each ant if asked
+        solutions, scores = list(), list()
+        if self.n_jobs > 1:
+            solutions = self.create_colony()
             if self.pheromones_are_individual():
-                self.update_pheromones(ant)
-
-            # Evaluate solution found by the ant
-            solutions.append(ant)
-            score = self.evaluate(ant)
-            scores.append(score)
-            if score < self._Zbest:
-                self._Zbest = score
-                self._best = ant
-
-            # Check for convergence or ressources
-            if not self._optimizer.is_running():
-                break
+                for ant in solutions:
+                    score = self.evaluate(ant)
+                    scores.append(score)
+                    with phase('pheromone_update'):
+                        self.update_pheromones(ant)
+                    if score < self._Zbest:
+                        self._Zbest = score
+                        self._best = ant
+            else:
+                scores = self.evaluate_batch(solutions)
+                k = np.argmin(scores)
+                if scores[k] < self._Zbest:
+                    self._Zbest = scores[k]
+                    self._best = solutions[k]
+        elif self.pheromones_are_individual():
+            for k in range(self.n_ants):
+
+                # Create ant
+                with phase('construction'):
+                    ant = self.create_solution()
+
+                # Apply local search
+                with phase('local_search'):
+                    ant = self.local_search(ant)
+
+                # Evaluate solution found by the ant
+                solutions.append(ant)
+                score = self.evaluate(ant)
+                scores.append(score)
+
+                # Update pheromones with each ant
+                with phase('pheromone_update'):
+                    self.update_pheromones(ant)
+                if score < self._Zbest:
+                    self._Zbest = score
+                    self._best = ant
+
+                # Check for convergence or ressources
+                if not self._optimizer.is_running():
+                    break
+        else:
+            for k in range(self.n_ants):
+
+                # Create ant and apply local search
+                with phase('construction'):
+                    ant = self.create_solution()
+                with phase('local_search'):
+                    ant = self.local_search(ant)
+                solutions.append(ant)
+
+                # Check for ressources
+                if not self._optimizer.is_running():
+                    break
+
+            # Evaluate solutions found by the whole colony
+            scores = self.evaluate_batch(solutions)
+            k = np.argmin(scores)
+            if scores[k] < self._Zbest:
+                self._Zbest = scores[k]
+                self._best = solutions[k]
 
         # Best ant for current iteration
         current_ant = solutions[np.argmin(scores)]
 
         # Update trails of pheromones
         if not self.pheromones_are_individual():
-            self.update_pheromones(current_ant)
+            with phase('pheromone_update'):
+                self.update_pheromones(current_ant)
 
         # Update algorithm parameters
-        self.update_parameters()
+        with phase('parameter_update'):
+            self.update_parameters()
 
-    def local_search(self, ant):
+    def compiled_step(self):
+        """Applies one ACO step with a single call to a compiled kernel.
+
+        Each ant draws its random numbers from its own stream, inside
+        of the kernel. Streams are spawned in the same order as when
+        the ants are built one at a time.
+        """
+        n = self._instance.n
+        streams = self._rng.spawn(self.n_ants)
+        solutions = np.empty((self.n_ants, n), dtype=np.int32)
+        wt = np.empty(self.n_ants, dtype=np.float64)
+        ms = np.empty(self.n_ants, dtype=np.int32)
+        best = np.copy(self._best.asarray())
+        Zbest = self.iterate(streams, best, solutions, wt, ms)
+
+        # Account for the solutions found by the whole colony
+        self._optimizer.evaluate_batch(
+                self._instance, list(solutions),
+                objectives=list(zip(wt, ms)), workspace=self._workspace)
+        if Zbest < self._Zbest:
+            self._Zbest = Zbest
+            self._best = Ant(best, objective=Zbest)
+
+    def create_colony(self):
+        """Builds and improves all the ants of an iteration concurrently.
+
+        Random numbers are drawn from the generator of the colony
+        beforehand, one independent stream per ant, and ants are
+        dispatched among `n_jobs` threads, each thread having
+        its own workspace. The resulting ants only depend on the
+        seed, and are the same as the ones built sequentially.
+
+        Each thread measures the time it spends in construction and
+        in local search, and these times are summed over the threads.
+
+        Returns:
+            list: Ants of the iteration, after local search.
+        """
+        n = self._instance.n
+        u = self._rng.uniform(self._rng.spawn(self.n_ants), 2 * n)
+
+        def build(indices, workspace):
+            ants, t_build, t_ls = list(), 0., 0.
+            for k in indices:
+                t0 = time.perf_counter()
+                ant = self.create_solution(u[k])
+                t1 = time.perf_counter()
+                ants.append(self.local_search(ant, workspace=workspace))
+                t_build, t_ls = t_build + t1 - t0, \
+                        t_ls + time.perf_counter() - t1
+            return ants, t_build, t_ls
+
+        chunks = np.array_split(np.arange(self.n_ants), self.n_jobs)
+        futures = [self._executor.submit(build, chunk, workspace)
+                   for chunk, workspace in zip(chunks, self._workspaces)]
+        ants = list()
+        for future in futures:
+            chunk, t_build, t_ls = future.result()
+            self._optimizer.phase('construction').add(t_build, len(chunk))
+            self._optimizer.phase('local_search').add(t_ls, len(chunk))
+            ants.extend(chunk)
+        return ants
+
+    def local_search(self, ant, workspace=None):
         """Applies local search on current solution.
 
         Parameters:
             ant (:obj:`pfspwt.Ant`): Current ant in
                 exploration phase.
+            workspace (:obj:`pfspwt.workspace.Workspace`): Scratch
+                buffers. The workspace of the colony is used if None.
 
         Returns:
             :obj:`pfspwt.Ant`: An ant with possibly
-                improved solution.
+                improved solution. The ant carries the weighted
+                tardiness computed by the local search, if any.
         """
-        solution = ant.asarray()
-        for _ in range(3):
-            improvement = False
-            if self._ls == 'swap':
-                solution, improvement = swap_search(
-                        self._instance, solution)
-            elif self._ls == 'interchange':
-                solution, improvement = interchange_search(
-                        self._instance, solution)
-            elif self._ls == 'insertion':
-                solution, improvement = insertion_search(
-                        self._instance, solution)
-            if not improvement:
-                break
-        return Ant(solution)
+        if self._ls in (None, 'none'):
+            return ant
+        if workspace is None:
+            workspace = self._workspace
+        solution, objective = local_search(
+                self._instance, ant.asarray(), self._ls, workspace=workspace)
+        return Ant(solution, objective=objective,
+                   completion=workspace.c[:, -1].copy())
 
     @abstractmethod
     def initial_solution(self, instance):
@@ -215,13 +450,19 @@ class ACO(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def create_solution(self):
+    def create_solution(self, u=None):
         """Creates a new solution.
 
         Creates a new solution based on current values
         of trail intensities and returns an ant associated
         with that solution.
 
+        Parameters:
+            u (:obj:`np.ndarray`, optional): Array of shape (2 * n,)
+                of random numbers used for building the solution.
+                They are drawn from the random generator of the
+                colony if None.
+
         Returns:
             :obj:´pfspwt.Ant´: Ant that found the new solution.
         """
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+# island.py: Island model running several colonies in parallel
+# author : Antoine Passemiers
+
+from pfspwt.ant import Ant
+from pfspwt.optimizer import Optimizer
+
+from collections.abc import Mapping
+import importlib
+import multiprocessing
+import os
+import queue
+import traceback
+import numpy as np
+
+
+class LazyColonies(Mapping):
+    """Classes of the colonies, by name of the algorithm.
+
+    The module of a class is only imported when the class is
+    accessed, hence the kernels of the other algorithms are
+    neither compiled nor loaded from the cache.
+
+    Attributes:
+        _paths (dict): Module and name of each class,
+            by name of the algorithm.
+    """
+
+    def __init__(self, paths):
+        self._paths = paths
+
+    def __getitem__(self, method):
+        module, name = self._paths[method].rsplit('.', 1)
+        return getattr(importlib.import_module(module), name)
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+
+COLONIES = LazyColonies({
+    'MMAS': 'pfspwt.aco.mmas.MMAS',
+    'M-MMAS': 'pfspwt.aco.mmmas.MMMAS',
+    'PACO': 'pfspwt.aco.paco.PACO'
+})
+
+
+def pack_ant(ant):
+    """Serializes an evaluated ant to be sent to another process.
+
+    Parameters:
+        ant (:obj:`pfspwt.Ant`): Ant to be sent.
+
+    Returns:
+        tuple: Weighted tardiness and raw bytes of the solution.
+    """
+    return float(ant.objective), ant.asarray().astype(np.int32).tobytes()
+
+
+def unpack_ant(message):
+    """Deserializes an ant received from another process.
+
+    Parameters:
+        message (tuple): Message created by `pack_ant`.
+
+    Returns:
+        :obj:`pfspwt.Ant`: Received ant, carrying the weighted
+            tardiness computed by the sending process.
+    """
+    score, buf = message
+    return Ant(np.frombuffer(buf, dtype=np.int32).copy(), objective=score)
+
+
+def _run_colony(instance, config, limits, optimizer_class,
+                migration_interval, inbox, outbox):
+    """Runs a colony in the current process.
+
+    Every `migration_interval` iterations, the best ant of the colony
+    is sent to the next island and the ants received from the
+    previous island are adopted if they improve the colony.
+
+    Parameters:
+        instance (:obj:`pfspwt.Instance`): PFSP-WT instance.
+        config (dict): Name of the algorithm (key 'method') and
+            keyword arguments of the colony.
+        limits (dict): Keyword arguments of the optimizer.
+        optimizer_class (type): Class of the optimizer.
+        migration_interval (int): Number of iterations between
+            two migrations.
+        inbox (:obj:`multiprocessing.Queue`): Queue of incoming ants.
+        outbox (:obj:`multiprocessing.Queue`): Queue of outgoing ants.
+
+    Returns:
+        :obj:`pfspwt.optimizer.BaseOptimizer`: Optimizer of the colony,
+            once the colony has finished.
+    """
+    config = dict(config)
+    method = config.pop('method')
+    optimizer = optimizer_class(**limits)
+    colony = COLONIES[method](optimizer, **config)
+    colony.initialize(instance)
+    k = 0
+    while optimizer.is_running():
+        colony.step()
+        optimizer.step()
+        k += 1
+        if migration_interval > 0 and k % migration_interval == 0:
+
+            # Send best ant to the next island
+            outbox.put(pack_ant(colony._best))
+
+            # Adopt the ants received from the previous island
+            while True:
+                try:
+                    ant = unpack_ant(inbox.get_nowait())
+                except queue.Empty:
+                    break
+                score = colony.evaluate(ant)
+                if score < colony._Zbest:
+                    colony._Zbest = score
+                    colony._best = ant
+    return optimizer
+
+
+def _run_island(index, instance, config, limits, optimizer_class,
+                migration_interval, inbox, outbox, results):
+    """Runs a colony in the current process and sends back its results.
+
+    Parameters:
+        index (int): Index of the island.
+        results (:obj:`multiprocessing.Queue`): Queue where the
+            optimizer is sent back once the colony has finished,
+            as a tuple (index, optimizer, None), or where the
+            traceback of the exception raised by the colony
+            is sent, as a tuple (index, None, traceback).
+
+    See `_run_colony` for the other parameters.
+    """
+    try:
+        result = (index, _run_colony(
+                instance, config, limits, optimizer_class,
+                migration_interval, inbox, outbox), None)
+    except Exception:
+        result = (index, None, traceback.format_exc())
+
+    # Migrants that have not been received must not prevent
+    # the process from exiting
+    outbox.cancel_join_thread()
+    results.put(result)
+
+
+class IslandModel:
+    """Island model, where colonies run in separate processes.
+
+    Islands are arranged in a ring, and each island
+    periodically sends its best ant to the next one.
+    Each island has its own optimizer, with the same
+    limits in computational resources.
+
+    Attributes:
+        POLL_INTERVAL (float): Time in seconds between two checks
+            of the state of the islands.
+        islands (list): List of dictionaries, one per island,
+            where key 'method' is the name of the algorithm
+            ('MMAS', 'M-MMAS' or 'PACO') and the other keys are
+            keyword arguments of the colony (`n_ants`, `rho`, `ls`...).
+        migration_interval (int): Number of iterations between
+            two migrations. Migrations are disabled if 0.
+        optimizer_class (type): Class of the optimizers.
+        optimizer (:obj:`pfspwt.optimizer.BaseOptimizer`):
+            Optimizer where the results of all islands are merged,
+            available once `run` has returned.
+        _limits (dict): Keyword arguments of the optimizers
+            (limits in computational resources, cache size,
+            profiling and history of the objective values).
+        _seed (int): Seed of the first island. Island k
+            is seeded with `seed + k`. If None, the seed of the
+            first island is drawn randomly at each run.
+    """
+
+    POLL_INTERVAL = 1.
+
+    def __init__(self, islands, migration_interval=10,
+                 n_iterations=np.inf, early_stopping=np.inf,
+                 max_time=None, seed=None, cache_size=None, profile=False,
+                 history='all', history_size=10000,
+                 optimizer_class=Optimizer):
+        self.islands = islands
+        self.migration_interval = migration_interval
+        self.optimizer_class = optimizer_class
+        self.optimizer = None
+        self._limits = {
+            'n_iterations': n_iterations,
+            'early_stopping': early_stopping,
+            'max_time': max_time,
+            'cache_size': cache_size,
+            'profile': profile,
+            'history': history,
+            'history_size': history_size
+        }
+        self._seed = seed
+
+    def run(self, instance):
+        """Runs all the islands on an instance of the PFSP-WT problem.
+
+        The state of the islands is checked every `POLL_INTERVAL`
+        seconds while waiting for their results. If an island raises
+        an exception or exits without sending its results, the other
+        islands are terminated and a RuntimeError is raised.
+
+        Parameters:
+            instance (:obj:`pfspwt.Instance`): PFSP-WT instance.
+
+        Returns:
+            :obj:`pfspwt.optimizer.BaseOptimizer`: Optimizer
+                where the results of all islands are merged.
+        """
+        n_islands = len(self.islands)
+        queues = [multiprocessing.Queue() for _ in range(n_islands)]
+        results = multiprocessing.Queue()
+        processes = list()
+        # Forked islands inherit the state of the global NumPy generator,
+        # hence they are seeded explicitly even when no seed is given
+        seed = self._seed
+        if seed is None:
+            seed = int.from_bytes(os.urandom(4), 'little') >> 1
+        for k, config in enumerate(self.islands):
+            limits = dict(self._limits)
+            limits['seed'] = (seed + k) % 2 ** 32
+            process = multiprocessing.Process(
+                    target=_run_island,
+                    args=(k, instance, config, limits, self.optimizer_class,
+                          self.migration_interval, queues[k],
+                          queues[(k + 1) % n_islands], results))
+            process.start()
+            processes.append(process)
+
+        # Results must be received before joining the processes
+        try:
+            optimizers = self._receive(processes, results)
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+        self.optimizer = self.optimizer_class(**self._limits)
+        for k in range(n_islands):
+            self.optimizer.merge(optimizers[k])
+        return self.optimizer
+
+    def _receive(self, processes, results):
+        """Waits for the optimizers of all the islands.
+
+        Parameters:
+            processes (list): Processes running the islands.
+            results (:obj:`multiprocessing.Queue`): Queue where the
+                islands send their results (see `_run_island`).
+
+        Returns:
+            dict: Optimizer of each island, by index.
+        """
+        optimizers = dict()
+        exited = False
+        while len(optimizers) < len(processes):
+            try:
+                index, optimizer, error = results.get(
+                        timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                dead = [k for k, process in enumerate(processes)
+                        if k not in optimizers and not process.is_alive()]
+                if len(dead) > 0 and exited:
+                    raise RuntimeError(
+                            'Island %d exited with code %s without sending '
+                            'its results.' % (
+                            dead[0], processes[dead[0]].exitcode))
+
+                # Results of an island that has just exited
+                # may still be in transit
+                exited = len(dead) > 0
+                continue
+            if error is not None:
+                raise RuntimeError('Island %d failed:\n%s' % (index, error))
+            optimizers[index] = optimizer
+        return optimizers
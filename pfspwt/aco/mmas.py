@@ -4,6 +4,7 @@
 
 from pfspwt.ant import Ant
 from pfspwt.aco.base import ACO
+from pfspwt.aco.pheromones import PheromoneTrails
 from pfspwt.heuristics import neh_algorithm
 
 import numba
@@ -30,7 +31,7 @@ class MMAS(ACO):
         Returns:
             :obj:`pfspwt.Ant`: Ant representing the initial solution. 
         """
-        return Ant(neh_algorithm(instance))
+        return Ant(neh_algorithm(instance, workspace=self._workspace))
 
     def init_pheromones(self):
         """Initializes pheromone trails.
@@ -39,7 +40,7 @@ class MMAS(ACO):
         solution (NEH).
         """
         n = self._instance.n
-        self._tau = np.full((n, n), self._tau_max, dtype=np.float32)
+        self._tau = PheromoneTrails(n, self._tau_max)
 
     def update_pheromones(self, ant):
         """Updates pheromone trails.
@@ -48,19 +49,8 @@ class MMAS(ACO):
             ant (:obj:`pfspwt.Ant`): Ant that is in charge of
                 adding pheromone trails.
         """
-        n = self._instance.n
-        Zcurrent = self.evaluate(ant)
-        indices = ant.asarray()
-
-        # Trail evaporation
-        self._tau *= self.rho
-
-        # Add new pheromone trail
-        self._tau[indices, np.arange(n)] += (1. / Zcurrent)
-
-        # Set tau_{i, j} to tau_{min} if tau_{i, j} < tau_{min}
-        # Set tau_{i, j} to tau_{max} if tau_{i, j} > tau_{max}
-        np.clip(self._tau, self._tau_min, self._tau_max, out=self._tau)
+        self._tau.update(ant.asarray(), self.score(ant), self.rho,
+                         self._tau_min, self._tau_max)
 
     def pheromones_are_individual(self):
         """Whether pheromones are added by all ants or not.
@@ -80,79 +70,96 @@ class MMAS(ACO):
         self._tau_max =  1. / ((1. - self.rho) * self._Zbest)
         self._tau_min = self._tau_max / 5.
 
-    @numba.jit('void(f4[:, :], i4[:], i4[:], i4[:])', nopython=True)
-    def _create_solution(T, solution, best, candidates):
+    @numba.jit('void(f4[:, :], i4[:], i4[:], i4[:], f8[:])',
+               nopython=True, nogil=True, cache=True)
+    def _create_solution(T, solution, best, candidates, u):
         """Creates a solution by following pheromone trails.
 
         The algorithm uses the best sequence found so far as
-        an heuristic, but also uses cumulative pheromone intensities
-        to build a new solution.
+        an heuristic, but also uses pheromone intensities
+        to build a new solution. Candidates are kept in a buffer
+        of fixed size, and no array is allocated.
 
         Parameters:
-            T (:obj:`np.ndarray`): Cumulative trail intensities,
-                represented by an array of shape (n, n) where
-                intensities have been summed over the second dimension.
+            T (:obj:`np.ndarray`): Trail intensities, represented
+                by an array of shape (n, n).
             solution (:obj:`np.ndarray`): Array of shape (n,) where
                 the solution will be stored. `solution[i]` is the
                 identifier of the job being scheduled at position i.
             best (:obj:`np.ndarray`): Best sequence found so far.
-            candidates (:obj:`np.ndarray`): Array of shape (5,) that
+            candidates (:obj:`np.ndarray`): Array of shape (n,) that
                 is used to store unscheduled jobs.
+            u (:obj:`np.ndarray`): Array of shape (2 * n,) of random
+                numbers drawn uniformly in [0, 1).
         """
         n = T.shape[0]
-        idx = np.arange(candidates.shape[0])
 
-        # Store in `candidates` the next 5 job identifiers
-        # to be scheduled
-        for next_id in range(candidates.shape[0]):
+        # Store in `candidates` all the job identifiers, in the order
+        # of the best sequence. The first `n_candidates` elements
+        # are the unscheduled jobs.
+        for next_id in range(n):
             candidates[next_id] = best[next_id]
-        next_id = candidates.shape[0]
+        n_candidates = n
 
         for k in range(n):
 
-            u = np.random.rand()
-            if u < (n - 4.) / n:
-                # Take the job with maximal cumulative trail
-                # intensity among the all unscheduled jobs remaining
+            u_k = u[2*k]
+            if u_k < (n - 4.) / n:
+                # Take the job with maximal trail intensity
+                # among the all unscheduled jobs remaining
                 # in the best sequence
-                candidate_id = np.argmax(T[candidates, k])
+                candidate_id = 0
+                for q in range(1, n_candidates):
+                    if T[candidates[q], k] > T[candidates[candidate_id], k]:
+                        candidate_id = q
             else:
                 # Randomly take a job (based on intensities)
-                # among the 5 first unscheduled jobs in the
-                # best sequence
-                proba = T[candidates, k]
-                proba /= proba.sum()
-                candidate_id = idx[:5][
-                        np.searchsorted(np.cumsum(proba), np.random.rand())]
+                # among all the unscheduled jobs remaining
+                # in the best sequence
+                total = np.float32(0.)
+                for q in range(n_candidates):
+                    total += T[candidates[q], k]
+                candidate_id = n_candidates - 1
+                acc = np.float32(0.)
+                for q in range(n_candidates):
+                    acc += T[candidates[q], k] / total
+                    if acc >= u[2*k+1]:
+                        candidate_id = q
+                        break
 
             # Add the elected candidate job to the solution
             i = candidates[candidate_id]
             solution[k] = i
 
-            # Remove elected candidate from `candidates` and add the next
-            # unscheduled job from the best solution
-            candidates = candidates[np.arange(candidates.shape[0]) != candidate_id]
+            # Remove elected candidate from `candidates`
+            for q in range(candidate_id, n_candidates - 1):
+                candidates[q] = candidates[q+1]
+            n_candidates -= 1
 
-    def create_solution(self):
+    def create_solution(self, u=None):
         """Creates a new solution.
 
         Creates a new solution based on current values
         of trail intensities and returns an ant associated
         with that solution.
 
+        Parameters:
+            u (:obj:`np.ndarray`, optional): Array of shape (2 * n,)
+                of random numbers used for building the solution.
+                They are drawn from the random generator of the
+                colony if None.
+
         Returns:
             :obj:´pfspwt.Ant´: Ant that found the new solution.
         """
         n = self._instance.n
+        if u is None:
+            u = self._rng.random_sample(2 * n)
         solution = np.arange(n, dtype=np.int32)
         candidates = np.zeros(n, dtype=np.int32)
 
         # Create new solution
-        T = self._tau
-        MMAS._create_solution(T, solution, self._best.asarray(), candidates)
-
-        # Reject solution if negative job identifiers
-        if not (n == len(np.unique(solution)) \
-                and np.all(n > solution) and np.all(solution >= 0)):
-            solution = self._best.asarray()
+        T = self._tau.asarray()
+        MMAS._create_solution(
+                T, solution, self._best.asarray(), candidates, u)
         return Ant(solution)
@@ -4,12 +4,156 @@
 
 from pfspwt.ant import Ant
 from pfspwt.aco.base import ACO
+from pfspwt.aco.pheromones import PheromoneTrails
+from pfspwt.aco.pheromones import _bounded_update
 from pfspwt.heuristics import neh_algorithm
+from pfspwt.neighbourhood import LOCAL_SEARCHES, _local_search
+from pfspwt.rng import _fill_uniform
 
 import numba
 import numpy as np
 
 
+@numba.jit('void(f4[:, :], i4[:], i4[:], i4[:], f8[:])',
+           nopython=True, nogil=True, cache=True)
+def _create_solution(T, solution, best, candidates, u):
+    """Creates a solution by following pheromone trails.
+
+    The algorithm uses the best sequence found so far as
+    an heuristic, but also uses cumulative pheromone intensities
+    to build a new solution. Candidates are kept in a buffer
+    of fixed size, and no array is allocated.
+
+    Parameters:
+        T (:obj:`np.ndarray`): Cumulative trail intensities,
+            represented by an array of shape (n, n) where
+            intensities have been summed over the second dimension.
+        solution (:obj:`np.ndarray`): Array of shape (n,) where
+            the solution will be stored. `solution[i]` is the
+            identifier of the job being scheduled at position i.
+        best (:obj:`np.ndarray`): Best sequence found so far.
+        candidates (:obj:`np.ndarray`): Array of shape (5,) that
+            is used to store the next 5 job identifiers in the
+            best sequence that have not been scheduled yet in
+            the current solution.
+        u (:obj:`np.ndarray`): Array of shape (2 * n,) of random
+            numbers drawn uniformly in [0, 1).
+    """
+    n = T.shape[0]
+
+    # Store in `candidates` the next 5 job identifiers
+    # to be scheduled. The first `n_candidates` elements
+    # are the unscheduled jobs.
+    for next_id in range(candidates.shape[0]):
+        candidates[next_id] = best[next_id]
+    next_id = n_candidates = candidates.shape[0]
+
+    for k in range(n):
+
+        u_k = u[2*k]
+        if u_k < (n - 4.) / n:
+            # Take the job with maximal cumulative trail
+            # intensity among the 5 first unscheduled jobs
+            # in the seed sequence
+            candidate_id = 0
+            for q in range(1, n_candidates):
+                if T[candidates[q], k] > T[candidates[candidate_id], k]:
+                    candidate_id = q
+        else:
+            # Randomly take a job (based on intensities)
+            # among the 5 first unscheduled jobs in the
+            # seed sequence
+            total = np.float32(0.)
+            for q in range(n_candidates):
+                total += T[candidates[q], k]
+            candidate_id = n_candidates - 1
+            acc = np.float32(0.)
+            for q in range(n_candidates):
+                acc += T[candidates[q], k] / total
+                if acc >= u[2*k+1]:
+                    candidate_id = q
+                    break
+
+        # Add the elected candidate job to the solution
+        i = candidates[candidate_id]
+        solution[k] = i
+
+        # Remove elected candidate from `candidates` and add the next
+        # unscheduled job from the best solution
+        if next_id < n:
+            candidates[candidate_id] = best[next_id]
+            next_id += 1
+        else:
+            for q in range(candidate_id, n_candidates - 1):
+                candidates[q] = candidates[q+1]
+            n_candidates -= 1
+
+
+@numba.jit('f8(f4[:, :], f8[:], f4[:, :], i4[:], f8, f8, f8, f8, u8[:], '
+           'i4, i4[:, :], i4[:], f4[:], i4[:, :], i4[:], f8[:], i4[:], '
+           'i4[:], i4[:, :], f8[:], i4[:])',
+           nopython=True, nogil=True, cache=True)
+def _iterate(raw, state, T, best, Zbest, rho, tau_min, tau_max, streams, ls,
+             p, d, w, c, row, z, candidates, buf, solutions, wt, ms):
+    """Applies a whole M-MMAS iteration.
+
+    All the ants are built from the same trails, improved by local
+    search and evaluated. The best ant of the iteration then
+    updates the pheromone trails.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw trail intensities, updated inplace.
+        state (:obj:`np.ndarray`): State of the trails, updated inplace
+            (see `pfspwt.aco.pheromones.PheromoneTrails`).
+        T (:obj:`np.ndarray`): Cumulative intensities of the trails
+            before the update (see
+            `pfspwt.aco.pheromones.PheromoneTrails.cumulative`).
+        best (:obj:`np.ndarray`): Best sequence found so far,
+            replaced inplace by the best sequence of the iteration
+            if the latter is better.
+        Zbest (float): Weighted tardiness of `best`.
+        rho (float): Pheromone trail persistence.
+        tau_min (float): Lower bound on trail intensities.
+        tau_max (float): Upper bound on trail intensities.
+        streams (:obj:`np.ndarray`): Array of shape (n_ants,) containing
+            the states of the random number streams of the ants.
+        ls (int): Identifier of the local search method.
+        p (:obj:`np.ndarray`): Computation times.
+        d (:obj:`np.ndarray`): Due dates.
+        w (:obj:`np.ndarray`): Weights.
+        c (:obj:`np.ndarray`): Buffer for the completion times.
+        row (:obj:`np.ndarray`): Buffer of shape (m,).
+        z (:obj:`np.ndarray`): Buffer of shape (n,).
+        candidates (:obj:`np.ndarray`): Buffer of shape (5,).
+        buf (:obj:`np.ndarray`): Buffer of shape (n,).
+        solutions (:obj:`np.ndarray`): Array of shape (n_ants, n)
+            where the solutions of the ants will be stored.
+        wt (:obj:`np.ndarray`): Array of shape (n_ants,) where the
+            weighted tardiness of the ants will be stored.
+        ms (:obj:`np.ndarray`): Array of shape (n_ants,) where the
+            makespan of the ants will be stored.
+
+    Returns:
+        float: Weighted tardiness of `best`.
+    """
+    n, m = c.shape[0], c.shape[1]
+    u = np.empty(2 * n, dtype=np.float64)
+    for k in range(solutions.shape[0]):
+        _fill_uniform(streams, k, u)
+        _create_solution(T, solutions[k], best, candidates, u)
+        wt[k] = _local_search(ls, 3, c, row, z, p, d, w, solutions[k], buf)
+        ms[k] = c[n-1, m-1]
+
+    # Best ant for current iteration
+    k = np.argmin(wt)
+    if wt[k] < Zbest:
+        Zbest = wt[k]
+        best[:] = solutions[k]
+
+    _bounded_update(raw, state, solutions[k], wt[k], rho, tau_min, tau_max)
+    return Zbest
+
+
 class MMMAS(ACO):
     """Extension of the MMAS algorithm from Thomas Stützle,
     as suggested by Rajendran et al.
@@ -35,7 +179,7 @@ class MMMAS(ACO):
         Returns:
             :obj:`pfspwt.Ant`: Ant representing the initial solution. 
         """
-        return Ant(neh_algorithm(instance))
+        return Ant(neh_algorithm(instance, workspace=self._workspace))
 
     def init_pheromones(self):
         """Initializes pheromone trails.
@@ -44,7 +188,7 @@ class MMMAS(ACO):
         solution (NEH).
         """
         n = self._instance.n
-        self._tau = np.full((n, n), self._tau_max, dtype=np.float32)
+        self._tau = PheromoneTrails(n, self._tau_max)
 
     def update_pheromones(self, ant):
         """Updates pheromone trails.
@@ -53,19 +197,8 @@ class MMMAS(ACO):
             ant (:obj:´pfspwt.Ant`): Ant that is in charge of
                 adding pheromone trails.
         """
-        n = self._instance.n
-        Zcurrent = self.evaluate(ant)
-        indices = ant.asarray()
-
-        # Trail evaporation
-        self._tau *= self.rho
-
-        # Add new pheromone trail
-        self._tau[indices, np.arange(n)] += (1. / Zcurrent)
-
-        # Set \tau_{i, j} to \tau_{min} if \tau_{i, j} < \tau_{min}
-        # Set \tau_{i, j} to \tau_{max} if \tau_{i, j} > \tau_{max}
-        np.clip(self._tau, self._tau_min, self._tau_max, out=self._tau)
+        self._tau.update(ant.asarray(), self.score(ant), self.rho,
+                         self._tau_min, self._tau_max)
 
     def pheromones_are_individual(self):
         """Whether pheromones are added by all ants or not.
@@ -76,6 +209,25 @@ class MMMAS(ACO):
         """
         return False
 
+    def iterate(self, streams, best, solutions, wt, ms):
+        """Applies a whole iteration with a single call to
+        a compiled kernel.
+
+        See `pfspwt.aco.ACO`.
+
+        Returns:
+            float: Weighted tardiness of `best`.
+        """
+        n = self._instance.n
+        ws = self._workspace
+        return _iterate(
+                self._tau.raw, self._tau.state, self._tau.cumulative(), best,
+                self._Zbest, self.rho, self._tau_min, self._tau_max, streams,
+                LOCAL_SEARCHES[self._ls or 'none'], self._instance.p,
+                self._instance.d, self._instance.w.astype(np.float32),
+                ws.c, ws.row, ws.z, np.empty(5, dtype=np.int32),
+                np.empty(n, dtype=np.int32), solutions, wt, ms)
+
     def update_parameters(self):
         """Updates parameters.
 
@@ -85,81 +237,30 @@ class MMMAS(ACO):
         self._tau_max =  1. / ((1. - self.rho) * self._Zbest)
         self._tau_min = self._tau_max / 5.
 
-    @numba.jit('void(f4[:, :], i4[:], i4[:], i4[:])', nopython=True)
-    def _create_solution(T, solution, best, candidates):
-        """Creates a solution by following pheromone trails.
-
-        The algorithm uses the best sequence found so far as
-        an heuristic, but also uses cumulative pheromone intensities
-        to build a new solution.
-
-        Parameters:
-            T (:obj:`np.ndarray`): Cumulative trail intensities,
-                represented by an array of shape (n, n) where
-                intensities have been summed over the second dimension.
-            solution (:obj:`np.ndarray`): Array of shape (n,) where
-                the solution will be stored. `solution[i]` is the
-                identifier of the job being scheduled at position i.
-            best (:obj:`np.ndarray`): Best sequence found so far.
-            candidates (:obj:`np.ndarray`): Array of shape (5,) that
-                is used to store the next 5 job identifiers in the
-                best sequence that have not been scheduled yet in
-                the current solution.
-        """
-        n = T.shape[0]
-        idx = np.arange(candidates.shape[0])
-
-        # Store in `candidates` the next 5 job identifiers
-        # to be scheduled
-        for next_id in range(candidates.shape[0]):
-            candidates[next_id] = best[next_id]
-        next_id = candidates.shape[0]
-
-        for k in range(n):
-
-            u = np.random.rand()
-            if u < (n - 4.) / n:
-                # Take the job with maximal cumulative trail
-                # intensity among the 5 first unscheduled jobs
-                # in the seed sequence
-                candidate_id = np.argmax(T[candidates, k])
-            else:
-                # Randomly take a job (based on intensities)
-                # among the 5 first unscheduled jobs in the
-                # seed sequence
-                proba = T[candidates, k]
-                proba /= proba.sum()
-                candidate_id = idx[:candidates.shape[0]][
-                        np.searchsorted(np.cumsum(proba), np.random.rand())]
-
-            # Add the elected candidate job to the solution
-            i = candidates[candidate_id]
-            solution[k] = i
-
-            # Remove elected candidate from `candidates` and add the next
-            # unscheduled job from the best solution
-            if next_id < n:
-                candidates[candidate_id] = best[next_id]
-                next_id += 1
-            else:
-                candidates = candidates[np.arange(candidates.shape[0]) != candidate_id]
-
-    def create_solution(self):
+    def create_solution(self, u=None):
         """Creates a new solution.
 
         Creates a new solution based on current values
         of trail intensities and returns an ant associated
         with that solution.
 
+        Parameters:
+            u (:obj:`np.ndarray`, optional): Array of shape (2 * n,)
+                of random numbers used for building the solution.
+                They are drawn from the random generator of the
+                colony if None.
+
         Returns:
             :obj:´pfspwt.Ant´: Ant that found the new solution.
         """
         n = self._instance.n
+        if u is None:
+            u = self._rng.random_sample(2 * n)
         solution = np.arange(n, dtype=np.int32)
         candidates = np.zeros(5, dtype=np.int32)
 
-        # Summation of trail intensities
-        T = np.cumsum(self._tau, axis=1)
+        # Summation of trail intensities, computed once per update
+        T = self._tau.cumulative()
 
-        MMMAS._create_solution(T, solution, self._best.asarray(), candidates)
+        _create_solution(T, solution, self._best.asarray(), candidates, u)
         return Ant(solution)
@@ -4,16 +4,279 @@
 
 from pfspwt.ant import Ant
 from pfspwt.aco.base import ACO
+from pfspwt.aco.pheromones import BandedPheromoneTrails
+from pfspwt.aco.pheromones import RENORMALISATION_THRESHOLD, SCALE
+from pfspwt.aco.pheromones import _band_cumulate, _band_cumulative
+from pfspwt.aco.pheromones import _band_deposit, _band_renormalise, _evaporate
 from pfspwt.heuristics import neh_algorithm
+from pfspwt.neighbourhood import LOCAL_SEARCHES, _local_search
+from pfspwt.rng import _fill_uniform
 
 import numba
 import numpy as np
 
 
+@numba.jit('void(f4[:, :], f4[:, :], i4[:], i4[:], f8)',
+           nopython=True, nogil=True, cache=True, error_model='numpy')
+def _init_pheromones(raw, outer, start, h, Z):
+    """Initializes banded pheromone trails like in PACO.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw trail intensities inside of the bands.
+        outer (:obj:`np.ndarray`): Raw trail intensities outside
+            of the bands.
+        start (:obj:`np.ndarray`): First position of the band of each job.
+        h (:obj:`np.ndarray`): Position of each job in the seed sequence.
+        Z (float): Weighted tardiness of the seed sequence.
+    """
+    n, width = raw.shape[0], raw.shape[1]
+    for i in range(n):
+        for k in range(n):
+            # Intensity is divided by 2 if diff > n / 4,
+            # and by 4 if diff >= n / 2
+            diff = abs(h[i] - k) + 1
+            value = np.float32(1. / Z)
+            if n / 4. < diff:
+                value /= 2.
+            if n / 2. <= diff:
+                value /= 2.
+            b = k - start[i]
+            if b < 0:
+                outer[i, 0] += value
+            elif b >= width:
+                outer[i, 1] += value
+            else:
+                raw[i, b] = value
+
+
+@numba.jit('void(f4[:, :], i4[:], f4[:, :], f8[:], '
+           'i4[:], i4[:], i4[:], f8[:])',
+           nopython=True, nogil=True, cache=True)
+def _create_solution(T, start, outer, state, solution, best, candidates, u):
+    """Creates a solution by following pheromone trails.
+
+    The algorithm uses the seed sequence (sequence obtained
+    by running NEH heuristic + eventually local search) found so
+    far as an heuristic, but also uses cumulative pheromone
+    intensities to build a new solution. Candidates are kept
+    in a buffer of fixed size, and no array is allocated.
+
+    Parameters:
+        T (:obj:`np.ndarray`): Cumulative raw trail intensities of
+            the bands (see `pfspwt.aco.pheromones.BandedPheromoneTrails`).
+        start (:obj:`np.ndarray`): First position of the band of each job.
+        outer (:obj:`np.ndarray`): Raw trail intensities outside
+            of the bands.
+        state (:obj:`np.ndarray`): State of the trails.
+        solution (:obj:`np.ndarray`): Array of shape (n,) where
+            the solution will be stored. `solution[i]` is the
+            identifier of the job being scheduled at position i.
+        best (:obj:`np.ndarray`): Best sequence found so far.
+        candidates (:obj:`np.ndarray`): Array of shape (5,) that
+            is used to store the next 5 job identifiers in the
+            best sequence that have not been scheduled yet in
+            the current solution.
+        u (:obj:`np.ndarray`): Array of shape (2 * n,) of random
+            numbers drawn uniformly in [0, 1).
+    """
+    n = start.shape[0]
+
+    # Store in `candidates` the next 5 job identifiers
+    # to be scheduled. The first `n_candidates` elements
+    # are the unscheduled jobs.
+    for next_id in range(candidates.shape[0]):
+        candidates[next_id] = best[next_id]
+    next_id = n_candidates = candidates.shape[0]
+
+    for k in range(n):
+
+        u_k = u[2*k]
+        if u_k <= 0.4:
+            # Take the first unscheduled job found
+            # in the seed sequence
+            candidate_id = 0
+        elif u_k <= 0.8:
+            # Take the job with maximal cumulative trail
+            # intensity among the 5 first unscheduled jobs
+            # in the seed sequence
+            candidate_id = 0
+            max_value = _band_cumulative(
+                    T, start, outer, state, candidates[0], k)
+            for q in range(1, n_candidates):
+                value = _band_cumulative(
+                        T, start, outer, state, candidates[q], k)
+                if value > max_value:
+                    candidate_id, max_value = q, value
+        else:
+            # Randomly take a job (based on intensities)
+            # among the 5 first unscheduled jobs in the
+            # seed sequence
+            total = np.float32(0.)
+            for q in range(n_candidates):
+                total += _band_cumulative(
+                        T, start, outer, state, candidates[q], k)
+            candidate_id = n_candidates - 1
+            acc = np.float32(0.)
+            for q in range(n_candidates):
+                acc += _band_cumulative(
+                        T, start, outer, state, candidates[q], k) / total
+                if acc >= u[2*k+1]:
+                    candidate_id = q
+                    break
+
+        # Add the elected candidate job to the solution
+        i = candidates[candidate_id]
+        solution[k] = i
+
+        # Remove elected candidate from `candidates` and add the next
+        # unscheduled job from the best solution
+        for q in range(candidate_id, n_candidates - 1):
+            candidates[q] = candidates[q+1]
+        if next_id < n:
+            candidates[n_candidates-1] = best[next_id]
+            next_id += 1
+        else:
+            n_candidates -= 1
+
+
+@numba.jit('void(f4[:, :], f4[:, :], f4[:, :], i4[:], f8[:], i4[:], i4[:], '
+           'f8, f8, i4[:])',
+           nopython=True, nogil=True, cache=True, error_model='numpy')
+def _update_pheromones(raw, outer, T, start, state, solution, best, Z, rho, h):
+    """Updates pheromone trails inplace.
+
+    Evaporation is lazy (see `pfspwt.aco.pheromones.PheromoneTrails`),
+    hence only the trails receiving pheromones are written, and
+    cumulative intensities are only computed again from the first
+    of these trails in each band.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw trail intensities inside of the bands.
+        outer (:obj:`np.ndarray`): Raw trail intensities outside
+            of the bands.
+        T (:obj:`np.ndarray`): Cumulative raw trail intensities
+            of the bands.
+        start (:obj:`np.ndarray`): First position of the band of each job.
+        state (:obj:`np.ndarray`): State of the trails.
+        solution (:obj:`np.ndarray`): Solution of the ant that
+            is in charge of adding pheromone trails.
+        best (:obj:`np.ndarray`): Best sequence found so far.
+        Z (float): Weighted tardiness of `solution`.
+        rho (float): Pheromone trail persistence.
+        h (:obj:`np.ndarray`): Buffer of shape (n,).
+    """
+    n = raw.shape[0]
+
+    # h[i] is the position of job i in current sequence
+    for k in range(n):
+        h[solution[k]] = k
+
+    # Pheromone evaporation
+    _evaporate(state, rho)
+    if state[SCALE] < RENORMALISATION_THRESHOLD:
+        _band_renormalise(raw, outer, T, state)
+
+    # Add new pheromone trails close to the position of each job,
+    # where `diff` is computed like in PACO (with h_best = best)
+    bound = 1 if (n <= 40) else 2
+    width = raw.shape[1]
+    for i in range(n):
+        lo = max(0, h[i] - bound)
+        for k in range(lo, min(n, h[i] + bound + 1)):
+            diff = np.sqrt(abs(best[i] - k) + 1.)
+            _band_deposit(raw, start, state, i, k, 1. / (diff * Z))
+        b = min(max(lo - start[i], 0), width - 1)
+        _band_cumulate(raw, outer, T, i, b)
+
+
+@numba.jit('f8(f4[:, :], f4[:, :], i4[:], f8[:], f4[:, :], i4[:], f8, f8, '
+           'u8[:], i4, i4[:, :], i4[:], f4[:], i4[:, :], i4[:], f8[:], '
+           'i4[:], i4[:], i4[:, :], f8[:], i4[:])',
+           nopython=True, nogil=True, cache=True)
+def _iterate(raw, outer, start, state, T, best, Zbest, rho, streams, ls,
+             p, d, w, c, row, z, candidates, buf, solutions, wt, ms):
+    """Applies a whole PACO iteration.
+
+    Each ant is built from the current trails, improved by local
+    search and evaluated, and then updates the pheromone trails.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw trail intensities inside of the
+            bands, updated inplace.
+        outer (:obj:`np.ndarray`): Raw trail intensities outside
+            of the bands, updated inplace.
+        start (:obj:`np.ndarray`): First position of the band of each job.
+        state (:obj:`np.ndarray`): State of the trails, updated inplace
+            (see `pfspwt.aco.pheromones.BandedPheromoneTrails`).
+        T (:obj:`np.ndarray`): Cumulative raw trail intensities of
+            the bands, updated inplace.
+        best (:obj:`np.ndarray`): Best sequence found so far,
+            updated inplace each time an ant improves it.
+        Zbest (float): Weighted tardiness of `best`.
+        rho (float): Pheromone trail persistence.
+        streams (:obj:`np.ndarray`): Array of shape (n_ants,) containing
+            the states of the random number streams of the ants.
+        ls (int): Identifier of the local search method.
+        p (:obj:`np.ndarray`): Computation times.
+        d (:obj:`np.ndarray`): Due dates.
+        w (:obj:`np.ndarray`): Weights.
+        c (:obj:`np.ndarray`): Buffer for the completion times.
+        row (:obj:`np.ndarray`): Buffer of shape (m,).
+        z (:obj:`np.ndarray`): Buffer of shape (n,).
+        candidates (:obj:`np.ndarray`): Buffer of shape (5,).
+        buf (:obj:`np.ndarray`): Buffer of shape (n,).
+        solutions (:obj:`np.ndarray`): Array of shape (n_ants, n)
+            where the solutions of the ants will be stored.
+        wt (:obj:`np.ndarray`): Array of shape (n_ants,) where the
+            weighted tardiness of the ants will be stored.
+        ms (:obj:`np.ndarray`): Array of shape (n_ants,) where the
+            makespan of the ants will be stored.
+
+    Returns:
+        float: Weighted tardiness of `best`.
+    """
+    n, m = c.shape[0], c.shape[1]
+    u = np.empty(2 * n, dtype=np.float64)
+    for k in range(solutions.shape[0]):
+
+        # Create ant, apply local search and evaluate it
+        _fill_uniform(streams, k, u)
+        _create_solution(T, start, outer, state, solutions[k],
+                         best, candidates, u)
+        wt[k] = _local_search(ls, 3, c, row, z, p, d, w, solutions[k], buf)
+        ms[k] = c[n-1, m-1]
+
+        # Update pheromones with each ant
+        _update_pheromones(raw, outer, T, start, state, solutions[k],
+                           best, wt[k], rho, buf)
+        if wt[k] < Zbest:
+            Zbest = wt[k]
+            best[:] = solutions[k]
+    return Zbest
+
+
 class PACO(ACO):
     """ACO algorithm proposed by Rajendran et al.
-    
+
+    Pheromone trails are updated by each ant, right after
+    it has been built. When the colony is built by several
+    threads (`n_jobs` > 1), a batched variant is used instead:
+    all the ants of an iteration are built from the same trails,
+    and the update of each ant is applied afterwards, in order.
+    Results then depend on the seed only, and not on the
+    number of threads.
+
+    Since pheromones are only deposited close to the position of
+    each job, and since solutions are built from the next 5 jobs of
+    the seed sequence, trails can be restricted to a band of positions
+    centered on the position of each job in the seed sequence
+    (see `pfspwt.aco.pheromones.BandedPheromoneTrails`). This reduces
+    the memory and the cost of each ant from O(n ** 2) to
+    O(n * band) on large instances.
+
     Attributes:
+        band (int): Number of positions in the band of pheromone
+            trails of each job, or None for storing all the trails.
         _seed_ant (:obj:`pfspwt.Ant`): Seed solution.
 
     References:
@@ -23,8 +286,9 @@ class PACO(ACO):
           European Journal of Operational Research 155 (2004) 426–438.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, band=None, **kwargs):
         ACO.__init__(self, *args, **kwargs)
+        self.band = band
         self._seed_ant = None
 
     def initial_solution(self, instance):
@@ -36,7 +300,7 @@ class PACO(ACO):
         Returns:
             :obj:`pfspwt.Ant`: Initial ant.
         """
-        return Ant(neh_algorithm(instance))
+        return Ant(neh_algorithm(instance, workspace=self._workspace))
 
     def init_pheromones(self):
         """Initializes pheromone trails.
@@ -48,24 +312,16 @@ class PACO(ACO):
         # Set seed sequence to the initial solution
         self._seed_ant = self._best
 
-        # Initialize pheromone trails
-        n = self._instance.n
-        self._tau = np.full((n, n), (1. / self._Zbest), dtype=np.float32)
-        indices = self._best.asarray()
-
         # h[i] is the position of job i in current sequence
-        h = np.argsort(indices)[..., np.newaxis]
-
-        # Compute `diff` like in PACO
-        k = np.arange(n)[np.newaxis, ...]
-        diff = np.abs(h - k) + 1
+        n = self._instance.n
+        h = np.argsort(self._best.asarray()).astype(np.int32)
 
-        # if diff[i, j] > n / 4, then tau[i, j] *= 2
-        # if diff[i, j] > n / 2, then tau[i, j] *= 4
-        # Since n / 2 > n / 4, diff[i, j] is divided
-        # by 2 and not 4 afterwards
-        self._tau[n / 4. < diff] /= 2.
-        self._tau[n / 2. <= diff] /= 2.
+        # Initialize pheromone trails like in PACO
+        width = n if self.band is None else self.band
+        self._tau = BandedPheromoneTrails(h, width)
+        _init_pheromones(self._tau.raw, self._tau.outer, self._tau.start,
+                         h, self._Zbest)
+        self._tau.refresh()
 
     def update_pheromones(self, ant):
         """Updates pheromone trails.
@@ -75,28 +331,11 @@ class PACO(ACO):
                 adding pheromone trails.
         """
         n = self._instance.n
-
-        # Evaluate ant
-        Zcurrent = self.evaluate(ant)
-
-        # h[i] is the position of job i in current sequence
-        h = np.argsort(ant.asarray())[..., np.newaxis]
-
-        # h_best[i] is the position of job i in the best sequence
-        # obtained so far
-        h_best = self._best.asarray()[..., np.newaxis]
-
-        # Compute `diff` like in PACO
-        k = np.arange(n)[np.newaxis, ...]
-        diff = np.sqrt(np.abs(h_best - k) + 1.)
-
-        # Pheromone evaporation
-        self._tau *= self.rho
-
-        # Add new pheromone trails
-        bound = 1 if (n <= 40) else 2
-        idx = (np.abs(h - k) <= bound)
-        self._tau[idx] += (1. / (diff[idx] * Zcurrent))
+        tau = self._tau
+        _update_pheromones(tau.raw, tau.outer, tau.cumsum, tau.start,
+                           tau.state, ant.asarray(), self._best.asarray(),
+                           self.score(ant), self.rho,
+                           np.empty(n, dtype=np.int32))
 
     def pheromones_are_individual(self):
         """Whether pheromones are added by all ants or not.
@@ -107,6 +346,27 @@ class PACO(ACO):
         """
         return True
 
+    def iterate(self, streams, best, solutions, wt, ms):
+        """Applies a whole iteration with a single call to
+        a compiled kernel.
+
+        See `pfspwt.aco.ACO`.
+
+        Returns:
+            float: Weighted tardiness of `best`.
+        """
+        n = self._instance.n
+        ws = self._workspace
+        tau = self._tau
+        return _iterate(
+                tau.raw, tau.outer, tau.start, tau.state, tau.cumsum, best,
+                self._Zbest, self.rho, streams,
+                LOCAL_SEARCHES[self._ls or 'none'],
+                self._instance.p, self._instance.d,
+                self._instance.w.astype(np.float32), ws.c, ws.row, ws.z,
+                np.empty(5, dtype=np.int32), np.empty(n, dtype=np.int32),
+                solutions, wt, ms)
+
     def update_parameters(self):
         """Updates parameters.
 
@@ -115,86 +375,30 @@ class PACO(ACO):
         """
         pass
 
-    @numba.jit('void(f4[:, :], i4[:], i4[:], i4[:])', nopython=True)
-    def _create_solution(T, solution, best, candidates):
-        """Creates a solution by following pheromone trails.
-
-        The algorithm uses the seed sequence (sequence obtained
-        by running NEH heuristic + eventually local search) found so
-        far as an heuristic, but also uses cumulative pheromone
-        intensities to build a new solution.
-
-        Parameters:
-            T (:obj:`np.ndarray`): Cumulative trail intensities,
-                represented by an array of shape (n, n) where
-                intensities have been summed over the second dimension.
-            solution (:obj:`np.ndarray`): Array of shape (n,) where
-                the solution will be stored. `solution[i]` is the
-                identifier of the job being scheduled at position i.
-            best (:obj:`np.ndarray`): Best sequence found so far.
-            candidates (:obj:`np.ndarray`): Array of shape (5,) that
-                is used to store the next 5 job identifiers in the
-                best sequence that have not been scheduled yet in
-                the current solution.
-        """
-        n = T.shape[0]
-        idx = np.arange(candidates.shape[0])
-
-        # Store in `candidates` the next 5 job identifiers
-        # to be scheduled
-        for next_id in range(candidates.shape[0]):
-            candidates[next_id] = best[next_id]
-        next_id = candidates.shape[0]
-
-        for k in range(n):
-
-            u = np.random.rand()
-            if u <= 0.4:
-                # Take the first unscheduled job found
-                # in the seed sequence
-                candidate_id = 0
-            elif u <= 0.8:
-                # Take the job with maximal cumulative trail
-                # intensity among the 5 first unscheduled jobs
-                # in the seed sequence
-                candidate_id = np.argmax(T[candidates, k])
-            else:
-                # Randomly take a job (based on intensities)
-                # among the 5 first unscheduled jobs in the
-                # seed sequence
-                proba = T[candidates, k]
-                proba /= proba.sum()
-                candidate_id = idx[:candidates.shape[0]][
-                        np.searchsorted(np.cumsum(proba), np.random.rand())]
-
-            # Add the elected candidate job to the solution
-            i = candidates[candidate_id]
-            solution[k] = i
-
-            # Remove elected candidate from `candidates` and add the next
-            # unscheduled job from the best solution
-            if next_id < n:
-                candidates[candidate_id:-1] = candidates[candidate_id+1:]
-                candidates[-1] = best[next_id]
-                next_id += 1
-            else:
-                candidates = candidates[np.arange(candidates.shape[0]) != candidate_id]
-
-    def create_solution(self):
+    def create_solution(self, u=None):
         """Creates a new solution.
 
         Creates a new solution based on current values
         of trail intensities and returns an ant associated
         with that solution.
 
+        Parameters:
+            u (:obj:`np.ndarray`, optional): Array of shape (2 * n,)
+                of random numbers used for building the solution.
+                They are drawn from the random generator of the
+                colony if None.
+
         Returns:
             :obj:´pfspwt.Ant´: Ant that found the new solution.
         """
         n = self._instance.n
+        if u is None:
+            u = self._rng.random_sample(2 * n)
         solution = np.arange(n, dtype=np.int32)
         candidates = np.zeros(5, dtype=np.int32)
 
-        # Summation of trail intensities
-        T = np.cumsum(self._tau, axis=1)
-        PACO._create_solution(T, solution, self._best.asarray(), candidates)
+        # Summation of trail intensities, maintained by the updates
+        T = self._tau.cumulative()
+        _create_solution(T, self._tau.start, self._tau.outer, self._tau.state,
+                         solution, self._best.asarray(), candidates, u)
         return Ant(solution)
@@ -0,0 +1,507 @@
+# -*- coding: utf-8 -*-
+# pheromones.py: Pheromone trails with lazy evaporation
+# author : Antoine Passemiers
+
+import numba
+import numpy as np
+import threading
+
+
+# Raw intensities are scaled back once the decay factor falls below
+# this value, which keeps them far from the range limits of float32
+RENORMALISATION_THRESHOLD = 1e-12
+
+# Indices of the fields of the state array
+SCALE, TAU_MIN, TAU_MAX, VERSION = 0, 1, 2, 3
+
+
+@numba.jit('f8(f4[:, :], f8[:], i4, i4)',
+           nopython=True, nogil=True, cache=True)
+def _read(raw, state, i, j):
+    """Returns the intensity of a pheromone trail.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw intensities.
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+        i (int): Job identifier.
+        j (int): Position in the sequence.
+
+    Returns:
+        float: Decayed intensity, clipped to the bounds.
+    """
+    value = raw[i, j] * state[SCALE]
+    return min(max(value, state[TAU_MIN]), state[TAU_MAX])
+
+
+@numba.jit('void(f4[:, :], f8[:])',
+           nopython=True, nogil=True, cache=True)
+def _renormalise(raw, state):
+    """Applies the decay factor and the bounds to the raw intensities.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw intensities.
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+    """
+    n = raw.shape[0]
+    for i in range(n):
+        for j in range(raw.shape[1]):
+            raw[i, j] = _read(raw, state, i, j)
+    state[SCALE] = 1.
+
+
+@numba.jit('void(f8[:], f8)',
+           nopython=True, nogil=True, cache=True)
+def _evaporate(state, rho):
+    """Evaporates all the pheromone trails in constant time.
+
+    Trails that are subsequently written must be written with
+    `_write`, which accounts for the new decay factor.
+
+    Parameters:
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+        rho (float): Pheromone trail persistence.
+    """
+    state[SCALE] *= rho
+    state[VERSION] += 1.
+
+
+@numba.jit('void(f4[:, :], f8[:], i4, i4, f8)',
+           nopython=True, nogil=True, cache=True)
+def _write(raw, state, i, j, value):
+    """Sets the intensity of a pheromone trail.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw intensities.
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+        i (int): Job identifier.
+        j (int): Position in the sequence.
+        value (float): New intensity.
+    """
+    raw[i, j] = value / state[SCALE]
+
+
+@numba.jit('void(f4[:, :], f8[:], i4, i4, f8)',
+           nopython=True, nogil=True, cache=True)
+def _deposit(raw, state, i, j, amount):
+    """Adds pheromones to an unbounded pheromone trail.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw intensities.
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+        i (int): Job identifier.
+        j (int): Position in the sequence.
+        amount (float): Quantity of pheromones.
+    """
+    raw[i, j] += amount / state[SCALE]
+
+
+@numba.jit('void(f4[:, :], f8[:], f4[:, :])',
+           nopython=True, nogil=True, cache=True)
+def _materialise(raw, state, tau):
+    """Computes the intensities of all the pheromone trails.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw intensities.
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+        tau (:obj:`np.ndarray`): Array of shape (n, n) where
+            intensities will be stored.
+    """
+    for i in range(raw.shape[0]):
+        for j in range(raw.shape[1]):
+            tau[i, j] = _read(raw, state, i, j)
+
+
+@numba.jit('void(f4[:, :], f8[:], f4[:, :])',
+           nopython=True, nogil=True, cache=True)
+def _cumulate(raw, state, T):
+    """Computes cumulative intensities of the pheromone trails.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw intensities.
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+        T (:obj:`np.ndarray`): Array of shape (n, n) where intensities
+            summed over the second dimension will be stored.
+    """
+    for i in range(raw.shape[0]):
+        acc = np.float32(0.)
+        for j in range(raw.shape[1]):
+            acc += np.float32(_read(raw, state, i, j))
+            T[i, j] = acc
+
+
+@numba.jit('void(f4[:, :], f8[:], i4[:], f8, f8, f8, f8)',
+           nopython=True, nogil=True, cache=True, error_model='numpy')
+def _bounded_update(raw, state, solution, Z, rho, tau_min, tau_max):
+    """Updates pheromone trails like in MMAS, in linear time.
+
+    Trails are evaporated, the trails of the solution receive
+    a deposit of 1 / Z, and all trails are clipped to
+    [`tau_min`, `tau_max`]. Only the n trails of the solution are
+    actually written: since bounds never decrease along the search,
+    and since an evaporated trail cannot exceed the new upper bound,
+    clipping the other trails at read time is equivalent.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw intensities.
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+        solution (:obj:`np.ndarray`): Solution of the ant that
+            is in charge of adding pheromone trails.
+        Z (float): Weighted tardiness of `solution`.
+        rho (float): Pheromone trail persistence.
+        tau_min (float): Lower bound on trail intensities.
+        tau_max (float): Upper bound on trail intensities.
+    """
+    n = solution.shape[0]
+
+    # Intensities of the trails of the solution before the update
+    values = np.empty(n, dtype=np.float64)
+    for k in range(n):
+        values[k] = _read(raw, state, solution[k], k)
+
+    # Trail evaporation and new bounds
+    _evaporate(state, rho)
+    state[TAU_MIN], state[TAU_MAX] = tau_min, tau_max
+
+    # Add new pheromone trail and clip it
+    for k in range(n):
+        value = min(max(values[k] * rho + 1. / Z, tau_min), tau_max)
+        _write(raw, state, solution[k], k, value)
+
+    if state[SCALE] < RENORMALISATION_THRESHOLD:
+        _renormalise(raw, state)
+
+
+class PheromoneTrails:
+    """Pheromone trails with lazy evaporation.
+
+    The intensity of trail (i, j) is `raw[i, j] * scale`, clipped
+    to [`tau_min`, `tau_max`]. Evaporating all the trails thus only
+    multiplies the decay factor `scale`, and an update costs as much as
+    the number of trails receiving pheromones. Raw intensities are
+    renormalised once the decay factor gets too small. The bounds are
+    the ones set by the last update, and are assumed to never decrease
+    (like the bounds of MMAS, which only depend on the best solution).
+
+    Compiled kernels operate on `raw` and `state` directly.
+
+    Attributes:
+        raw (:obj:`np.ndarray`): Array of shape (n, n) of raw
+            intensities, where `raw[i, j]` relates to the desire
+            of placing job i at position j.
+        state (:obj:`np.ndarray`): Array containing the decay factor,
+            the lower and upper bounds, and a version number that is
+            incremented each time the trails are updated.
+        _dense (:obj:`np.ndarray`): Intensities of the trails,
+            as computed for the current version.
+        _dense_version (float): Version of `_dense`.
+        _cumulative (:obj:`np.ndarray`): Cumulative intensities of
+            the trails, as computed for the current version.
+        _cumulative_version (float): Version of `_cumulative`.
+        _lock (:obj:`threading.Lock`): Lock preventing threads that
+            build ants concurrently from computing the same cached
+            intensities at the same time.
+    """
+
+    def __init__(self, n, value):
+        self.raw = np.full((n, n), value, dtype=np.float32)
+        self.state = np.asarray([1., 0., np.inf, 0.], dtype=np.float64)
+        self._dense = None
+        self._dense_version = None
+        self._cumulative = None
+        self._cumulative_version = None
+        self._lock = threading.Lock()
+
+    @property
+    def scale(self):
+        """Decay factor of the raw intensities."""
+        return self.state[SCALE]
+
+    @property
+    def tau_min(self):
+        """Lower bound on trail intensities."""
+        return self.state[TAU_MIN]
+
+    @property
+    def tau_max(self):
+        """Upper bound on trail intensities."""
+        return self.state[TAU_MAX]
+
+    @property
+    def version(self):
+        """Number of updates of the trails."""
+        return self.state[VERSION]
+
+    def update(self, solution, Z, rho, tau_min, tau_max):
+        """Updates pheromone trails like in MMAS.
+
+        This function is a wrapper of the Numba function
+        `_bounded_update`.
+
+        Parameters:
+            solution (:obj:`np.ndarray`): Solution of the ant that
+                is in charge of adding pheromone trails.
+            Z (float): Weighted tardiness of `solution`.
+            rho (float): Pheromone trail persistence.
+            tau_min (float): Lower bound on trail intensities.
+            tau_max (float): Upper bound on trail intensities.
+        """
+        _bounded_update(self.raw, self.state, solution,
+                        Z, rho, tau_min, tau_max)
+
+    def asarray(self):
+        """Computes the intensities of all the pheromone trails.
+
+        The result is kept until the next update of the trails.
+
+        Returns:
+            :obj:`np.ndarray`: Array of shape (n, n) of intensities.
+        """
+        with self._lock:
+            if self._dense_version != self.version:
+                if self._dense is None:
+                    self._dense = np.empty_like(self.raw)
+                _materialise(self.raw, self.state, self._dense)
+                self._dense_version = self.version
+            return self._dense
+
+    def cumulative(self):
+        """Computes cumulative intensities of the pheromone trails.
+
+        The result is kept until the next update of the trails,
+        and its buffer is reused by the following computations.
+
+        Returns:
+            :obj:`np.ndarray`: Array of shape (n, n) where intensities
+                have been summed over the second dimension.
+        """
+        with self._lock:
+            if self._cumulative_version != self.version:
+                if self._cumulative is None:
+                    self._cumulative = np.empty_like(self.raw)
+                _cumulate(self.raw, self.state, self._cumulative)
+                self._cumulative_version = self.version
+            return self._cumulative
+
+
+@numba.jit('void(f4[:, :], f4[:, :], f4[:, :], i4, i4)',
+           nopython=True, nogil=True, cache=True)
+def _band_cumulate(raw, outer, T, i, b):
+    """Computes cumulative raw intensities of a banded pheromone trail.
+
+    Only the cumulative intensities from band index `b` onwards are
+    computed, the previous ones being unaffected by the trails of
+    the band from `b` onwards.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw intensities of the bands.
+        outer (:obj:`np.ndarray`): Raw intensities outside of the bands.
+        T (:obj:`np.ndarray`): Array of shape (n, width) where raw
+            intensities summed over the positions (starting from
+            position 0) are stored.
+        i (int): Job identifier.
+        b (int): First band index to be computed.
+    """
+    acc = T[i, b - 1] if b > 0 else outer[i, 0]
+    for j in range(b, raw.shape[1]):
+        acc += raw[i, j]
+        T[i, j] = acc
+
+
+@numba.jit('void(f4[:, :], f4[:, :], f4[:, :], f8[:])',
+           nopython=True, nogil=True, cache=True)
+def _band_renormalise(raw, outer, T, state):
+    """Applies the decay factor to the raw intensities of banded trails.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw intensities of the bands.
+        outer (:obj:`np.ndarray`): Raw intensities outside of the bands.
+        T (:obj:`np.ndarray`): Cumulative raw intensities of the bands,
+            computed again.
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+    """
+    for i in range(raw.shape[0]):
+        for b in range(raw.shape[1]):
+            raw[i, b] *= state[SCALE]
+        outer[i, 0] *= state[SCALE]
+        outer[i, 1] *= state[SCALE]
+        _band_cumulate(raw, outer, T, i, 0)
+    state[SCALE] = 1.
+
+
+@numba.jit('void(f4[:, :], i4[:], f8[:], i4, i4, f8)',
+           nopython=True, nogil=True, cache=True)
+def _band_deposit(raw, start, state, i, j, amount):
+    """Adds pheromones to a banded pheromone trail.
+
+    Pheromones deposited outside of the band of job i
+    are added to the closest trail of the band.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw intensities of the bands.
+        start (:obj:`np.ndarray`): First position of the band of each job.
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+        i (int): Job identifier.
+        j (int): Position in the sequence.
+        amount (float): Quantity of pheromones.
+    """
+    b = min(max(j - start[i], 0), raw.shape[1] - 1)
+    raw[i, b] += amount / state[SCALE]
+
+
+@numba.jit('f4(f4[:, :], i4[:], f4[:, :], f8[:], i4, i4)',
+           nopython=True, nogil=True, cache=True)
+def _band_cumulative(T, start, outer, state, i, j):
+    """Returns the cumulative intensity of a banded pheromone trail.
+
+    Intensities outside of the band of job i are assumed to be
+    spread uniformly over the positions before and after the band.
+
+    Parameters:
+        T (:obj:`np.ndarray`): Cumulative raw intensities of the bands,
+            as computed by `_band_cumulate`.
+        start (:obj:`np.ndarray`): First position of the band of each job.
+        outer (:obj:`np.ndarray`): Raw intensities outside of the bands.
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+        i (int): Job identifier.
+        j (int): Position in the sequence.
+
+    Returns:
+        float: Sum of the intensities of trails (i, 0), ..., (i, j).
+    """
+    n, width = start.shape[0], T.shape[1]
+    b = j - start[i]
+    if b < 0:
+        value = outer[i, 0] * (j + 1) / start[i]
+    elif b >= width:
+        end = start[i] + width - 1
+        value = T[i, width - 1] + outer[i, 1] * (j - end) / (n - 1 - end)
+    else:
+        value = T[i, b]
+    return np.float32(value * state[SCALE])
+
+
+@numba.jit('void(f4[:, :], i4[:], f4[:, :], f8[:], f4[:, :])',
+           nopython=True, nogil=True, cache=True)
+def _band_materialise(raw, start, outer, state, tau):
+    """Computes the intensities of all the banded pheromone trails.
+
+    Parameters:
+        raw (:obj:`np.ndarray`): Raw intensities of the bands.
+        start (:obj:`np.ndarray`): First position of the band of each job.
+        outer (:obj:`np.ndarray`): Raw intensities outside of the bands.
+        state (:obj:`np.ndarray`): Decay factor, bounds and version.
+        tau (:obj:`np.ndarray`): Array of shape (n, n) where
+            intensities will be stored.
+    """
+    n, width = tau.shape[0], raw.shape[1]
+    scale = state[SCALE]
+    for i in range(n):
+        end = start[i] + width
+        for j in range(n):
+            if j < start[i]:
+                tau[i, j] = outer[i, 0] * scale / start[i]
+            elif j >= end:
+                tau[i, j] = outer[i, 1] * scale / (n - end)
+            else:
+                tau[i, j] = raw[i, j - start[i]] * scale
+
+
+class BandedPheromoneTrails:
+    """Unbounded pheromone trails, stored in a band around
+    a reference position of each job.
+
+    Trail (i, j) is stored in `raw[i, j - start[i]]` if position j
+    lies in the band of job i, which covers `width` consecutive
+    positions. The intensities outside of the band are only
+    kept as two sums (before and after the band), and pheromones
+    deposited outside of the band are added to its closest trail.
+    Memory and cumulative intensities thus cost O(n * width)
+    instead of O(n ** 2), and trails are exact if `width` is n.
+    Evaporation is lazy, like in `PheromoneTrails`.
+
+    Cumulative raw intensities are stored alongside the raw
+    intensities. Since evaporation only changes the decay factor,
+    they only need to be computed again from the first trail
+    receiving pheromones in each band.
+
+    Compiled kernels operate on `raw`, `outer`, `cumsum`, `start`
+    and `state` directly, and must keep `cumsum` up to date.
+
+    Attributes:
+        raw (:obj:`np.ndarray`): Array of shape (n, width) of
+            raw intensities inside of the bands.
+        outer (:obj:`np.ndarray`): Array of shape (n, 2) of raw
+            intensities before and after the bands.
+        cumsum (:obj:`np.ndarray`): Array of shape (n, width) of raw
+            intensities summed over the positions, starting from
+            position 0 (see `_band_cumulate`).
+        start (:obj:`np.ndarray`): Array of shape (n,) containing the
+            first position of the band of each job.
+        state (:obj:`np.ndarray`): Array containing the decay factor,
+            the (unused) bounds, and a version number that is
+            incremented each time the trails are evaporated.
+        _dense (:obj:`np.ndarray`): Intensities of the trails,
+            as computed for the current version.
+        _dense_version (float): Version of `_dense`.
+    """
+
+    def __init__(self, center, width):
+        n = len(center)
+        width = min(width, n)
+        self.raw = np.zeros((n, width), dtype=np.float32)
+        self.outer = np.zeros((n, 2), dtype=np.float32)
+        self.cumsum = np.zeros((n, width), dtype=np.float32)
+        self.start = np.clip(np.asarray(center) - width // 2,
+                             0, n - width).astype(np.int32)
+        self.state = np.asarray([1., 0., np.inf, 0.], dtype=np.float64)
+        self._dense = None
+        self._dense_version = None
+
+    @property
+    def width(self):
+        """Number of positions in the band of each job."""
+        return self.raw.shape[1]
+
+    @property
+    def scale(self):
+        """Decay factor of the raw intensities."""
+        return self.state[SCALE]
+
+    @property
+    def version(self):
+        """Number of updates of the trails."""
+        return self.state[VERSION]
+
+    def asarray(self):
+        """Computes the intensities of all the pheromone trails.
+
+        The result is kept until the next update of the trails.
+
+        Returns:
+            :obj:`np.ndarray`: Array of shape (n, n) of intensities.
+        """
+        if self._dense_version != self.version:
+            if self._dense is None:
+                n = self.raw.shape[0]
+                self._dense = np.empty((n, n), dtype=np.float32)
+            _band_materialise(self.raw, self.start, self.outer,
+                              self.state, self._dense)
+            self._dense_version = self.version
+        return self._dense
+
+    def refresh(self):
+        """Computes cumulative raw intensities of all the bands again,
+        after raw intensities have been modified directly.
+        """
+        for i in range(self.raw.shape[0]):
+            _band_cumulate(self.raw, self.outer, self.cumsum, i, 0)
+
+    def cumulative(self):
+        """Returns cumulative raw intensities of the bands.
+
+        Returns:
+            :obj:`np.ndarray`: Array of shape (n, width) where
+                raw intensities have been summed over the positions.
+                They must be read with `_band_cumulative`.
+        """
+        return self.cumsum
@@ -14,10 +14,19 @@ class Ant:
             where element `solution[i]` is the id of
             the ith job to be sequenced. The size of
             the array is the number of jobs to be sequenced.
+        objective (float): Weighted tardiness of the solution,
+            or None if the solution has not been evaluated yet.
+        completion (:obj:`np.ndarray`): Completion times of the
+            jobs on the last machine, in the order of the solution,
+            or None if they have not been kept.
     """
 
-    def __init__(self, solution):
+    __slots__ = ('_solution', 'objective', 'completion')
+
+    def __init__(self, solution, objective=None, completion=None):
         self._solution = np.asarray(solution, dtype=np.int32)
+        self.objective = objective
+        self.completion = completion
 
     def asarray(self):
         """Converts the ant to a NumPy array.
@@ -27,6 +36,21 @@ class Ant:
         """
         return self._solution
 
+    def objectives(self):
+        """Returns the known objective values of the solution.
+
+        Returns:
+            tuple: Weighted tardiness, followed by the makespan
+                if completion times have been kept, or None if
+                the solution has not been evaluated yet.
+        """
+        if self.objective is None:
+            return None
+        elif self.completion is None:
+            return (self.objective,)
+        else:
+            return (self.objective, self.completion[-1])
+
     def copy(self):
         """Deep-copies an ant.
 
@@ -34,4 +58,7 @@ class Ant:
             :obj:`pfspwt.Ant`: A new ant identical to
                 the current one.
         """
-        return Ant(np.copy(self._solution))
+        completion = None
+        if self.completion is not None:
+            completion = np.copy(self.completion)
+        return Ant(np.copy(self._solution), self.objective, completion)
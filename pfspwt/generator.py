@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# generator.py: Generator of synthetic PFSP-WT instances
+# author : Antoine Passemiers
+
+from pfspwt.instance import Instance
+from pfspwt.io import PFSPWTIO
+
+import os
+import numba
+import numpy as np
+
+
+# Parameters of Taillard's linear congruential generator
+LCG_A, LCG_B, LCG_C, LCG_M = 16807, 127773, 2836, 2147483647
+
+
+@numba.jit('i8(i8[:], i8, i8)', nopython=True, nogil=True, cache=True)
+def _unif(state, low, high):
+    """Draws an integer uniformly in [low, high] with Taillard's generator.
+
+    Parameters:
+        state (:obj:`np.ndarray`): Array of shape (1,) containing
+            the seed of the generator, updated inplace.
+        low (int): Lower bound.
+        high (int): Upper bound.
+
+    Returns:
+        int: Random integer.
+    """
+    # Schrage's method computes (a * seed) mod m without overflow
+    k = state[0] // LCG_B
+    state[0] = LCG_A * (state[0] % LCG_B) - k * LCG_C
+    if state[0] < 0:
+        state[0] += LCG_M
+    value = state[0] / LCG_M
+    return low + np.int64(value * (high - low + 1))
+
+
+@numba.jit('i8(i4[:, :])', nopython=True, nogil=True, cache=True)
+def lower_bound(p):
+    """Computes Taillard's lower bound on the makespan.
+
+    Each machine must process all the jobs, after the shortest
+    head (processing on the previous machines) and before the
+    shortest tail (processing on the next machines). Each job must
+    also be processed by all the machines.
+
+    Parameters:
+        p (:obj:`np.ndarray`): Processing times, represented
+            by an array of shape (n, m).
+
+    Returns:
+        int: Lower bound on the makespan of any solution.
+    """
+    n, m = p.shape[0], p.shape[1]
+    bound = 0
+    for i in range(n):
+        total = 0
+        for j in range(m):
+            total += p[i, j]
+        bound = max(bound, total)
+    for j in range(m):
+        head, tail, load = np.int64(2 ** 62), np.int64(2 ** 62), 0
+        for i in range(n):
+            before, after = 0, 0
+            for k in range(j):
+                before += p[i, k]
+            for k in range(j + 1, m):
+                after += p[i, k]
+            head, tail = min(head, before), min(tail, after)
+            load += p[i, j]
+        bound = max(bound, head + load + tail)
+    return bound
+
+
+@numba.jit('void(i8[:], i4[:, :], i4[:], i4[:], f8, f8, i8)',
+           nopython=True, nogil=True, cache=True)
+def _generate(state, p, d, w, tardiness, spread, max_weight):
+    """Draws the processing times, due dates and weights of an instance.
+
+    Processing times are drawn machine by machine, like in
+    Taillard's instances. Due dates and weights are drawn afterwards.
+
+    Parameters:
+        state (:obj:`np.ndarray`): Array of shape (1,) containing
+            the seed of the generator, updated inplace.
+        p (:obj:`np.ndarray`): Array of shape (n, m) where the
+            processing times will be stored.
+        d (:obj:`np.ndarray`): Array of shape (n,) where the
+            due dates will be stored.
+        w (:obj:`np.ndarray`): Array of shape (n,) where the
+            weights will be stored.
+        tardiness (float): Tardiness factor.
+        spread (float): Range of due dates.
+        max_weight (int): Maximum weight.
+    """
+    n, m = p.shape[0], p.shape[1]
+    for j in range(m):
+        for i in range(n):
+            p[i, j] = _unif(state, 1, 99)
+
+    # Due dates are spread around (1 - tardiness) times
+    # a lower bound on the makespan
+    bound = lower_bound(p)
+    low = max(0, np.int64(bound * (1. - tardiness - spread / 2.)))
+    high = max(low, np.int64(bound * (1. - tardiness + spread / 2.)))
+    for i in range(n):
+        d[i] = _unif(state, low, high)
+    for i in range(n):
+        w[i] = _unif(state, 1, max_weight)
+
+
+def generate_instance(n, m, seed=1, tardiness=0.4, spread=0.6,
+                      max_weight=10):
+    """Generates a PFSP-WT instance like Taillard's instances.
+
+    Processing times are drawn uniformly in [1, 99] with Taillard's
+    generator, hence a seed of Taillard's benchmark sets yields the
+    processing times of the corresponding instance. Due dates are
+    drawn uniformly in [P * (1 - T - R / 2), P * (1 - T + R / 2)],
+    where P is Taillard's lower bound on the makespan, T is the
+    tardiness factor and R is the range of due dates. Weights
+    are drawn uniformly in [1, `max_weight`].
+
+    Parameters:
+        n (int): Number of jobs.
+        m (int): Number of machines.
+        seed (int): Seed of the generator, in [1, 2 ** 31 - 2].
+        tardiness (float): Tardiness factor T. The larger, the
+            more jobs are late.
+        spread (float): Range of due dates R.
+        max_weight (int): Maximum weight of a job.
+
+    Returns:
+        :obj:`pfspwt.Instance`: PFSP-WT instance.
+    """
+    if not 0 < seed < LCG_M:
+        raise ValueError('Seed must be in [1, %d].' % (LCG_M - 1))
+    p = np.empty((n, m), dtype=np.int32)
+    d = np.empty(n, dtype=np.int32)
+    w = np.empty(n, dtype=np.int32)
+    state = np.asarray([seed], dtype=np.int64)
+    _generate(state, p, d, w, tardiness, spread, max_weight)
+    return Instance(p, d, w.astype(np.int64))
+
+
+def generate_files(directory, sizes, n_instances=10, seed=1, **kwargs):
+    """Generates instances and writes them to text files.
+
+    Each instance is written as soon as it is generated, hence
+    instances are never held in memory together. Files are named
+    "<n>_<m>_<k>.txt", and can be read with `pfspwt.io.PFSPWTIO.read`.
+
+    Parameters:
+        directory (str): Location of the instance files.
+        sizes (list): Pairs (n, m) of numbers of jobs and machines.
+        n_instances (int): Number of instances of each size.
+        seed (int): Seed of the first instance. Instance k of a size
+            is generated with seed `seed + k`.
+        **kwargs: Keyword arguments of `generate_instance`.
+
+    Returns:
+        list: Paths to the instance files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    filepaths = list()
+    for n, m in sizes:
+        for k in range(n_instances):
+            instance = generate_instance(n, m, seed=seed+k, **kwargs)
+            filepath = os.path.join(directory, '%d_%d_%d.txt' % (n, m, k))
+            PFSPWTIO.write(filepath, instance)
+            filepaths.append(filepath)
+    return filepaths
@@ -2,16 +2,87 @@
 # heuristics.py: Heuristics for initial solutions
 # author : Antoine Passemiers
 
-from pfspwt.objective import computation_times
+from pfspwt.objective import bounded_weighted_tardiness
+from pfspwt.objective import partial_computation_times
+from pfspwt.objective import weighted_tardiness_prefix
 
 import numpy as np
 import numba
-import scipy.stats
 
 
-def neh_algorithm(instance):
+@numba.jit('void(i4[:, :], i4[:], f4[:], i4[:], i4[:], i4[:, :], i4[:], f8[:])',
+           nopython=True, nogil=True, cache=True)
+def _neh_algorithm(p, d, w, indices, solution, c, row, z):
     """NEH heuristic for building an initial solution.
 
+    The partial sequence is stored in the first k elements
+    of `solution`, and its completion times in the first k rows
+    of `c`. The next job is slid from the last to the first slot
+    of the partial sequence, one exchange at a time. For a given
+    slot, the completion times of the jobs placed before it are
+    taken from `c`, and only the remaining rows are recomputed
+    (see `bounded_weighted_tardiness`).
+
+    Parameters:
+        p (:obj:`np.ndarray`): Processing times, indexed by job.
+        d (:obj:`np.ndarray`): Due dates, indexed by job.
+        w (:obj:`np.ndarray`): Weights, indexed by job.
+        indices (:obj:`np.ndarray`): Order in which jobs are
+            inserted in the partial sequence.
+        solution (:obj:`np.ndarray`): Array of shape (n,) where
+            the solution will be stored.
+        c (:obj:`np.ndarray`): Buffer of shape (n, m) for the
+            completion times of the partial sequence.
+        row (:obj:`np.ndarray`): Buffer of shape (m,) for the
+            completion times of a single job.
+        z (:obj:`np.ndarray`): Buffer of shape (n,) for the
+            cumulative weighted tardiness of the partial sequence.
+    """
+    n = indices.shape[0]
+
+    # Add first job to the solution
+    solution[0] = indices[0]
+    partial_computation_times(c, p, solution[:1], 0)
+    weighted_tardiness_prefix(c, d, w, solution[:1], z)
+
+    for k in range(1, n):
+        job = indices[k]
+        solution[k] = job
+        best_wt, best_idx = np.inf, k
+        for h in range(k, -1, -1):
+
+            # Compute weighted tardiness of the new partial sequence,
+            # where the next job is inserted at position h. Jobs placed
+            # after it are the ones of the partial sequence, shifted by
+            # one position. Evaluation is aborted once the partial
+            # sequence is known to be worse than the best one.
+            wt = bounded_weighted_tardiness(
+                    c, row, z, p, d, w, solution[:k+1], h, h + 1, 1, best_wt)
+
+            # Keep the index of the best position where to insert
+            # the next job (the first one in case of ties)
+            if wt <= best_wt:
+                best_wt = wt
+                best_idx = h
+
+            # Move the next job to the previous slot
+            if h > 0:
+                solution[h-1], solution[h] = solution[h], solution[h-1]
+
+        # Insert the next job at the best position
+        for i in range(best_idx):
+            solution[i] = solution[i+1]
+        solution[best_idx] = job
+        partial_computation_times(c, p, solution[:k+1], best_idx)
+        weighted_tardiness_prefix(c, d, w, solution[:k+1], z)
+
+
+def neh_algorithm(instance, workspace=None):
+    """NEH heuristic for building an initial solution.
+
+    This function is a wrapper of the Numba function
+    of the same name.
+
     References:
         * A heuristic algorithm for the m-machine,
         n-job flow-shop sequencing problem.
@@ -20,6 +91,8 @@ def neh_algorithm(instance):
 
     Parameters:
         instance (:obj:`instance`): PFSP-WT instance.
+        workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
+            The default workspace of the instance is used if None.
 
     Returns:
         :obj:`np.ndarray`: Array representing the solution.
@@ -27,41 +100,14 @@ def neh_algorithm(instance):
 
     # Sort jobs by due date
     _c = instance.d
-    indices = np.argsort(_c)
+    indices = np.argsort(_c).astype(np.int32)
 
     # Retrieve constants of the problem
-    c, w, d = instance.c, instance.w, instance.d
+    ws = instance.workspace if workspace is None else workspace
+    w, d = instance.w.astype(np.float32), instance.d
     p = instance.p
     n = len(indices)
 
-    # Add first job to the solution
-    solution = [indices[0]]
-
-    for k in range(1, n):
-        best_wt, best_idx = np.inf, 0
-        for h in range(k + 1):
-
-            # Add next job to the partial sequence
-            partial_indices = solution[:h] + [indices[k]] + solution[h:]
-
-            # Sort constants according to the partial sequence
-            ordered_p = p[partial_indices, :]
-            ordered_w = w[partial_indices]
-            ordered_d = d[partial_indices]
-            ordered_c = c[:len(partial_indices), :]
-
-            # Compute weighted tardiness
-            computation_times(ordered_c, ordered_p)
-            ordered_t = np.maximum(ordered_c[:, -1] - ordered_d, 0)
-            wt = np.dot(ordered_w, ordered_t)
-
-            # Keep the index of the best position where to insert
-            # the next job
-            if wt < best_wt:
-                best_wt = wt
-                best_idx = h
-
-        # Insert the next job at the best position
-        solution = solution[:best_idx] + [indices[k]] + solution[best_idx:]
-    solution = np.asarray(solution, dtype=np.int32)
+    solution = np.empty(n, dtype=np.int32)
+    _neh_algorithm(p, d, w, indices, solution, ws.c, ws.row, ws.z)
     return solution
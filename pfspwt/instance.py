@@ -3,6 +3,7 @@
 # author : Antoine Passemiers
 
 from pfspwt.objective import weighted_tardiness
+from pfspwt.workspace import Workspace
 
 import numpy as np
 
@@ -18,6 +19,10 @@ class Instance:
             of job i on machine j.
         c (:obj:`np.ndarray`): Buffer for storing computation
             times, represented as a matrix of shape (N, M).
+            This is the buffer of the default workspace.
+        workspace (:obj:`pfspwt.workspace.Workspace`): Default
+            workspace, used by the evaluation kernels when no
+            workspace is provided.
         d (:obj:`np.ndarray`): Vector of shape (N,)
             where `D[i]` is the deadline of job i.
         w (:obj:`np.ndarray`): Vector of shape (N,)
@@ -26,8 +31,20 @@ class Instance:
 
     def __init__(self, p, d, w):
         self.p = np.asarray(p, dtype=np.int32)
-        self.c = np.empty_like(self.p)
         self.d = np.asarray(d, dtype=np.int32)
         self.w = np.asarray(w)
         self.n = self.p.shape[0]
         self.m = self.p.shape[1]
+        self.workspace = self.create_workspace()
+        self.c = self.workspace.c
+
+    def create_workspace(self):
+        """Creates new scratch buffers for evaluating solutions.
+
+        Each thread evaluating solutions of the instance
+        should use its own workspace.
+
+        Returns:
+            :obj:`pfspwt.workspace.Workspace`: New workspace.
+        """
+        return Workspace(self.n, self.m)
@@ -4,53 +4,400 @@
 
 from pfspwt.instance import Instance
 
+import hashlib
+import io
+import json
+import os
+import struct
+import warnings
+import numpy as np
+
 
 class PFSPWTIO:
+    """Reader of PFSP-WT instances in Taillard's format.
+
+    Parsed instances are cached in binary files, in a directory
+    named `CACHE_DIR` next to the text files. The cache of an
+    instance is valid as long as the modification time of the
+    text file is unchanged, or as long as its content has the same
+    hash. Cached instances are memory-mapped when loaded.
+
+    Attributes:
+        CACHE_DIR (str): Name of the cache directories.
+    """
 
-    class PFSPException:
+    CACHE_DIR = '__pfspcache__'
+
+    class PFSPException(Exception):
         """Read/write exception."""
-        def __init__(self, *args, **kwargs):
-            Exception.__init__(self, *args, **kwargs)
+        pass
 
     @staticmethod
-    def readline(f):
-        """Reads next non-empty line of a given file.
+    def parse(text):
+        """Parses PFSP-WT instance from the content of a text file.
+
+        The whole content is tokenised at once: the header
+        (n and m), the n rows of (machine, processing time) pairs,
+        the "Reldue" keyword and the n rows of (-1, due date, -1,
+        weight) integers.
 
         Parameters:
-            f (:obj:`_io.TextIOWrapper`): Current file.
+            text (bytes): Content of the instance file.
 
         Returns:
-            str: Next non-empty line.
+            :obj:`pfspwt.Instance`: PFSP-WT problem instance.
         """
-        line = f.readline()
-        while not (len(line) > 2 or line[0].isalnum()):
-            line = f.readline()
-            if line is None:
-                raise PFSPWTIO.PFSPException('Reached EOF.')
-        return line.replace('\n', '')
+        if isinstance(text, str):
+            text = text.encode('ascii')
+        head, sep, tail = text.partition(b'Reldue')
+        if not sep:
+            raise PFSPWTIO.PFSPException(
+                    'Expected "Reldue" before deadlines.')
+        # Older versions of NumPy only warn about unparsed tokens
+        # and return the numbers read up to that point
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            try:
+                head = np.fromstring(head, dtype=np.int64, sep=' ')
+                tail = np.fromstring(tail, dtype=np.int64, sep=' ')
+            except (ValueError, DeprecationWarning):
+                raise PFSPWTIO.PFSPException('Expected integers only.')
+        if len(head) < 2 or head[0] <= 0 or head[1] <= 0:
+            raise PFSPWTIO.PFSPException(
+                    'Expected positive numbers of jobs and machines.')
+        n, m = int(head[0]), int(head[1])
+        if len(head) != 2 + 2 * n * m:
+            raise PFSPWTIO.PFSPException(
+                    'Expected %d processing times.' % (n * m))
+        if len(tail) != 4 * n:
+            raise PFSPWTIO.PFSPException(
+                    'Expected %d due dates and weights.' % n)
+        p = head[2:].reshape(n, m, 2)[:, :, 1]
+        if np.any(p < 0):
+            raise PFSPWTIO.PFSPException('Negative processing time.')
+        tail = tail.reshape(n, 4)
+        return Instance(p, tail[:, 1], tail[:, 3])
 
     @staticmethod
-    def read(filepath):
+    def read(filepath, cache=True):
         """Parses PFSP-WT instance from text file.
 
         Parameters:
             filepath (str): Location of the instance file.
+            cache (bool): Whether to load the instance from its
+                binary cache, and to create or refresh the cache
+                if it is not valid.
+
+        Returns:
+            :obj:`pfspwt.Instance`: PFSP-WT problem instance.
+        """
+        if not cache:
+            with open(filepath, 'rb') as f:
+                return PFSPWTIO.parse(f.read())
+
+        directory, filename = os.path.split(filepath)
+        cache_dir = os.path.join(directory, PFSPWTIO.CACHE_DIR)
+        data_path = os.path.join(cache_dir, filename + '.npy')
+        key_path = os.path.join(cache_dir, filename + '.json')
+        mtime = os.stat(filepath).st_mtime_ns
+
+        # Cache is valid if the text file has not been modified
+        key = None
+        try:
+            with open(key_path, 'r') as f:
+                key = json.load(f)
+            if key['mtime'] == mtime:
+                return PFSPWTIO.load(data_path, key['n'], key['m'])
+        except (OSError, ValueError, KeyError):
+            key = None
+
+        # Cache is still valid if the content of the file is unchanged
+        with open(filepath, 'rb') as f:
+            text = f.read()
+        digest = hashlib.sha1(text).hexdigest()
+        if key is not None and key.get('sha1') == digest:
+            try:
+                instance = PFSPWTIO.load(data_path, key['n'], key['m'])
+                key['mtime'] = mtime
+                PFSPWTIO._write_atomic(key_path, json.dumps(key).encode())
+                return instance
+            except (OSError, ValueError):
+                pass
+
+        instance = PFSPWTIO.parse(text)
+        key = { 'mtime': mtime, 'sha1': digest,
+                'n': instance.n, 'm': instance.m }
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            PFSPWTIO.save(data_path, instance)
+            PFSPWTIO._write_atomic(key_path, json.dumps(key).encode())
+        except OSError:
+            # Instances can still be read from read-only locations
+            pass
+        return instance
+
+    @staticmethod
+    def write(filepath, instance, chunk_size=1024):
+        """Writes an instance in Taillard's format.
+
+        Rows are formatted and written `chunk_size` jobs at a time,
+        hence large instances are never held in memory as text.
+
+        Parameters:
+            filepath (str): Location of the instance file.
+            instance (:obj:`pfspwt.Instance`): PFSP-WT problem instance.
+            chunk_size (int): Number of jobs written at once.
+        """
+        n, m = instance.n, instance.m
+        tmp_path = filepath + '.%d.tmp' % os.getpid()
+        with open(tmp_path, 'w') as f:
+            f.write('%d %d\n' % (n, m))
+            row = np.empty((min(chunk_size, n), m, 2), dtype=np.int64)
+            row[:, :, 0] = np.arange(m)
+            for i in range(0, n, chunk_size):
+                chunk = row[:min(chunk_size, n - i)]
+                chunk[:, :, 1] = instance.p[i:i+len(chunk)]
+                np.savetxt(f, chunk.reshape(len(chunk), 2 * m), fmt='%d')
+            f.write('Reldue\n')
+            for i in range(0, n, chunk_size):
+                d = instance.d[i:i+chunk_size]
+                w = instance.w[i:i+chunk_size]
+                np.savetxt(f, np.column_stack((
+                        np.full(len(d), -1), d, np.full(len(d), -1), w)),
+                        fmt='%d')
+        os.replace(tmp_path, filepath)
+
+    @staticmethod
+    def save(filepath, instance):
+        """Saves an instance in binary format.
+
+        Processing times, due dates and weights are stored
+        contiguously as a single array of 32-bit integers.
+
+        Parameters:
+            filepath (str): Location of the binary file.
+            instance (:obj:`pfspwt.Instance`): PFSP-WT problem instance.
+        """
+        buf = io.BytesIO()
+        np.save(buf, PFSPWTIO.pack(instance))
+        PFSPWTIO._write_atomic(filepath, buf.getvalue())
+
+    @staticmethod
+    def pack(instance):
+        """Stores an instance contiguously in a single array.
+
+        Parameters:
+            instance (:obj:`pfspwt.Instance`): PFSP-WT problem instance.
+
+        Returns:
+            :obj:`np.ndarray`: Array of 32-bit integers of shape
+                (n * m + 2 * n,), containing the processing times,
+                the due dates and the weights.
+        """
+        data = np.concatenate((instance.p.ravel(), instance.d, instance.w))
+        return data.astype(np.int32)
+
+    @staticmethod
+    def unpack(data, n, m):
+        """Creates an instance from an array created by `pack`.
+
+        Processing times and due dates are views on `data`.
+
+        Parameters:
+            data (:obj:`np.ndarray`): Array of 32-bit integers.
+            n (int): Number of jobs.
+            m (int): Number of machines.
 
         Returns:
             :obj:`pfspwt.Instance`: PFSP-WT problem instance.
         """
-        with open(filepath, 'r') as f:
-            el = PFSPWTIO.readline(f).split()
-            n, m = int(el[0]), int(el[1])
-            p = list()
-            for i in range(n):
-                el = PFSPWTIO.readline(f).split()
-                p.append([int(el[i*2+1]) for i in range(m)])
-            d, w = list(), list()
-            if not f.readline()[:6] == 'Reldue':
-                raise PFSPWTIO.PFSPException('Expected "Reldue" before deadlines.')
-            for i in range(n):
-                el = PFSPWTIO.readline(f).split()
-                d.append(int(el[1]))
-                w.append(int(el[3]))
+        if data.shape != (n * m + 2 * n,) or data.dtype != np.int32:
+            raise ValueError('Corrupted binary instance.')
+        p = data[:n*m].reshape(n, m)
+        d = data[n*m:n*m+n]
+        w = data[n*m+n:].astype(np.int64)
         return Instance(p, d, w)
+
+    @staticmethod
+    def load(filepath, n, m):
+        """Loads an instance saved in binary format.
+
+        The file is memory-mapped (copy-on-write): processing times
+        are only read from disk when they are accessed.
+
+        Parameters:
+            filepath (str): Location of the binary file.
+            n (int): Number of jobs.
+            m (int): Number of machines.
+
+        Returns:
+            :obj:`pfspwt.Instance`: PFSP-WT problem instance.
+        """
+        data = np.load(filepath, mmap_mode='c').view(np.ndarray)
+        return PFSPWTIO.unpack(data, n, m)
+
+    @staticmethod
+    def _write_atomic(filepath, content):
+        """Writes a file so that readers never see it partially written.
+
+        Parameters:
+            filepath (str): Location of the file.
+            content (bytes): Content of the file.
+        """
+        tmp_path = filepath + '.%d.tmp' % os.getpid()
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, filepath)
+
+
+class InstanceBundle:
+    """Collection of PFSP-WT instances stored in a single binary file.
+
+    A bundle starts with the `MAGIC` bytes, followed by the instances
+    packed one after the other (see `PFSPWTIO.pack`), an index in
+    JSON format giving the name, offset and size of each instance,
+    and a footer containing the offset of the index and `MAGIC`.
+    Since the index is written last, bundles are written one instance
+    at a time (see `write`), and the file is memory-mapped when read:
+    instances are only loaded when accessed, and only the instances
+    in use are kept in memory.
+
+    Attributes:
+        filepath (str): Location of the bundle.
+        index (dict): Offset in bytes, number of jobs and number
+            of machines of each instance, by name, in the order
+            in which instances have been written.
+        _size (int): Size of the bundle in bytes.
+        _data (:obj:`np.ndarray`): Memory-mapped content of the
+            bundle, or None if it has not been opened yet.
+    """
+
+    MAGIC = b'PFSPWTB1'
+
+    FOOTER = struct.Struct('<Q8s')
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        with open(filepath, 'rb') as f:
+            if f.read(len(self.MAGIC)) != self.MAGIC:
+                raise PFSPWTIO.PFSPException(
+                        '"%s" is not a bundle of instances.' % filepath)
+            self._size = os.fstat(f.fileno()).st_size
+            end = self._size - self.FOOTER.size
+            if end < len(self.MAGIC):
+                raise PFSPWTIO.PFSPException(
+                        'Bundle "%s" is truncated.' % filepath)
+            f.seek(end)
+            offset, magic = self.FOOTER.unpack(f.read(self.FOOTER.size))
+            if magic != self.MAGIC or not len(self.MAGIC) <= offset <= end:
+                raise PFSPWTIO.PFSPException(
+                        'Bundle "%s" is truncated.' % filepath)
+            f.seek(offset)
+            try:
+                self.index = json.loads(f.read(end - offset).decode('utf-8'))
+                if not isinstance(self.index, dict):
+                    raise ValueError()
+                for entry in self.index.values():
+                    if len(entry) != 3 or not all(
+                            isinstance(value, int) for value in entry):
+                        raise ValueError()
+            except (ValueError, TypeError):
+                raise PFSPWTIO.PFSPException(
+                        'Bundle "%s" has a corrupted index.' % filepath)
+        self._data = None
+
+    @staticmethod
+    def write(filepath, instances):
+        """Writes a bundle, one instance at a time.
+
+        Parameters:
+            filepath (str): Location of the bundle.
+            instances (iterable): Pairs of names and instances
+                (:obj:`pfspwt.Instance`), which may be generated
+                lazily.
+        """
+        index = dict()
+        tmp_path = filepath + '.%d.tmp' % os.getpid()
+        with open(tmp_path, 'wb') as f:
+            f.write(InstanceBundle.MAGIC)
+            for name, instance in instances:
+                index[name] = [f.tell(), instance.n, instance.m]
+                f.write(PFSPWTIO.pack(instance).tobytes())
+            offset = f.tell()
+            f.write(json.dumps(index).encode('utf-8'))
+            f.write(InstanceBundle.FOOTER.pack(offset, InstanceBundle.MAGIC))
+        os.replace(tmp_path, filepath)
+
+    @staticmethod
+    def from_directory(directory, filepath, extension='.txt'):
+        """Writes a bundle of all the instance files of a directory.
+
+        Files are parsed one at a time, hence the whole
+        collection of instances is never held in memory.
+
+        Parameters:
+            directory (str): Location of the instance files.
+            filepath (str): Location of the bundle.
+            extension (str): Extension of the instance files.
+                Instances are named after the files, without
+                the extension.
+
+        Returns:
+            :obj:`pfspwt.io.InstanceBundle`: The new bundle.
+        """
+        filenames = sorted(filename for filename in os.listdir(directory)
+                           if filename.endswith(extension))
+        InstanceBundle.write(filepath, (
+                (filename[:-len(extension)], PFSPWTIO.read(
+                 os.path.join(directory, filename), cache=False))
+                for filename in filenames))
+        return InstanceBundle(filepath)
+
+    def names(self):
+        """Returns the names of the instances.
+
+        Returns:
+            list: Names, in the order in which instances
+                have been written.
+        """
+        return list(self.index)
+
+    def __getitem__(self, name):
+        """Loads an instance by name.
+
+        Parameters:
+            name (str): Name of the instance.
+
+        Returns:
+            :obj:`pfspwt.Instance`: PFSP-WT problem instance, whose
+                processing times and due dates are copy-on-write
+                views on the bundle.
+        """
+        if self._data is None:
+            self._data = np.memmap(self.filepath, dtype=np.uint8, mode='c')
+            self._data = self._data.view(np.ndarray)
+        offset, n, m = self.index[name]
+        size = (n * m + 2 * n) * 4
+        if offset < len(self.MAGIC) or n <= 0 or m <= 0 \
+                or offset + size > self._size - self.FOOTER.size:
+            raise PFSPWTIO.PFSPException(
+                    'Instance "%s" is out of the bounds of bundle "%s".'
+                    % (name, self.filepath))
+        data = self._data[offset:offset+size].view(np.int32)
+        return PFSPWTIO.unpack(data, n, m)
+
+    def __iter__(self):
+        """Loads instances lazily, one at a time.
+
+        Yields:
+            tuple: Name of the next instance, and the
+                instance (:obj:`pfspwt.Instance`).
+        """
+        for name in self.index:
+            yield name, self[name]
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __len__(self):
+        return len(self.index)
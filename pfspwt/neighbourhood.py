@@ -2,45 +2,86 @@
 # neighbourhood.py: Solution neighbourhoods for local search
 # author : Antoine Passemiers
 
-from pfspwt.objective import computation_times
+from pfspwt.objective import count_kernel_call
+from pfspwt.objective import partial_computation_times
+from pfspwt.objective import bounded_weighted_tardiness
+from pfspwt.objective import weighted_tardiness_prefix
 
 import numpy as np
 import numba
 
 
-@numba.jit('boolean(i4[:, :], i4[:, :], i4[:], f4[:], i4[:], i4[:])', nopython=True)
-def __swap_search(c, p, d, w, solution, new_sol):
+# Identifiers of the local search methods in compiled code. The first
+# ones apply a few passes of best improvement, and the "-first" and
+# "-best" ones run to a local optimum (see `descent`).
+LOCAL_SEARCHES = {
+    'none': 0,
+    'swap': 1,
+    'interchange': 2,
+    'insertion': 3,
+    'swap-first': 4,
+    'swap-best': 5,
+    'insertion-first': 6,
+    'insertion-best': 7,
+    'interchange-first': 8,
+    'interchange-best': 9
+}
+SWAP = LOCAL_SEARCHES['swap']
+INTERCHANGE = LOCAL_SEARCHES['interchange']
+INSERTION = LOCAL_SEARCHES['insertion']
+SWAP_FIRST = LOCAL_SEARCHES['swap-first']
+SWAP_BEST = LOCAL_SEARCHES['swap-best']
+INSERTION_FIRST = LOCAL_SEARCHES['insertion-first']
+INSERTION_BEST = LOCAL_SEARCHES['insertion-best']
+INTERCHANGE_FIRST = LOCAL_SEARCHES['interchange-first']
+INTERCHANGE_BEST = LOCAL_SEARCHES['interchange-best']
+
+
+@numba.jit('Tuple((boolean, f8))'
+           '(i4[:, :], i4[:], f8[:], i4[:, :], i4[:], f4[:], i4[:], i4[:])',
+           nopython=True, nogil=True, cache=True)
+def __swap_search(c, row, z, p, d, w, solution, new_sol):
     """Local search based on swap moves.
 
+    Completion times of the provided solution are computed once.
+    Swapping jobs i and i+1 leaves the first i rows unchanged,
+    hence each move is evaluated from row i onwards only.
+
     Parameters:
         c (:obj:`np.ndarray`): Completion times.
+        row (:obj:`np.ndarray`): Buffer of shape (m,) for the
+            completion times of a single job.
+        z (:obj:`np.ndarray`): Buffer of shape (n,) for the
+            cumulative weighted tardiness of the solution.
         p (:obj:`np.ndarray`): Computation times.
         d (:obj:`np.ndarray`): Due dates.
         w (:obj:`np.ndarray`): Weights.
         solution (:obj:`np.ndarray`): Current solution.
         new_sol (:obj:`np.ndarray`): Array to store the new solution.
+
+    Returns:
+        bool: Whether an improving move has been found.
+        float: Weighted tardiness of the new solution.
     """
     new_sol[:] = solution[:]
 
     # Evaluate weighted tardiness on provided solution
-    computation_times(c, p[solution, :])
-    t = np.maximum(c[:, -1] - d, 0).astype(np.float32)
-    bestZ = np.dot(w, t)
+    partial_computation_times(c, p, solution, 0)
+    bestZ = weighted_tardiness_prefix(c, d, w, solution, z)
     best_idx = -1
     for i in range(len(solution) - 1):
 
         # Swap two jobs
         solution[i], solution[i+1] = solution[i+1], solution[i]
 
-        # Compute completion times of new solution
-        computation_times(c, p[solution, :])
+        # Evaluate weighted tardiness of new solution, unless
+        # it is known to be worse than the best one
+        currentZ = bounded_weighted_tardiness(
+                c, row, z, p, d, w, solution, i, i + 2, 0, bestZ)
 
         # Put jobs back in place
         solution[i], solution[i+1] = solution[i+1], solution[i]
 
-        # Evaluate weighted tardiness of new solution
-        t = np.maximum(c[:, -1] - d, 0).astype(np.float32)
-        currentZ = np.dot(w, t)
         if currentZ < bestZ:
             bestZ = currentZ
             best_idx = i
@@ -50,10 +91,10 @@ def __swap_search(c, p, d, w, solution, new_sol):
         improvement = True
     else:
         improvement = False
-    return improvement
+    return improvement, bestZ
 
 
-def swap_search(instance, solution):
+def swap_search(instance, solution, workspace=None):
     """Local search based on swap moves.
 
     This function is a wrapper of the Numba function
@@ -64,67 +105,89 @@ def swap_search(instance, solution):
         solution (:obj:`np.ndarray`): Array of shape (n,) where
             `solution[i]` is the identifier of the job scheduled
             in position i.
-    
+        workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
+            The default workspace of the instance is used if None.
+
     Returns:
         :obj:`np.ndarray`: Improved solution.
+        bool: Whether the solution has been improved.
+        float: Weighted tardiness of the improved solution.
     """
-    d = instance.d[solution]
-    w = instance.w[solution].astype(np.float32)
+    d = instance.d
+    w = instance.w.astype(np.float32)
     p = instance.p
-    c = instance.c
+    ws = instance.workspace if workspace is None else workspace
+    c, row, z = ws.c, ws.row, ws.z
     new_solution = np.empty_like(solution)
-    improvement = __swap_search(c, p, d, w, solution, new_solution)
-    return new_solution, improvement
+    improvement, objective = __swap_search(
+            c, row, z, p, d, w, solution, new_solution)
+    return new_solution, improvement, objective
 
 
-@numba.jit('boolean(i4[:, :], i4[:, :], i4[:], f4[:], i4[:], i4[:])', nopython=True)
-def __interchange_search(c, p, d, w, solution, new_sol):
+@numba.jit('Tuple((boolean, f8))'
+           '(i4[:, :], i4[:], f8[:], i4[:, :], i4[:], f4[:], i4[:], i4[:])',
+           nopython=True, nogil=True, cache=True)
+def __interchange_search(c, row, z, p, d, w, solution, new_sol):
     """Local search based on interchange moves.
 
+    Completion times of the provided solution are computed once.
+    Moves are enumerated by increasing smallest position i, and
+    interchanging jobs i and j > i leaves the first i rows unchanged,
+    hence each move is evaluated from row i onwards only (and until
+    the completion times of the provided solution are recovered
+    after position j).
+
     Parameters:
         c (:obj:`np.ndarray`): Completion times.
+        row (:obj:`np.ndarray`): Buffer of shape (m,) for the
+            completion times of a single job.
+        z (:obj:`np.ndarray`): Buffer of shape (n,) for the
+            cumulative weighted tardiness of the solution.
         p (:obj:`np.ndarray`): Computation times.
         d (:obj:`np.ndarray`): Due dates.
         w (:obj:`np.ndarray`): Weights.
         solution (:obj:`np.ndarray`): Current solution.
         new_sol (:obj:`np.ndarray`): Array to store the new solution.
+
+    Returns:
+        bool: Whether an improving move has been found.
+        float: Weighted tardiness of the new solution.
     """
+    n = solution.shape[0]
     new_sol[:] = solution[:]
 
     # Compute weighted tardiness of provided solution
-    computation_times(c, p[solution, :])
-    t = np.maximum(c[:, -1] - d, 0).astype(np.float32)
-    bestZ = np.dot(w, t)
+    partial_computation_times(c, p, solution, 0)
+    bestZ = weighted_tardiness_prefix(c, d, w, solution, z)
 
     best_i, best_j = -1, -1
-    for i in range(len(solution) - 1):
-        for j in range(i):
+    for i in range(n - 1):
+        for j in range(i + 1, n):
 
             # Interchange jobs i and j
             solution[i], solution[j] = solution[j], solution[i]
 
-            # Compute completion times of new solution
-            computation_times(c, p[solution, :])
+            # Evaluate weighted tardiness of new solution, unless
+            # it is known to be worse than the best one. The first
+            # i rows are the ones of the provided solution.
+            currentZ = bounded_weighted_tardiness(
+                    c, row, z, p, d, w, solution, i, j + 1, 0, bestZ)
 
             # Put jobs back in place
             solution[i], solution[j] = solution[j], solution[i]
 
-            # Evaluate weighted tardiness of new solution
-            t = np.maximum(c[:, -1] - d, 0).astype(np.float32)
-            currentZ = np.dot(w, t)
             if currentZ < bestZ:
                 bestZ = currentZ
                 best_i, best_j = i, j
     i, j = best_i, best_j
     if i > -1:
-        i, j = best_i, best_j
         new_sol[i], new_sol[j] = new_sol[j], new_sol[i]
-        return 1
+        return True, bestZ
     else:
-        return 0
+        return False, bestZ
 
 
-def interchange_search(instance, solution):
+def interchange_search(instance, solution, workspace=None):
     """Local search based on interchange moves.
 
     This function is a wrapper of the Numba function
@@ -135,66 +198,99 @@ def interchange_search(instance, solution):
         solution (:obj:`np.ndarray`): Array of shape (n,) where
             `solution[i]` is the identifier of the job scheduled
             in position i.
-    
+        workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
+            The default workspace of the instance is used if None.
+
     Returns:
         :obj:`np.ndarray`: Improved solution.
+        bool: Whether the solution has been improved.
+        float: Weighted tardiness of the improved solution.
     """
-    d = instance.d[solution]
-    w = instance.w[solution].astype(np.float32)
+    d = instance.d
+    w = instance.w.astype(np.float32)
     p = instance.p
-    c = instance.c
+    ws = instance.workspace if workspace is None else workspace
+    c, row, z = ws.c, ws.row, ws.z
     new_solution = np.empty_like(solution)
-    improvement = __swap_search(c, p, d, w, solution, new_solution)
-    return new_solution, improvement
+    improvement, objective = __interchange_search(
+            c, row, z, p, d, w, solution, new_solution)
+    return new_solution, improvement, objective
 
 
-@numba.jit('boolean(i4[:, :], i4[:, :], i4[:], f4[:], i4[:], i4[:])', nopython=True)
-def __insertion_search(c, p, d, w, solution, new_sol):
+@numba.jit('Tuple((boolean, f8))'
+           '(i4[:, :], i4[:], f8[:], i4[:, :], i4[:], f4[:], i4[:], i4[:])',
+           nopython=True, nogil=True, cache=True)
+def __insertion_search(c, row, z, p, d, w, solution, new_sol):
     """Local search based on insertion moves.
 
+    The forward completion times of the provided solution are
+    computed once per pass (as in Taillard's acceleration, tails
+    being of no use for the weighted tardiness). Moving the job
+    in position i to position j < i leaves the first j rows
+    unchanged, and the sequence is identical to the current one
+    again after position i. For each removed job, the insertion
+    positions are scanned by sliding the job one position to
+    the right at a time, so that each candidate costs a single
+    exchange of jobs plus the evaluation of rows j to i (and beyond,
+    until the completion times of the current solution are recovered).
+
     Parameters:
         c (:obj:`np.ndarray`): Completion times.
+        row (:obj:`np.ndarray`): Buffer of shape (m,) for the
+            completion times of a single job.
+        z (:obj:`np.ndarray`): Buffer of shape (n,) for the
+            cumulative weighted tardiness of the solution.
         p (:obj:`np.ndarray`): Computation times.
         d (:obj:`np.ndarray`): Due dates.
         w (:obj:`np.ndarray`): Weights.
         solution (:obj:`np.ndarray`): Current solution.
         new_sol (:obj:`np.ndarray`): Array to store the new solution.
+
+    Returns:
+        bool: Whether an improving move has been found.
+        float: Weighted tardiness of the new solution.
     """
     new_sol[:] = solution[:]
 
     # Evaluate weighted tardiness of the provided solution
-    computation_times(c, p[solution, :])
-    t = np.maximum(c[:, -1] - d, 0).astype(np.float32)
-    bestZ = np.dot(w, t)
+    partial_computation_times(c, p, solution, 0)
+    bestZ = weighted_tardiness_prefix(c, d, w, solution, z)
 
     best_i, best_j = -1, -1
-    for i in range(len(solution)):
-        for j in range(i):
+    for i in range(1, len(solution)):
 
-            # Insert job j at position i
-            solution[j+1:i+1], solution[j] = solution[j:i], solution[i]
+        # Remove job i and insert it at the first position
+        job = solution[i]
+        for k in range(i, 0, -1):
+            solution[k] = solution[k-1]
+        solution[0] = job
 
-            # Compute completion times of the new solution
-            computation_times(c, p[solution, :])
-
-            # Put the jobs back in place
-            solution[i:j], solution[j], solution[i+1:j+1], solution[i]
+        for j in range(i):
 
-            # Evaluate the weighted tardiness of the new solution
-            t = np.maximum(c[:, -1] - d, 0).astype(np.float32)
-            currentZ = np.dot(w, t)
+            # Evaluate the weighted tardiness of the new solution,
+            # where job i has been inserted at position j
+            currentZ = bounded_weighted_tardiness(
+                    c, row, z, p, d, w, solution, j, i + 1, 0, bestZ)
             if currentZ < bestZ:
                 bestZ = currentZ
                 best_i, best_j = i, j
+
+            # Move job i to the next insertion position. After the
+            # last one, the job is back in place.
+            solution[j], solution[j+1] = solution[j+1], solution[j]
+
     if best_i > -1:
         i, j = best_i, best_j
-        new_sol[j+1:i+1], new_sol[j] = new_sol[j:i], new_sol[i]
-        return 1
+        job = new_sol[i]
+        for k in range(i, j, -1):
+            new_sol[k] = new_sol[k-1]
+        new_sol[j] = job
+        return True, bestZ
     else:
-        return 0
+        return False, bestZ
 
 
-def insertion_search(instance, solution):
+def insertion_search(instance, solution, workspace=None):
     """Local search based on insertion moves.
 
     This function is a wrapper of the Numba function
@@ -205,14 +301,291 @@ def insertion_search(instance, solution):
         solution (:obj:`np.ndarray`): Array of shape (n,) where
             `solution[i]` is the identifier of the job scheduled
             in position i.
-    
+        workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
+            The default workspace of the instance is used if None.
+
     Returns:
         :obj:`np.ndarray`: Improved solution.
+        bool: Whether the solution has been improved.
+        float: Weighted tardiness of the improved solution.
     """
-    d = instance.d[solution]
-    w = instance.w[solution].astype(np.float32)
+    d = instance.d
+    w = instance.w.astype(np.float32)
     p = instance.p
-    c = instance.c
+    ws = instance.workspace if workspace is None else workspace
+    c, row, z = ws.c, ws.row, ws.z
     new_solution = np.empty_like(solution)
-    improvement = __insertion_search(c, p, d, w, solution, new_solution)
-    return new_solution, improvement
+    improvement, objective = __insertion_search(
+            c, row, z, p, d, w, solution, new_solution)
+    return new_solution, improvement, objective
+
+
+@numba.jit('void(i4[:], i4, i4)', nopython=True, nogil=True, cache=True)
+def _move(solution, i, j):
+    """Moves the job in position i to position j inplace.
+
+    Jobs in between are shifted by one position. Moving the job
+    back from position j to position i restores the solution.
+
+    Parameters:
+        solution (:obj:`np.ndarray`): Current solution.
+        i (int): Current position of the job.
+        j (int): New position of the job.
+    """
+    job = solution[i]
+    if j < i:
+        for k in range(i, j, -1):
+            solution[k] = solution[k-1]
+    else:
+        for k in range(i, j):
+            solution[k] = solution[k+1]
+    solution[j] = job
+
+
+@numba.jit('void(i4[:], i4, i4, i4)', nopython=True, nogil=True, cache=True)
+def _apply(solution, neighbourhood, i, j):
+    """Applies a move inplace.
+
+    Applying the move (j, i) after the move (i, j)
+    restores the solution.
+
+    Parameters:
+        solution (:obj:`np.ndarray`): Current solution.
+        neighbourhood (int): `INTERCHANGE` for interchanging the jobs
+            in positions i and j, or `SWAP` or `INSERTION` for moving
+            the job in position i to position j.
+        i (int): First position.
+        j (int): Second position.
+    """
+    if neighbourhood == INTERCHANGE:
+        solution[i], solution[j] = solution[j], solution[i]
+    else:
+        _move(solution, i, j)
+
+
+@numba.jit('f8(i4[:, :], i4[:], f8[:], i4[:, :], i4[:], f4[:], i4[:], i4, boolean)',
+           nopython=True, nogil=True, cache=True)
+def __descent(c, row, z, p, d, w, solution, neighbourhood, first_improvement):
+    """Local search applying improving moves until a local optimum is reached.
+
+    A don't-look bit is kept for each position: once no improving
+    move has been found for the job in position i, position i is
+    skipped until a move applied nearby clears its bit. Moves are
+    thus only evaluated around the last improvements. When all the
+    bits are set, they are cleared once more and the whole
+    neighbourhood is scanned, which either confirms that the
+    solution is a local optimum or resumes the search.
+
+    Parameters:
+        c (:obj:`np.ndarray`): Completion times.
+        row (:obj:`np.ndarray`): Buffer of shape (m,) for the
+            completion times of a single job.
+        z (:obj:`np.ndarray`): Buffer of shape (n,) for the
+            cumulative weighted tardiness of the solution.
+        p (:obj:`np.ndarray`): Computation times.
+        d (:obj:`np.ndarray`): Due dates.
+        w (:obj:`np.ndarray`): Weights.
+        solution (:obj:`np.ndarray`): Current solution, replaced
+            inplace by the local optimum.
+        neighbourhood (int): `SWAP` for swapping the job in position i
+            with the next one, `INTERCHANGE` for interchanging it with
+            any job placed after it, or `INSERTION` for moving it to
+            any other position.
+        first_improvement (bool): Whether to apply the first improving
+            move found, or the best move among the positions scanned.
+
+    Returns:
+        float: Weighted tardiness of the local optimum.
+    """
+    n = solution.shape[0]
+    dlb = np.zeros(n, dtype=np.bool_)
+
+    # Evaluate weighted tardiness of the provided solution
+    partial_computation_times(c, p, solution, 0)
+    Z = weighted_tardiness_prefix(c, d, w, solution, z)
+
+    fresh = True
+    while True:
+        improvement = False
+        best_i, best_j, bestZ = -1, -1, Z
+        for i in range(n):
+            if dlb[i]:
+                continue
+            if neighbourhood == INSERTION:
+                lo, hi = 0, n - 1
+            elif neighbourhood == INTERCHANGE:
+                lo, hi = i + 1, n - 1
+            else:
+                lo, hi = i + 1, min(i + 1, n - 1)
+            found = False
+            for j in range(lo, hi + 1):
+                if j == i:
+                    continue
+
+                # Evaluate the move, rows before min(i, j) being unchanged
+                # and rows after max(i, j) being possibly recovered
+                start, join = min(i, j), max(i, j) + 1
+                _apply(solution, neighbourhood, i, j)
+                currentZ = bounded_weighted_tardiness(
+                        c, row, z, p, d, w, solution, start, join, 0, bestZ)
+                _apply(solution, neighbourhood, j, i)
+
+                # Position i has an improving move if the move beats the
+                # current solution, even when it does not beat the best
+                # move. An aborted evaluation is only a lower bound, in
+                # which case position i is conservatively kept in sight.
+                if currentZ < Z:
+                    found = True
+                    if currentZ < bestZ:
+                        best_i, best_j, bestZ = i, j, currentZ
+                    if first_improvement:
+                        break
+            if not found:
+                dlb[i] = True
+            elif first_improvement:
+                break
+
+        if best_i > -1:
+            # Apply the move and clear the don't-look bits
+            # of the positions it affects
+            i, j = best_i, best_j
+            _apply(solution, neighbourhood, i, j)
+            partial_computation_times(c, p, solution, min(i, j))
+            Z = weighted_tardiness_prefix(c, d, w, solution, z)
+            dlb[max(0, min(i, j) - 1):min(n, max(i, j) + 2)] = False
+            improvement = True
+
+        if improvement:
+            fresh = False
+        elif fresh:
+            break
+        else:
+            # Confirm that the solution is a local optimum
+            dlb[:] = False
+            fresh = True
+    return Z
+
+
+def descent(instance, solution, neighbourhood='swap',
+            first_improvement=True, workspace=None):
+    """Local search applying improving moves until a local optimum is reached.
+
+    This function is a wrapper of the Numba function
+    of the same name.
+
+    Parameters:
+        instance (:obj:`pfspwt.Instance`): PFSP-WT instance.
+        solution (:obj:`np.ndarray`): Array of shape (n,) where
+            `solution[i]` is the identifier of the job scheduled
+            in position i.
+        neighbourhood (str): Either 'swap', 'interchange' or 'insertion'.
+        first_improvement (bool): Whether to apply the first improving
+            move found, or the best move.
+        workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
+            The default workspace of the instance is used if None.
+
+    Returns:
+        :obj:`np.ndarray`: Locally optimal solution.
+        float: Weighted tardiness of the locally optimal solution.
+    """
+    d = instance.d
+    w = instance.w.astype(np.float32)
+    p = instance.p
+    ws = instance.workspace if workspace is None else workspace
+    new_solution = np.array(solution, dtype=np.int32)
+    objective = __descent(ws.c, ws.row, ws.z, p, d, w, new_solution,
+                          LOCAL_SEARCHES[neighbourhood], first_improvement)
+    return new_solution, objective
+
+
+@numba.jit('f8(i4, i4, i4[:, :], i4[:], f8[:], i4[:, :], i4[:], f4[:], i4[:], i4[:])',
+           nopython=True, nogil=True, cache=True)
+def _local_search(ls, n_passes, c, row, z, p, d, w, solution, buf):
+    """Applies several passes of local search on a solution.
+
+    Passes stop as soon as no improving move is found. On return,
+    `c` holds the completion times of the resulting solution,
+    which makes it possible to read its makespan.
+
+    Parameters:
+        ls (int): Identifier of the local search method
+            (see `LOCAL_SEARCHES`). No move is applied if 0.
+        n_passes (int): Maximum number of passes. Ignored by the
+            methods that run to a local optimum.
+        c (:obj:`np.ndarray`): Completion times.
+        row (:obj:`np.ndarray`): Buffer of shape (m,) for the
+            completion times of a single job.
+        z (:obj:`np.ndarray`): Buffer of shape (n,) for the
+            cumulative weighted tardiness of the solution.
+        p (:obj:`np.ndarray`): Computation times.
+        d (:obj:`np.ndarray`): Due dates.
+        w (:obj:`np.ndarray`): Weights.
+        solution (:obj:`np.ndarray`): Current solution, replaced
+            inplace by the improved solution.
+        buf (:obj:`np.ndarray`): Buffer of shape (n,).
+
+    Returns:
+        float: Weighted tardiness of the improved solution.
+    """
+    if ls == SWAP_FIRST or ls == SWAP_BEST:
+        return __descent(c, row, z, p, d, w, solution, SWAP, ls == SWAP_FIRST)
+    elif ls == INSERTION_FIRST or ls == INSERTION_BEST:
+        return __descent(c, row, z, p, d, w, solution,
+                         INSERTION, ls == INSERTION_FIRST)
+    elif ls == INTERCHANGE_FIRST or ls == INTERCHANGE_BEST:
+        return __descent(c, row, z, p, d, w, solution,
+                         INTERCHANGE, ls == INTERCHANGE_FIRST)
+    elif ls == SWAP or ls == INTERCHANGE or ls == INSERTION:
+        for _ in range(n_passes):
+            if ls == INSERTION:
+                improvement, objective = __insertion_search(
+                        c, row, z, p, d, w, solution, buf)
+            elif ls == INTERCHANGE:
+                improvement, objective = __interchange_search(
+                        c, row, z, p, d, w, solution, buf)
+            else:
+                improvement, objective = __swap_search(
+                        c, row, z, p, d, w, solution, buf)
+            if not improvement:
+                # Completion times of the solution are up-to-date
+                return objective
+            solution[:] = buf[:]
+
+    partial_computation_times(c, p, solution, 0)
+    return weighted_tardiness_prefix(c, d, w, solution, z)
+
+
+def local_search(instance, solution, method, n_passes=3, workspace=None):
+    """Applies several passes of local search on a solution.
+
+    This function is a wrapper of the Numba function
+    of the same name.
+
+    Parameters:
+        instance (:obj:`pfspwt.Instance`): PFSP-WT instance.
+        solution (:obj:`np.ndarray`): Array of shape (n,) where
+            `solution[i]` is the identifier of the job scheduled
+            in position i.
+        method (str): Local search method, among the keys
+            of `LOCAL_SEARCHES`.
+        n_passes (int): Maximum number of passes. Ignored by the
+            methods that run to a local optimum.
+        workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
+            The default workspace of the instance is used if None.
+            Completion times of the improved solution are stored
+            in the workspace.
+
+    Returns:
+        :obj:`np.ndarray`: Improved solution.
+        float: Weighted tardiness of the improved solution.
+    """
+    d = instance.d
+    w = instance.w.astype(np.float32)
+    p = instance.p
+    ws = instance.workspace if workspace is None else workspace
+    new_solution = np.array(solution, dtype=np.int32)
+    buf = np.empty_like(new_solution)
+    objective = _local_search(LOCAL_SEARCHES[method], n_passes,
+            ws.c, ws.row, ws.z, p, d, w, new_solution, buf)
+    count_kernel_call('local_search')
+    return new_solution, objective
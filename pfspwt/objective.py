@@ -2,11 +2,51 @@
 # objective.py: Objective functions
 # author : Antoine Passemiers
 
+import threading
 import numpy as np
 import numba
 
 
-@numba.jit('void(i4[:, :], i4[:, :])', nopython=True)
+# Number of calls to the evaluation kernels, by kernel name,
+# or None if calls are not counted (see `count_kernel_calls`)
+_kernel_calls = None
+
+# Guards the counts, which are updated by the worker threads
+# of colonies built concurrently
+_kernel_calls_lock = threading.Lock()
+
+
+def count_kernel_calls(counts):
+    """Starts or stops counting the calls to the evaluation kernels.
+
+    Only the calls made from Python by `evaluate_batch`, by objective
+    functions and by `pfspwt.neighbourhood.local_search` are counted,
+    and counts are shared by all the threads of the process.
+
+    Parameters:
+        counts (dict): Dictionary where the number of calls will be
+            accumulated, by kernel name, or None for not counting calls.
+    """
+    global _kernel_calls
+    with _kernel_calls_lock:
+        _kernel_calls = counts
+
+
+def count_kernel_call(name):
+    """Accounts for a call to an evaluation kernel, if calls are counted.
+
+    Parameters:
+        name (str): Name of the kernel.
+    """
+    if _kernel_calls is None:
+        return
+    with _kernel_calls_lock:
+        if _kernel_calls is not None:
+            _kernel_calls[name] = _kernel_calls.get(name, 0) + 1
+
+
+@numba.jit('void(i4[:, :], i4[:, :])',
+           nopython=True, nogil=True, cache=True)
 def computation_times(c, p):
     """Calculates computation times inplace.
 
@@ -25,7 +65,227 @@ def computation_times(c, p):
 
     for i in range(1, n):
         for j in range(1, m):
-            c[i, j] = max(c[i-1, j], c[i, j-1]) + p[i, j] 
+            c[i, j] = max(c[i-1, j], c[i, j-1]) + p[i, j]
+
+
+@numba.jit('void(i4[:, :], i4[:, :], i4[:], i4)',
+           nopython=True, nogil=True, cache=True)
+def partial_computation_times(c, p, solution, start):
+    """Calculates computation times inplace, starting from a given position.
+
+    Rows 0 to `start - 1` of `c` are assumed to be up-to-date.
+    Processing times are read through `solution`, which avoids
+    reordering the rows of `p`.
+
+    Parameters:
+        c (:obj:`np.ndarray`): Buffer for storing computation
+            times, represented as a matrix of shape (N, M).
+        p (:obj:`np.ndarray`): Matrix of shape (N, M)
+            where `p[i, j]` is the processing time
+            of job i on machine j.
+        solution (:obj:`np.ndarray`): Array of shape (N,) where
+            `solution[i]` is the job scheduled in position i.
+        start (int): First row of `c` to be recomputed.
+    """
+    n = solution.shape[0]
+    m = p.shape[1]
+
+    for i in range(start, n):
+        job = solution[i]
+        if i == 0:
+            c[0, 0] = p[job, 0]
+            for j in range(1, m):
+                c[0, j] = c[0, j-1] + p[job, j]
+        else:
+            c[i, 0] = c[i-1, 0] + p[job, 0]
+            for j in range(1, m):
+                c[i, j] = max(c[i-1, j], c[i, j-1]) + p[job, j]
+
+
+@numba.jit('f8(i4[:, :], i4[:], f4[:], i4[:], f8[:])',
+           nopython=True, nogil=True, cache=True)
+def weighted_tardiness_prefix(c, d, w, solution, z):
+    """Computes cumulative weighted tardiness along a sequence.
+
+    Parameters:
+        c (:obj:`np.ndarray`): Computation times of `solution`.
+        d (:obj:`np.ndarray`): Due dates, indexed by job.
+        w (:obj:`np.ndarray`): Weights, indexed by job.
+        solution (:obj:`np.ndarray`): Current solution.
+        z (:obj:`np.ndarray`): Array of shape (N,) where `z[i]` will
+            be the weighted tardiness of the first i + 1 jobs.
+
+    Returns:
+        float: Weighted tardiness of the whole sequence.
+    """
+    n = solution.shape[0]
+    last = c.shape[1] - 1
+    wt = 0.
+    for i in range(n):
+        job = solution[i]
+        if c[i, last] > d[job]:
+            wt += w[job] * (c[i, last] - d[job])
+        z[i] = wt
+    return wt
+
+
+@numba.jit('f8(i4[:, :], i4[:], f8[:], i4[:, :], i4[:], f4[:], i4[:], i4, i4, i4, f8)',
+           nopython=True, nogil=True, cache=True)
+def bounded_weighted_tardiness(c, row, z, p, d, w, solution,
+                               start, join, shift, bound):
+    """Computes the weighted tardiness of a neighbour of the incumbent,
+    unless it exceeds a given bound.
+
+    The neighbour (stored in `solution`) and the incumbent share
+    their first `start` jobs, and the job of the neighbour in position
+    i >= `join` is the job of the incumbent in position i - `shift`.
+    Completion times are thus only recomputed from row `start`, and
+    the evaluation stops as soon as a completion row matches the
+    incumbent's one after `join`, since all the subsequent rows are
+    then identical. Since weighted tardiness can only grow along the
+    sequence, the evaluation is also aborted as soon as the partial
+    weighted tardiness exceeds `bound`, or as soon as the partial
+    weighted tardiness plus the remaining tardiness of the incumbent
+    exceeds it while no job of the neighbour completes earlier than
+    in the incumbent after `join`.
+
+    Parameters:
+        c (:obj:`np.ndarray`): Computation times of the incumbent.
+        row (:obj:`np.ndarray`): Buffer of shape (M,) for storing the
+            completion times of the current job.
+        z (:obj:`np.ndarray`): Cumulative weighted tardiness of the
+            incumbent, as computed by `weighted_tardiness_prefix`.
+        p (:obj:`np.ndarray`): Processing times, indexed by job.
+        d (:obj:`np.ndarray`): Due dates, indexed by job.
+        w (:obj:`np.ndarray`): Weights, indexed by job.
+        solution (:obj:`np.ndarray`): Neighbour solution.
+        start (int): First position where the neighbour differs
+            from the incumbent.
+        join (int): First position from which the neighbour is
+            identical to the incumbent, up to `shift`.
+        shift (int): Number of jobs of the neighbour that are not
+            in the incumbent (1 when the incumbent is a partial
+            sequence where a job is inserted, 0 otherwise).
+        bound (float): Threshold above which the exact weighted
+            tardiness of the neighbour is not needed.
+
+    Returns:
+        float: Weighted tardiness of the neighbour, or a partial
+            weighted tardiness larger than `bound`.
+    """
+    n = solution.shape[0]
+    m = p.shape[1]
+
+    if start > 0:
+        row[:] = c[start-1, :]
+        wt = z[start-1]
+    else:
+        row[:] = 0
+        wt = 0.
+
+    for i in range(start, n):
+        job = solution[i]
+        row[0] += p[job, 0]
+        for j in range(1, m):
+            row[j] = max(row[j], row[j-1]) + p[job, j]
+        if row[m-1] > d[job]:
+            wt += w[job] * (row[m-1] - d[job])
+
+        # The neighbour cannot be better than the bound anymore
+        if wt > bound:
+            return wt
+
+        if i >= join:
+            same, later = True, True
+            for j in range(m - 1, -1, -1):
+                if row[j] < c[i-shift, j]:
+                    same, later = False, False
+                    break
+                elif row[j] > c[i-shift, j]:
+                    same = False
+            if same:
+                # Completion times of the incumbent are recovered:
+                # the remaining tardiness is already known
+                return wt + z[n-1-shift] - z[i-shift]
+            elif later and wt + z[n-1-shift] - z[i-shift] > bound:
+                # No job can complete earlier than in the incumbent,
+                # hence the remaining tardiness is at least the
+                # incumbent's one
+                return wt + z[n-1-shift] - z[i-shift]
+    return wt
+
+
+@numba.jit('void(i4[:, :], i4[:], f8[:], i4[:, :], i4[:], f8[:], i4[:])',
+           nopython=True, nogil=True, cache=True)
+def _evaluate_batch(p, d, w, solutions, row, wt, ms):
+    """Computes weighted tardiness and makespan of several solutions.
+
+    Completion times are computed one row at a time, hence only
+    a buffer of shape (M,) is needed, regardless of the number
+    of solutions.
+
+    Parameters:
+        p (:obj:`np.ndarray`): Processing times, indexed by job.
+        d (:obj:`np.ndarray`): Due dates, indexed by job.
+        w (:obj:`np.ndarray`): Weights, indexed by job.
+        solutions (:obj:`np.ndarray`): Array of shape (K, N) where
+            each row is a solution.
+        row (:obj:`np.ndarray`): Buffer of shape (M,) for the
+            completion times of a single job.
+        wt (:obj:`np.ndarray`): Array of shape (K,) where weighted
+            tardiness values will be stored.
+        ms (:obj:`np.ndarray`): Array of shape (K,) where makespans
+            will be stored.
+    """
+    n = solutions.shape[1]
+    m = p.shape[1]
+    for k in range(solutions.shape[0]):
+        row[:] = 0
+        total = 0.
+        for i in range(n):
+            job = solutions[k, i]
+            row[0] += p[job, 0]
+            for j in range(1, m):
+                row[j] = max(row[j], row[j-1]) + p[job, j]
+            if row[m-1] > d[job]:
+                total += w[job] * (row[m-1] - d[job])
+        wt[k] = total
+        ms[k] = row[m-1]
+
+
+def evaluate_batch(instance, solutions, with_makespan=False, workspace=None):
+    """Computes the objective functions of a population of solutions.
+
+    This function is a wrapper of the Numba function
+    of the same name.
+
+    Parameters:
+        instance (:obj:`pfsp.Instance`): Problem instance.
+        solutions (:obj:`np.ndarray`): Array of shape (K, n)
+            where each row is a solution.
+        with_makespan (bool): Whether to return makespans as well.
+        workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
+            The default workspace of the instance is used if None.
+
+    Returns:
+        :obj:`np.ndarray`: Array of shape (K,) containing
+            the weighted tardiness of each solution.
+        :obj:`np.ndarray`: Array of shape (K,) containing the
+            makespan of each solution (if `with_makespan` is True).
+    """
+    solutions = np.ascontiguousarray(solutions, dtype=np.int32)
+    if solutions.ndim == 1:
+        solutions = solutions[np.newaxis, :]
+    wt = np.empty(solutions.shape[0], dtype=np.float64)
+    ms = np.empty(solutions.shape[0], dtype=np.int32)
+    ws = instance.workspace if workspace is None else workspace
+    w = instance.w.astype(np.float64)
+    _evaluate_batch(instance.p, instance.d, w, solutions, ws.row, wt, ms)
+    count_kernel_call('evaluate_batch')
+    if with_makespan:
+        return wt, ms
+    else:
+        return wt
 
 
 def objective(func):
@@ -33,7 +293,9 @@ def objective(func):
 
     Wrapped function calculates the objective
     function with job computation times already
-    precompted by the decorator.
+    precompted by the decorator. Computation times
+    are stored in the provided workspace, or in the
+    default workspace of the instance.
 
     Parameters:
         fun (function): Wrapped function.
@@ -42,43 +304,49 @@ def objective(func):
         function: A new objective function.
     """
 
-    def new_func(instance, solution, refresh=True):
+    def new_func(instance, solution, refresh=True, workspace=None):
+        ws = instance.workspace if workspace is None else workspace
         if refresh:
-            ordered_p = instance.p[solution, :]
-            computation_times(instance.c, ordered_p)
-        return func(instance, solution)
+            np.take(instance.p, solution, axis=0, out=ws.p)
+            computation_times(ws.c, ws.p)
+            count_kernel_call('computation_times')
+        return func(instance, solution, ws)
     new_func.__name__ = func.__name__
     return new_func
 
 
 @objective
-def weighted_tardiness(instance, solution):
+def weighted_tardiness(instance, solution, workspace):
     """Computes weighted tardiness.
 
     Parameters:
         instance (:obj:`pfsp.Instance`): Problem instance.
         solution (:obj:`np.ndarray`): Array of shape (n,)
             representing the current solution.
+        workspace (:obj:`pfspwt.workspace.Workspace`): Workspace
+            where computation times have been stored.
 
     Returns:
         int: Weighted tardiness.
     """
     d = instance.d[solution]
     w = instance.w[solution]
-    t = np.maximum(instance.c[:, -1] - d, 0)
+    t = np.maximum(workspace.c[:, -1] - d, 0)
     return np.dot(w, t)
 
 
 @objective
-def makespan(instance, solution):
+def makespan(instance, solution, workspace):
     """Computes makespan.
 
     Parameters:
         instance (:obj:`pfsp.Instance`): Problem instance.
         solution (:obj:`np.ndarray`): Array of shape (n,)
             representing the current solution.
+        workspace (:obj:`pfspwt.workspace.Workspace`): Workspace
+            where computation times have been stored.
 
     Returns:
         int: Makespan.
     """
-    return np.max(instance.c[:, -1])
+    return np.max(workspace.c[:, -1])
@@ -1,3 +1,6 @@
 from .base import *
 from .bioptimizer import *
-from .optimizer import *
\ No newline at end of file
+from .cache import *
+from .history import *
+from .optimizer import *
+from .profiler import *
\ No newline at end of file
@@ -2,6 +2,11 @@
 # base.py: Base class for heuristic optimizers
 # author : Antoine Passemiers
 
+from pfspwt.objective import count_kernel_calls, evaluate_batch
+from pfspwt.optimizer.cache import EvaluationCache
+from pfspwt.optimizer.history import History
+from pfspwt.optimizer.profiler import Profiler, NULL_PHASE
+
 from abc import ABCMeta, abstractmethod
 import time
 import numpy as np
@@ -15,8 +20,10 @@ class BaseOptimizer(metaclass=ABCMeta):
     some stopping condition has been met.
 
     Attributes:
-        _objective (list): Historical values of
-            the objective function.
+        N_OBJECTIVES (int): Number of objective functions
+            recorded for each evaluated solution.
+        history (:obj:`pfspwt.optimizer.History`): Historical values
+            of the objective function(s), and evaluation times.
         _n_iterations (int): Current number of iterations.
         _max_n_iterations (int): Maximum number of iterations.
         _early_stopping (int): Number of allowed optimization
@@ -26,11 +33,21 @@ class BaseOptimizer(metaclass=ABCMeta):
         _n_steps_without_improvement (int): Number of optimization
             steps without improvement.
         _seed (int): Seed for the random number generator.
+        cache (:obj:`pfspwt.optimizer.EvaluationCache`): Cache of
+            the objective values of already evaluated solutions,
+            or None if caching is disabled.
+        profiler (:obj:`pfspwt.optimizer.Profiler`): Time spent in
+            each phase of the optimization, or None if profiling
+            is disabled.
     """
 
+    N_OBJECTIVES = 1
+
     def __init__(self, n_iterations=np.inf, early_stopping=np.inf,
-                 max_time=None, seed=None):
-        self._objective = list()
+                 max_time=None, seed=None, cache_size=None, profile=False,
+                 history='all', history_size=10000):
+        self.history = History(
+                self.N_OBJECTIVES, mode=history, max_size=history_size)
         self._max_n_iterations = n_iterations
         self._n_iterations = 0
         self._early_stopping = early_stopping
@@ -38,6 +55,10 @@ class BaseOptimizer(metaclass=ABCMeta):
         self._t0 = None
         self._n_steps_without_improvement = 0
         self._seed = seed
+        self.cache = None
+        if cache_size:
+            self.cache = EvaluationCache(max_size=cache_size)
+        self.profiler = Profiler() if profile else None
 
     def start(self):
         """Starts optimization.
@@ -52,26 +73,129 @@ class BaseOptimizer(metaclass=ABCMeta):
             self._t0 = time.time()
         self._n_iterations = 0
         self._n_steps_without_improvement = 0
-        self._objective = list()
+        self.history.clear()
+        if self.cache is not None:
+            self.cache.clear()
+        if self.profiler is not None:
+            self.profiler.start()
+        else:
+            # Calls must not be counted by the profiler of
+            # an optimizer that has been started earlier
+            count_kernel_calls(None)
 
-    def evaluate(self, instance, solution):
+    def evaluate(self, instance, solution, objectives=None, workspace=None):
         """Evaluates a new solution.
 
+        If caching is enabled, objective values of solutions
+        that have already been evaluated are retrieved from the cache.
+        Solutions whose objective values are given are neither
+        looked up nor stored, since the cache would not save
+        any evaluation.
+
         Parameters:
             instance (:obj:`pfspwt.Instance`): Instance of the PFSP-WT problem.
             solution (:obj:`np.ndarray`): Current scheduling solution.
+            objectives (tuple, optional): Weighted tardiness and makespan
+                of `solution`, if already computed. The makespan may
+                be omitted.
+            workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
+                The default workspace of the instance is used if None.
 
         Returns:
             float: Weighted tardiness of current solution.
         """
-        objectives, is_improvement = self._evaluate(instance, solution)
+        key = None
+        if self.cache is not None and objectives is None:
+            key = self.cache.key(solution)
+            objectives = self.cache.get(solution, key=key)
+        objectives, is_improvement = self._evaluate(
+                instance, solution, objectives=objectives, workspace=workspace)
+        if key is not None:
+            self.cache.put(solution, objectives, key=key)
         if not is_improvement:
             self._n_steps_without_improvement += 1
         else:
             self._n_steps_without_improvement = 0
-        self._objective.append(objectives)
+        self.history.append(objectives, is_improvement)
         return objectives[0]
 
+    def evaluate_batch(self, instance, solutions, objectives=None,
+                       workspace=None):
+        """Evaluates a population of new solutions.
+
+        Objective functions are computed at once
+        for the whole population (except for cached solutions),
+        and solutions are then accounted for in the order
+        of the population. If caching is enabled, only the
+        solutions whose objective values are not given are
+        looked up and stored.
+
+        Parameters:
+            instance (:obj:`pfspwt.Instance`): Instance of the PFSP-WT problem.
+            solutions (list): List of scheduling solutions.
+            objectives (list, optional): Objective values of each
+                solution, or None for the solutions that have not
+                been evaluated yet.
+            workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
+                The default workspace of the instance is used if None.
+
+        Returns:
+            :obj:`np.ndarray`: Weighted tardiness of each solution.
+        """
+        if objectives is None:
+            objectives = [None] * len(solutions)
+        objectives = list(objectives)
+        missing = [k for k, x in enumerate(objectives) if x is None]
+        keys = dict()
+        if self.cache is not None:
+            for k in missing:
+                keys[k] = self.cache.key(solutions[k])
+                objectives[k] = self.cache.get(solutions[k], key=keys[k])
+            missing = [k for k in missing if objectives[k] is None]
+        if len(missing) > 0:
+            wt, ms = evaluate_batch(
+                    instance, [solutions[k] for k in missing],
+                    with_makespan=True, workspace=workspace)
+            for i, k in enumerate(missing):
+                objectives[k] = (wt[i], ms[i])
+                if self.cache is not None:
+                    self.cache.put(solutions[k], objectives[k], key=keys[k])
+        scores = np.empty(len(solutions), dtype=np.float64)
+        for k, solution in enumerate(solutions):
+            scores[k] = self.evaluate(
+                    instance, solution, objectives=objectives[k])
+        return scores
+
+    def merge(self, other):
+        """Merges the results of another optimizer into this one.
+
+        Historical values of the objective function(s) of `other`
+        are merged with the ones of the current optimizer, in the
+        order of their timestamps (relative to the start of `other`).
+
+        Parameters:
+            other (:obj:`pfspwt.optimizer.BaseOptimizer`): Optimizer
+                of the same type, that ran on the same instance.
+        """
+        self.history.extend(other.history)
+        self._n_iterations = max(self._n_iterations, other._n_iterations)
+        if self.profiler is not None and other.profiler is not None:
+            self.profiler.merge(other.profiler)
+
+    def phase(self, name):
+        """Returns the context manager timing a phase of the optimization.
+
+        Parameters:
+            name (str): Name of the phase (see `Profiler.PHASES`).
+
+        Returns:
+            object: Context manager, which does nothing
+                if profiling is disabled.
+        """
+        if self.profiler is None:
+            return NULL_PHASE
+        return self.profiler.phase(name)
+
     def step(self):
         """Accounts for one ACO step.
 
@@ -108,12 +232,15 @@ class BaseOptimizer(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def _evaluate(self, instance, solution):
+    def _evaluate(self, instance, solution, objectives=None, workspace=None):
         """Wrapped method for the evaluation of a new solution.
 
         Parameters:
             instance (:obj:`pfspwt.Instance`): Instance of the PFSP-WT problem.
             solution (:obj:`np.ndarray`): Current scheduling solution.
+            objectives (tuple, optional): Weighted tardiness and makespan
+                of `solution`, if already computed.
+            workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
 
         Returns:
             float: Weighted tardiness of current solution.
@@ -125,6 +252,10 @@ class BaseOptimizer(metaclass=ABCMeta):
         """Retrieves the historical values of the objective function(s).
 
         Returns:
-            :obj:`np.ndarray`: Historical values of the objective(s).
+            :obj:`np.ndarray`: Historical values of the objective(s),
+                of shape (n_records,) for a single objective function.
         """
-        return np.squeeze(np.asarray([list(x) for x in self._objective]))
+        objectives = self.history.objectives
+        if self.N_OBJECTIVES == 1:
+            objectives = objectives[:, 0]
+        return objectives
@@ -22,17 +22,22 @@ class BiObjectiveOptimizer(BaseOptimizer):
             by its weighted tardiness, makespan and solution.
     """
 
+    N_OBJECTIVES = 2
+
     def __init__(self, *args, **kwargs):
         BaseOptimizer.__init__(self, *args, **kwargs)
         self.pareto_set = dict()
 
-    def _evaluate(self, instance, new_sol):
+    def _evaluate(self, instance, new_sol, objectives=None, workspace=None):
         """Evaluates a new solution.
 
         Parameters:
             instance (:obj:`pfsp.Instance`): Instance of the PFSP-WT problem.
             new_sol (:obj:`np.ndarray`): Array of shape (n,) representing
                 a scheduling / current solution.
+            objectives (tuple, optional): Weighted tardiness and makespan
+                of `new_sol`, if already computed.
+            workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
 
         Returns:
             float: Tuple where first element is the weighted tardiness
@@ -41,11 +46,31 @@ class BiObjectiveOptimizer(BaseOptimizer):
                 current best solution.
         """
 
-        # Compute metrics
-        new_wt = weighted_tardiness(instance, new_sol)
-        new_m = makespan(instance, new_sol, refresh=False)
+        # Compute metrics, unless both of them are known
+        if objectives is None or len(objectives) < 2:
+            new_wt = weighted_tardiness(
+                    instance, new_sol, workspace=workspace)
+            new_m = makespan(
+                    instance, new_sol, refresh=False, workspace=workspace)
+        else:
+            new_wt, new_m = objectives
+
+        is_improvement = self._update_pareto_set(new_wt, new_m, new_sol)
+        return (new_wt, new_m), is_improvement
+
+    def _update_pareto_set(self, new_wt, new_m, new_sol):
+        """Adds a solution to the Pareto set if it is not dominated.
 
-        # Update Pareto set with new solution
+        Parameters:
+            new_wt (float): Weighted tardiness of the solution.
+            new_m (int): Makespan of the solution.
+            new_sol (:obj:`np.ndarray`): Array of shape (n,)
+                representing the solution.
+
+        Returns:
+            bool: Whether `new_sol` dominates one of the
+                solutions of the Pareto set.
+        """
         new_pareto_set = dict()
         new_sol_is_dominated = False
         is_improvement = False
@@ -61,7 +86,18 @@ class BiObjectiveOptimizer(BaseOptimizer):
             # Add new solution to Pareto set (since not dominated)
             new_pareto_set[(new_wt, new_m)] = new_sol
             self.pareto_set = new_pareto_set
-        return (new_wt, new_m), is_improvement
+        return is_improvement
+
+    def merge(self, other):
+        """Merges the results of another optimizer into this one.
+
+        Parameters:
+            other (:obj:`pfspwt.optimizer.BiObjectiveOptimizer`):
+                Optimizer that ran on the same instance.
+        """
+        BaseOptimizer.merge(self, other)
+        for (wt, m), sol in other.pareto_set.items():
+            self._update_pareto_set(wt, m, sol)
 
     def dominates(self, a, b):
         """Checks whether a candidate is strictly better
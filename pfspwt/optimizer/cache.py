@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# cache.py: Cache of objective values
+# author : Antoine Passemiers
+
+from collections import OrderedDict
+import numpy as np
+import numba
+
+
+@numba.jit('u8(i4[:], u8[:], u8[:])', nopython=True, nogil=True, cache=True)
+def zobrist_hash(solution, job_keys, position_keys):
+    """Computes the Zobrist hash of a solution.
+
+    The key of job i in position k is obtained by mixing
+    `job_keys[i]` and `position_keys[k]` with the SplitMix64
+    finalizer, which avoids storing a table of shape (n, n).
+    The hash is the exclusive or of the keys of all the
+    (job, position) pairs of the solution.
+
+    Parameters:
+        solution (:obj:`np.ndarray`): Array of shape (n,)
+            representing the solution.
+        job_keys (:obj:`np.ndarray`): Random keys of the jobs.
+        position_keys (:obj:`np.ndarray`): Random keys of the positions.
+
+    Returns:
+        int: 64-bit hash of the solution.
+    """
+    h = np.uint64(0)
+    for k in range(solution.shape[0]):
+        x = job_keys[solution[k]] + position_keys[k]
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+        h ^= x ^ (x >> np.uint64(31))
+    return h
+
+
+class EvaluationCache:
+    """Bounded cache of objective values, with least recently
+    used eviction.
+
+    Solutions are identified by their Zobrist hash. The solution
+    itself is stored along with its objective values, so that hash
+    collisions are detected and treated as misses.
+
+    Attributes:
+        max_size (int): Maximum number of cached solutions.
+        hits (int): Number of lookups that found the solution.
+        misses (int): Number of lookups that did not.
+        _entries (:obj:`collections.OrderedDict`): Cached solutions and
+            objective values, from least to most recently used.
+        _job_keys (:obj:`np.ndarray`): Random keys of the jobs.
+        _position_keys (:obj:`np.ndarray`): Random keys of the positions.
+        _seed (int): Seed used for drawing the random keys.
+    """
+
+    def __init__(self, max_size=100000, seed=0):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._job_keys = None
+        self._position_keys = None
+        self._seed = seed
+
+    def key(self, solution):
+        """Computes the key of a solution.
+
+        Parameters:
+            solution (:obj:`np.ndarray`): Array of shape (n,)
+                representing the solution.
+
+        Returns:
+            int: 64-bit hash of the solution.
+        """
+        n = len(solution)
+        if self._job_keys is None or len(self._job_keys) != n:
+            rng = np.random.RandomState(self._seed)
+            keys = rng.randint(0, 2 ** 32, size=(2, n, 2)).astype(np.uint64)
+            keys = (keys[..., 0] << np.uint64(32)) | keys[..., 1]
+            self._job_keys, self._position_keys = keys[0], keys[1]
+        solution = np.asarray(solution, dtype=np.int32)
+        return zobrist_hash(solution, self._job_keys, self._position_keys)
+
+    def get(self, solution, key=None):
+        """Looks up the objective values of a solution.
+
+        Parameters:
+            solution (:obj:`np.ndarray`): Array of shape (n,)
+                representing the solution.
+            key (int, optional): Key of the solution, if
+                already computed.
+
+        Returns:
+            tuple: Cached objective values, or None if the
+                solution is not in the cache.
+        """
+        if key is None:
+            key = self.key(solution)
+        entry = self._entries.get(key)
+        if entry is not None and np.array_equal(entry[0], solution):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, solution, objectives, key=None):
+        """Stores the objective values of a solution.
+
+        The least recently used solution is evicted if the
+        cache is full. If the solution is already cached, it is
+        only marked as the most recently used one.
+
+        Parameters:
+            solution (:obj:`np.ndarray`): Array of shape (n,)
+                representing the solution.
+            objectives (tuple): Objective values of the solution.
+            key (int, optional): Key of the solution, if
+                already computed.
+        """
+        if key is None:
+            key = self.key(solution)
+        entry = self._entries.get(key)
+        if entry is None or not np.array_equal(entry[0], solution):
+            self._entries[key] = (
+                    np.array(solution, dtype=np.int32), objectives)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes all solutions from the cache and resets counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        """Returns the fraction of lookups that found the solution.
+
+        Returns:
+            float: Hit rate, or 0 if there has been no lookup.
+        """
+        n_lookups = self.hits + self.misses
+        return self.hits / float(n_lookups) if n_lookups > 0 else 0.
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # Cached solutions are not sent to other processes,
+        # only the settings and the counters
+        state = dict(self.__dict__)
+        state['_entries'] = OrderedDict()
+        return state
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# history.py: History of the objective values of an optimizer
+# author : Antoine Passemiers
+
+import time
+import numpy as np
+
+
+class History:
+    """Values of the objective function(s) of the evaluated solutions,
+    along with the times at which they have been evaluated.
+
+    Records are stored in a preallocated array, whose capacity is
+    doubled when it is full. Depending on `mode`, all the records
+    are kept ("all"), only the ones that improve on the best solution,
+    or that dominate a Pareto-optimal solution ("improvements"), or
+    a subsample of at most `max_size` records ("downsample").
+    In the latter case, every `stride`-th evaluation
+    is recorded: when the array is full, every other record is
+    dropped and the stride is doubled, hence records remain evenly
+    spread over the whole run and memory is bounded. The latest
+    evaluation is also recorded, until the next one replaces it.
+
+    Attributes:
+        MODES (tuple): Available modes.
+        n_objectives (int): Number of objective functions.
+        mode (str): Which records are kept.
+        max_size (int): Maximum number of records, in "downsample" mode.
+        size (int): Number of records.
+        stride (int): Number of evaluations per record,
+            in "downsample" mode.
+        n_evaluations (int): Number of evaluations accounted for,
+            recorded or not.
+        _data (:obj:`np.ndarray`): Array of shape (capacity,
+            n_objectives + 1), where the first `size` rows are the
+            records. The last column contains the number of seconds
+            elapsed between the start of the optimizer and the
+            evaluation.
+        _t0 (float): Time at which the optimizer has started.
+        _tail (bool): Whether the last record is only kept because
+            it is the latest evaluation, in "downsample" mode.
+    """
+
+    MODES = ('all', 'improvements', 'downsample')
+
+    def __init__(self, n_objectives, mode='all', max_size=10000,
+                 capacity=1024):
+        assert(mode in History.MODES)
+        self.n_objectives = n_objectives
+        self.mode = mode
+        self.max_size = max(2, max_size)
+        if mode == 'downsample':
+            capacity = min(capacity, self.max_size)
+        self._data = np.empty((capacity, n_objectives + 1), dtype=np.float64)
+        self.clear()
+
+    def clear(self):
+        """Removes all the records and restarts the clock."""
+        self.size = 0
+        self.stride = 1
+        self.n_evaluations = 0
+        self._tail = False
+        self._t0 = time.perf_counter()
+
+    def append(self, objectives, is_improvement=True):
+        """Accounts for the evaluation of a solution.
+
+        Parameters:
+            objectives (tuple): Objective value(s) of the solution.
+            is_improvement (bool): Whether the solution improves
+                on the best solution(s) found so far.
+        """
+        self.n_evaluations += 1
+        if self.mode == 'improvements':
+            if not is_improvement and self.size > 0:
+                return
+        elif self.mode == 'downsample':
+            if self._tail:
+                self.size -= 1
+            if self.size >= self.max_size:
+                self._halve()
+            self._tail = (self.n_evaluations - 1) % self.stride != 0
+        self._reserve(1)
+        self._data[self.size, :-1] = objectives
+        self._data[self.size, -1] = time.perf_counter() - self._t0
+        self.size += 1
+
+    def extend(self, other):
+        """Merges the records of another history.
+
+        Records of both histories are sorted by timestamp.
+
+        Parameters:
+            other (:obj:`pfspwt.optimizer.History`): History with
+                the same number of objectives. Its timestamps are
+                kept as is.
+        """
+        self._reserve(other.size)
+        self._data[self.size:self.size+other.size] = other.asarray()
+        self.size += other.size
+        self.n_evaluations += other.n_evaluations
+        order = np.argsort(self._data[:self.size, -1], kind='mergesort')
+        self._data[:self.size] = self._data[order]
+        self._tail = False
+        if self.mode == 'downsample':
+            while self.size > self.max_size:
+                self._halve()
+
+    def asarray(self):
+        """Returns the records.
+
+        Returns:
+            :obj:`np.ndarray`: View on the array of shape
+                (size, n_objectives + 1) containing the records,
+                the last column being the timestamps.
+        """
+        return self._data[:self.size]
+
+    @property
+    def objectives(self):
+        """Returns the recorded objective values.
+
+        Returns:
+            :obj:`np.ndarray`: Array of shape (size, n_objectives).
+        """
+        return self._data[:self.size, :-1].copy()
+
+    @property
+    def timestamps(self):
+        """Returns the recorded evaluation times.
+
+        Returns:
+            :obj:`np.ndarray`: Array of shape (size,) containing
+                the number of seconds elapsed since the start
+                of the optimizer, for each record.
+        """
+        return self._data[:self.size, -1].copy()
+
+    def _halve(self):
+        """Drops every other record and doubles the stride."""
+        half = (self.size + 1) // 2
+        self._data[:half] = self._data[:self.size:2]
+        self.size = half
+        self.stride *= 2
+
+    def _reserve(self, n_records):
+        """Doubles the capacity of the array as many times as
+        needed for storing new records.
+
+        Parameters:
+            n_records (int): Number of new records.
+        """
+        capacity = len(self._data)
+        if self.size + n_records > capacity:
+            while self.size + n_records > capacity:
+                capacity *= 2
+            data = np.empty((capacity, self._data.shape[1]), dtype=np.float64)
+            data[:self.size] = self._data[:self.size]
+            self._data = data
+
+    def __len__(self):
+        return self.size
@@ -26,13 +26,16 @@ class Optimizer(BaseOptimizer):
         self.best = None
         self.Zbest = np.inf
 
-    def _evaluate(self, instance, solution):
+    def _evaluate(self, instance, solution, objectives=None, workspace=None):
         """Evaluates a new solution.
 
         Parameters:
             instance (:obj:`pfsp.Instance`): Instance of the PFSP-WT problem.
             new_sol (:obj:`np.ndarray`): Array of shape (n,) representing
                 a scheduling / current solution.
+            objectives (tuple, optional): Weighted tardiness and makespan
+                of `solution`, if already computed.
+            workspace (:obj:`pfspwt.workspace.Workspace`): Scratch buffers.
 
         Returns:
             float: Tuple of size 1 where the only element is the
@@ -40,7 +43,11 @@ class Optimizer(BaseOptimizer):
             bool: Whether `solution` is an improvement with regards
                 current best solution.
         """
-        wt = weighted_tardiness(instance, solution, refresh=True)
+        if objectives is None:
+            wt = weighted_tardiness(
+                    instance, solution, refresh=True, workspace=workspace)
+        else:
+            wt = objectives[0]
         is_improvement = False
         if wt < self.Zbest:
             self.Zbest = wt
@@ -48,6 +55,18 @@ class Optimizer(BaseOptimizer):
             is_improvement = True
         return (wt,), is_improvement
 
+    def merge(self, other):
+        """Merges the results of another optimizer into this one.
+
+        Parameters:
+            other (:obj:`pfspwt.optimizer.Optimizer`): Optimizer
+                that ran on the same instance.
+        """
+        BaseOptimizer.merge(self, other)
+        if other.Zbest < self.Zbest:
+            self.Zbest = other.Zbest
+            self.best = other.best
+
     def solutions(self):
         """Returns the set of Pareto-optimal solutions.
 
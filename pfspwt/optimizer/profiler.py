@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# profiler.py: Time spent in each phase of the optimization
+# author : Antoine Passemiers
+
+from pfspwt.objective import count_kernel_calls
+
+import time
+
+
+class Phase:
+    """Context manager accumulating the wall time of a phase.
+
+    Attributes:
+        name (str): Name of the phase.
+        seconds (float): Total time spent in the phase.
+        calls (int): Number of times the phase has been entered.
+        _t0 (float): Time at which the phase has been entered.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.
+        self.calls = 0
+        self._t0 = 0.
+
+    def add(self, seconds, calls=1):
+        """Accounts for time spent in the phase outside of
+        the context manager (e.g. in another thread).
+
+        Parameters:
+            seconds (float): Time spent in the phase.
+            calls (int): Number of times the phase has been run.
+        """
+        self.seconds += seconds
+        self.calls += calls
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.seconds += time.perf_counter() - self._t0
+        self.calls += 1
+
+
+class NullPhase:
+    """Context manager that does nothing, used when profiling
+    is disabled."""
+
+    def add(self, seconds, calls=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+NULL_PHASE = NullPhase()
+
+
+class Profiler:
+    """Wall time and number of calls of each phase of an ACO run,
+    and number of calls to the evaluation kernels.
+
+    Phases are timed with context managers, which are not reentrant:
+    a phase must not be nested in itself, and threads must account for
+    their own time with `Phase.add`. Kernel calls are only counted when
+    they are made from Python (see `pfspwt.objective.count_kernel_calls`),
+    and not when a compiled kernel calls another one: completion times
+    computed during local search are accounted for by the calls to
+    "local_search". Colonies are thus profiled one phase at a time,
+    without compiled iterations (see `pfspwt.aco.ACO.step`).
+
+    Attributes:
+        PHASES (tuple): Names of the phases, in the order in which
+            they are reported.
+        phases (dict): Phases (:obj:`Phase`), by name.
+        kernel_calls (dict): Number of calls, by kernel name.
+    """
+
+    PHASES = ('neh', 'construction', 'local_search', 'evaluation',
+              'pheromone_update', 'parameter_update')
+
+    def __init__(self):
+        self.phases = {name: Phase(name) for name in self.PHASES}
+        self.kernel_calls = dict()
+
+    def start(self):
+        """Resets the counters and starts counting kernel calls."""
+        for phase in self.phases.values():
+            phase.seconds, phase.calls = 0., 0
+        self.kernel_calls.clear()
+        count_kernel_calls(self.kernel_calls)
+
+    def stop(self):
+        """Stops counting kernel calls."""
+        count_kernel_calls(None)
+
+    def phase(self, name):
+        """Returns the context manager timing a phase.
+
+        Parameters:
+            name (str): Name of the phase, in `PHASES`.
+
+        Returns:
+            :obj:`Phase`: Phase.
+        """
+        return self.phases[name]
+
+    def merge(self, other):
+        """Adds the counters of another profiler to this one.
+
+        Parameters:
+            other (:obj:`pfspwt.optimizer.Profiler`): Profiler.
+        """
+        for name, phase in other.phases.items():
+            self.phases[name].add(phase.seconds, phase.calls)
+        for name, calls in other.kernel_calls.items():
+            self.kernel_calls[name] = self.kernel_calls.get(name, 0) + calls
+
+    def report(self):
+        """Formats the counters as a table.
+
+        Returns:
+            str: One line per phase that has been run, with its total
+                time, its share of the total time of the phases and
+                its number of calls, followed by one line per kernel.
+        """
+        total = sum(phase.seconds for phase in self.phases.values())
+        lines = ['%-18s %10s %7s %10s' % ('phase', 'seconds', '%', 'calls')]
+        for name in self.PHASES:
+            phase = self.phases[name]
+            if phase.calls > 0:
+                lines.append('%-18s %10.3f %6.1f%% %10d' % (
+                        name, phase.seconds,
+                        100. * phase.seconds / max(total, 1e-12),
+                        phase.calls))
+        for name in sorted(self.kernel_calls):
+            lines.append('%-18s %10s %7s %10d' % (
+                    name, '', '', self.kernel_calls[name]))
+        return '\n'.join(lines)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# rng.py: Random number streams usable inside Numba kernels
+# author : Antoine Passemiers
+
+import numba
+import numpy as np
+
+
+# Increment of the SplitMix64 generator (odd 64-bit golden ratio)
+GAMMA = np.uint64(0x9e3779b97f4a7c15)
+
+
+@numba.jit('u8(u8[:], i4)', nopython=True, nogil=True, cache=True)
+def _next_uint64(states, s):
+    """Draws a 64-bit integer from a SplitMix64 stream.
+
+    Parameters:
+        states (:obj:`np.ndarray`): States of the streams.
+        s (int): Index of the stream, whose state is updated inplace.
+
+    Returns:
+        int: Random 64-bit integer.
+    """
+    states[s] += GAMMA
+    z = states[s]
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return z ^ (z >> np.uint64(31))
+
+
+@numba.jit('f8(u8[:], i4)', nopython=True, nogil=True, cache=True)
+def _next_uniform(states, s):
+    """Draws a random number uniformly in [0, 1) from a stream.
+
+    Parameters:
+        states (:obj:`np.ndarray`): States of the streams.
+        s (int): Index of the stream, whose state is updated inplace.
+
+    Returns:
+        float: Random number with 53 random bits.
+    """
+    # The 53 most significant bits make the mantissa of the number
+    return (_next_uint64(states, s) >> np.uint64(11)) * (2. ** -53)
+
+
+@numba.jit('void(u8[:], i4, f8[:])', nopython=True, nogil=True, cache=True)
+def _fill_uniform(states, s, out):
+    """Draws random numbers uniformly in [0, 1) from a stream.
+
+    Parameters:
+        states (:obj:`np.ndarray`): States of the streams.
+        s (int): Index of the stream, whose state is updated inplace.
+        out (:obj:`np.ndarray`): Array where random numbers
+            will be stored.
+    """
+    for k in range(out.shape[0]):
+        out[k] = _next_uniform(states, s)
+
+
+@numba.jit('void(u8[:], u8[:])', nopython=True, nogil=True, cache=True)
+def _spawn(state, states):
+    """Seeds new streams from a parent stream.
+
+    Parameters:
+        state (:obj:`np.ndarray`): Array of shape (1,) containing
+            the state of the parent stream, updated inplace.
+        states (:obj:`np.ndarray`): Array where the states of the
+            new streams will be stored.
+    """
+    for s in range(states.shape[0]):
+        states[s] = _next_uint64(state, 0)
+
+
+class RandomStreams:
+    """Seedable generator of independent random number streams.
+
+    Each stream is a SplitMix64 generator, whose state is a single
+    64-bit integer. States are stored in NumPy arrays, so that they
+    can be passed to compiled kernels and used there with
+    `_next_uniform` (one number at a time) or `_fill_uniform`
+    (a whole block at once). New streams are seeded by the
+    parent stream of the generator, hence the streams only
+    depend on the seed and on the order in which they are spawned,
+    and not on the order in which they are consumed.
+
+    Attributes:
+        seed (int): Seed of the generator.
+        state (:obj:`np.ndarray`): Array of shape (1,) containing
+            the state of the parent stream.
+    """
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        self.state = np.asarray([seed], dtype=np.uint64)
+
+    def spawn(self, n_streams):
+        """Creates new independent streams.
+
+        Parameters:
+            n_streams (int): Number of streams.
+
+        Returns:
+            :obj:`np.ndarray`: Array of shape (n_streams,)
+                containing the states of the new streams.
+        """
+        states = np.empty(n_streams, dtype=np.uint64)
+        _spawn(self.state, states)
+        return states
+
+    def uniform(self, states, size):
+        """Draws random numbers in bulk from several streams.
+
+        Parameters:
+            states (:obj:`np.ndarray`): States of the streams,
+                updated inplace.
+            size (int): Number of random numbers per stream.
+
+        Returns:
+            :obj:`np.ndarray`: Array of shape (len(states), size),
+                where row s contains the numbers drawn from stream s,
+                uniformly in [0, 1).
+        """
+        u = np.empty((len(states), size), dtype=np.float64)
+        for s in range(len(states)):
+            _fill_uniform(states, s, u[s])
+        return u
+
+    def random_sample(self, size):
+        """Draws random numbers from a new stream.
+
+        Parameters:
+            size (int): Number of random numbers.
+
+        Returns:
+            :obj:`np.ndarray`: Array of shape (size,) of random
+                numbers drawn uniformly in [0, 1).
+        """
+        return self.uniform(self.spawn(1), size)[0]
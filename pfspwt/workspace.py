@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# workspace.py: Scratch buffers for evaluation kernels
+# author : Antoine Passemiers
+
+import numpy as np
+
+
+class Workspace:
+    """Scratch buffers used by the evaluation kernels.
+
+    Every kernel writes its intermediate results in a workspace.
+    Two threads can evaluate solutions of the same instance
+    simultaneously as long as they use distinct workspaces.
+
+    Attributes:
+        c (:obj:`np.ndarray`): Buffer for storing computation
+            times, represented as a matrix of shape (N, M).
+        p (:obj:`np.ndarray`): Buffer of shape (N, M) for storing
+            processing times ordered according to a solution.
+        row (:obj:`np.ndarray`): Buffer of shape (M,) for storing
+            the completion times of a single job.
+        z (:obj:`np.ndarray`): Buffer of shape (N,) for storing
+            cumulative weighted tardiness along a solution.
+    """
+
+    def __init__(self, n, m):
+        self.c = np.empty((n, m), dtype=np.int32)
+        self.p = np.empty((n, m), dtype=np.int32)
+        self.row = np.empty(m, dtype=np.int32)
+        self.z = np.empty(n, dtype=np.float64)
@@ -2,9 +2,10 @@
 # run.py: Entry point of pfspwt
 # author : Antoine Passemiers
 
-from pfspwt.aco import MMAS, MMMAS, PACO
+from pfspwt.aco import COLONIES, IslandModel
 from pfspwt.io import PFSPWTIO
-from pfspwt.optimizer import Optimizer, BiObjectiveOptimizer
+from pfspwt.neighbourhood import LOCAL_SEARCHES
+from pfspwt.optimizer import Optimizer, BiObjectiveOptimizer, History
 
 import argparse
 import os
@@ -12,6 +13,27 @@ import sys
 import numpy as np
 
 
+def per_island(cast, choices=None):
+    """Creates a parser of comma-separated values, one per island.
+
+    Parameters:
+        cast (type): Type of the values.
+        choices (list, optional): Allowed values.
+
+    Returns:
+        function: Parser returning a list of values.
+    """
+
+    def parse(text):
+        values = [cast(value.strip()) for value in text.split(',')]
+        for value in values:
+            if choices is not None and value not in choices:
+                raise argparse.ArgumentTypeError(
+                        'invalid choice: %r' % value)
+        return values
+    return parse
+
+
 def parse_arguments():
     """Parses command line arguments.
 
@@ -35,21 +57,71 @@ def parse_arguments():
     parser.add_argument(
             '--n-ants',
             default=None,
-            type=int,
+            type=per_island(int),
             required=False,
-            help='Number of ants in the colony')
+            help='Number of ants in the colony, or comma-separated '
+                 'numbers of ants of each island')
     parser.add_argument(
             '--local-search',
-            choices=['none', 'swap', 'interchange', 'insertion'],
-            default='none',
-            type=str,
-            help='Local search method')
+            default=['none'],
+            type=per_island(str, choices=list(LOCAL_SEARCHES)),
+            help='Local search method, or comma-separated methods '
+                 'of each island, among: %s' % ', '.join(LOCAL_SEARCHES))
     parser.add_argument(
             '--rho',
             default=None,
-            type=float,
+            type=per_island(float),
+            required=False,
+            help='Persistence of pheromone trails, or comma-separated '
+                 'persistences of each island')
+    parser.add_argument(
+            '--band',
+            default=None,
+            type=int,
+            required=False,
+            help='Number of positions in the band of pheromone trails '
+                 'of each job (PACO only, all positions by default)')
+    parser.add_argument(
+            '--n-jobs',
+            default=1,
+            type=int,
+            required=False,
+            help='Number of threads used for building the ants')
+    parser.add_argument(
+            '--islands',
+            default=1,
+            type=int,
             required=False,
-            help='Persistence of pheromone trails')
+            help='Number of colonies, each one running in its own process')
+    parser.add_argument(
+            '--migration-interval',
+            default=10,
+            type=int,
+            required=False,
+            help='Number of iterations between migrations of best ants')
+    parser.add_argument(
+            '--cache-size',
+            default=0,
+            type=int,
+            required=False,
+            help='Maximum number of cached evaluations (0 to disable)')
+    parser.add_argument(
+            '--history',
+            choices=list(History.MODES),
+            default='all',
+            type=str,
+            help='Objective values kept in the history: all of them, '
+                 'only improvements, or a bounded subsample')
+    parser.add_argument(
+            '--history-size',
+            default=10000,
+            type=int,
+            required=False,
+            help='Maximum size of the history, in "downsample" mode')
+    parser.add_argument(
+            '--profile',
+            action='store_true',
+            help='Report the time spent in each phase of the algorithm')
     parser.add_argument(
             '--seed',
             default=None,
@@ -91,34 +163,79 @@ if __name__ == '__main__':
     # Load instance from text file
     instance = PFSPWTIO.read(args.path)
 
-    # Initialize optimizer with given resources
-    optimizer = Optimizer(
-            n_iterations=args.iterations,
-            early_stopping=args.early_stopping,
-            max_time=args.time,
-            seed=args.seed)
-
-    # Create ACO
-    kwargs = { 'ls': args.local_search }
-    if args.method == 'MMAS':
-        kwargs['n_ants'] = 22 if args.n_ants is None else args.n_ants
-        kwargs['rho'] = 0.23 if args.rho is None else args.rho
-        aco = MMAS(optimizer, **kwargs)
-    elif args.method == 'M-MMAS':
-        kwargs['n_ants'] = 34 if args.n_ants is None else args.n_ants
-        kwargs['rho'] = 0.3 if args.rho is None else args.rho
-        aco = MMMAS(optimizer, **kwargs)
+    # Hyper-parameters of the colonies. Each one is given either
+    # for all the islands or for each island.
+    defaults = {
+        'MMAS': { 'n_ants': 22, 'rho': 0.23 },
+        'M-MMAS': { 'n_ants': 34, 'rho': 0.3 },
+        'PACO': { 'n_ants': 50, 'rho': 0.4 }
+    }[args.method]
+    values = {
+        'ls': args.local_search,
+        'n_ants': args.n_ants or [defaults['n_ants']],
+        'rho': args.rho or [defaults['rho']]
+    }
+    for name, value in values.items():
+        if len(value) not in (1, args.islands):
+            print('Expected 1 or %d values of %s, got %d.' % (
+                  args.islands, name, len(value)))
+            sys.exit(1)
+    islands = list()
+    for k in range(args.islands):
+        kwargs = { name: value[k % len(value)]
+                   for name, value in values.items() }
+        kwargs['n_jobs'] = args.n_jobs
+        if args.method == 'PACO':
+            kwargs['band'] = args.band
+        islands.append(kwargs)
+    kwargs = islands[0]
+
+    if args.islands > 1:
+
+        # Run one colony per process and merge their results
+        for config in islands:
+            config['method'] = args.method
+        model = IslandModel(
+                islands,
+                migration_interval=args.migration_interval,
+                n_iterations=args.iterations,
+                early_stopping=args.early_stopping,
+                max_time=args.time,
+                seed=args.seed,
+                cache_size=args.cache_size,
+                profile=args.profile,
+                history=args.history,
+                history_size=args.history_size)
+        optimizer = model.run(instance)
     else:
-        kwargs['n_ants'] = 50 if args.n_ants is None else args.n_ants
-        kwargs['rho'] = 0.4 if args.rho is None else args.rho
-        aco = PACO(optimizer, **kwargs)
-
-    # Use ACO for optimization
-    aco.initialize(instance)
-    k = 0
-    while optimizer.is_running():
-        aco.step()
-        k += 1
+
+        # Initialize optimizer with given resources
+        optimizer = Optimizer(
+                n_iterations=args.iterations,
+                early_stopping=args.early_stopping,
+                max_time=args.time,
+                seed=args.seed,
+                cache_size=args.cache_size,
+                profile=args.profile,
+                history=args.history,
+                history_size=args.history_size)
+
+        # Create ACO
+        aco = COLONIES[args.method](optimizer, **kwargs)
+
+        # Use ACO for optimization
+        aco.initialize(instance)
+        k = 0
+        while optimizer.is_running():
+            aco.step()
+            optimizer.step()
+            k += 1
     objs = optimizer.objective
 
     print('Found solution: %s' % str(optimizer.solutions()[0]))
+
+    # Time spent in each phase, summed over the islands
+    if optimizer.profiler is not None:
+        optimizer.profiler.stop()
+        print('Time spent in each phase:')
+        print(optimizer.profiler.report())
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# test_cache.py: Tests of the cache of objective values
+# author : Antoine Passemiers
+
+from pfspwt.generator import generate_instance
+from pfspwt.objective import evaluate_batch
+from pfspwt.optimizer import EvaluationCache, Optimizer
+
+import pickle
+import numpy as np
+
+
+def permutations(n, n_solutions, seed=0):
+    state = np.random.RandomState(seed)
+    return [state.permutation(n).astype(np.int32) for _ in range(n_solutions)]
+
+
+def test_eviction_order():
+    cache = EvaluationCache(max_size=3)
+    a, b, c, d = permutations(10, 4)
+    cache.put(a, (1., 1))
+    cache.put(b, (2., 2))
+    cache.put(c, (3., 3))
+
+    # Looking up or storing a solution again marks it as recently used
+    assert cache.get(a) == (1., 1)
+    cache.put(b, (2., 2))
+    cache.put(d, (4., 4))
+    assert len(cache) == 3
+    assert cache.get(c) is None
+    assert cache.get(a) == (1., 1)
+    assert cache.get(b) == (2., 2)
+    assert cache.get(d) == (4., 4)
+
+    cache.put(c, (3., 3))
+    assert cache.get(a) is None
+
+
+def test_counters():
+    cache = EvaluationCache(max_size=10)
+    a, b = permutations(10, 2)
+    assert cache.hit_rate == 0.
+    assert cache.get(a) is None
+    cache.put(a, (1., 1))
+    assert cache.get(a) == (1., 1)
+    assert cache.get(a, key=cache.key(a)) == (1., 1)
+    assert cache.get(b) is None
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert cache.hit_rate == 0.5
+
+    # Storing does not count as a lookup
+    cache.put(b, (2., 2))
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_collision():
+    cache = EvaluationCache(max_size=10)
+    a, b = permutations(10, 2)
+    cache.put(a, (1., 1), key=0)
+    assert cache.get(b, key=0) is None
+    cache.put(b, (2., 2), key=0)
+    assert cache.get(b, key=0) == (2., 2)
+    assert len(cache) == 1
+
+
+def test_pickling():
+    cache = EvaluationCache(max_size=10, seed=3)
+    solutions = permutations(10, 4)
+    for k, solution in enumerate(solutions):
+        cache.put(solution, (float(k), k))
+    cache.get(solutions[0])
+    other = pickle.loads(pickle.dumps(cache))
+    assert len(other) == 0
+    assert other.max_size == 10
+    assert (other.hits, other.misses) == (1, 0)
+    assert all(other.key(solution) == cache.key(solution)
+               for solution in solutions)
+
+
+def test_optimizer_cache():
+    instance = generate_instance(10, 5, seed=1)
+    optimizer = Optimizer(cache_size=100)
+    optimizer.start()
+    solutions = permutations(10, 4)
+    wt, ms = evaluate_batch(instance, solutions, with_makespan=True)
+
+    # Solutions whose objective values are given bypass the cache
+    optimizer.evaluate(instance, solutions[0], objectives=(wt[0], ms[0]))
+    optimizer.evaluate_batch(
+            instance, solutions[1:3],
+            objectives=[(wt[1], ms[1]), None])
+    assert len(optimizer.cache) == 1
+    assert (optimizer.cache.hits, optimizer.cache.misses) == (0, 1)
+
+    scores = optimizer.evaluate_batch(instance, solutions)
+    assert np.allclose(scores, wt)
+    assert len(optimizer.cache) == 4
+    assert (optimizer.cache.hits, optimizer.cache.misses) == (1, 4)
+    assert optimizer.evaluate(instance, solutions[0]) == wt[0]
+    assert optimizer.cache.hits == 2
+    assert len(optimizer.history) == 8
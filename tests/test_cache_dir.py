@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# test_cache_dir.py: Tests of the cache of compiled kernels
+# author : Antoine Passemiers
+
+from pfspwt import _CACHE_DIR, _PackageCacheLocator, _prune_cache
+from pfspwt import generator
+
+import os
+import numba
+
+
+def test_global_settings():
+    if not os.environ.get('NUMBA_CACHE_DIR'):
+        assert not numba.config.CACHE_DIR
+
+    # Only the kernels of the package are cached in its directory
+    assert _PackageCacheLocator.from_function(
+            test_global_settings, __file__) is None
+    locator = _PackageCacheLocator.from_function(
+            generator.lower_bound.py_func, generator.__file__)
+    assert locator.get_cache_path() == _CACHE_DIR
+
+
+def test_prune(tmpdir):
+    root = str(tmpdir)
+    for name in ['numba-0123456789abcdef', 'numba-other', 'other']:
+        os.makedirs(os.path.join(root, name))
+    cache_dir = os.path.join(root, 'numba-%s' % ('f' * 16))
+    _prune_cache(cache_dir)
+    assert sorted(os.listdir(root)) == sorted(
+            ['numba-other', 'other', os.path.basename(cache_dir)])
+
+    # Existing caches are left as is
+    os.makedirs(os.path.join(root, 'numba-0123456789abcdef'))
+    _prune_cache(cache_dir)
+    assert len(os.listdir(root)) == 4
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# test_generator.py: Tests of the generator of synthetic instances
+# author : Antoine Passemiers
+
+from pfspwt.generator import generate_files, generate_instance, lower_bound
+from pfspwt.io import PFSPWTIO
+from pfspwt.objective import evaluate_batch
+
+import itertools
+import numpy as np
+import pytest
+
+
+# Processing times of Taillard's instance ta001 (machines x jobs),
+# whose time seed is 873654221 and whose lower bound is 1232
+TA001 = np.asarray([
+    [54, 83, 15, 71, 77, 36, 53, 38, 27, 87,
+     76, 91, 14, 29, 12, 77, 32, 87, 68, 94],
+    [79, 3, 11, 99, 56, 70, 99, 60, 5, 56,
+     3, 61, 73, 75, 47, 14, 21, 86, 5, 77],
+    [16, 89, 49, 15, 89, 45, 60, 23, 57, 64,
+     7, 1, 63, 41, 63, 47, 26, 75, 77, 40],
+    [66, 58, 31, 68, 78, 91, 13, 59, 49, 85,
+     85, 9, 39, 41, 56, 40, 54, 77, 51, 31],
+    [58, 56, 20, 85, 53, 35, 53, 41, 69, 13,
+     86, 72, 8, 49, 47, 87, 58, 18, 68, 28]])
+
+
+def test_taillard():
+    instance = generate_instance(20, 5, seed=873654221)
+    assert np.array_equal(instance.p, TA001.T)
+    assert lower_bound(instance.p) == 1232
+
+
+@pytest.mark.parametrize('seed', range(1, 6))
+def test_lower_bound(seed):
+    instance = generate_instance(6, 4, seed=seed)
+    solutions = [np.asarray(solution, dtype=np.int32)
+                 for solution in itertools.permutations(range(6))]
+    _, ms = evaluate_batch(instance, solutions, with_makespan=True)
+    bound = lower_bound(instance.p)
+    assert bound <= ms.min()
+
+    # Bound is tight on a single machine
+    p = instance.p[:, :1].copy()
+    assert lower_bound(p) == p.sum()
+
+
+@pytest.mark.parametrize('tardiness,spread', [(0.2, 0.2), (0.4, 0.6)])
+def test_due_dates(tardiness, spread):
+    instance = generate_instance(
+            50, 10, seed=3, tardiness=tardiness, spread=spread)
+    bound = lower_bound(instance.p)
+    assert np.all(instance.p >= 1) and np.all(instance.p <= 99)
+    assert np.all(instance.d >= int(bound * (1. - tardiness - spread / 2.)))
+    assert np.all(instance.d <= int(bound * (1. - tardiness + spread / 2.)))
+    assert np.all(instance.w >= 1) and np.all(instance.w <= 10)
+
+
+def test_seed():
+    with pytest.raises(ValueError):
+        generate_instance(10, 5, seed=0)
+    a, b = generate_instance(10, 5, seed=2), generate_instance(10, 5, seed=2)
+    assert np.array_equal(a.p, b.p) and np.array_equal(a.d, b.d)
+
+
+def test_generate_files(tmpdir):
+    filepaths = generate_files(str(tmpdir), [(8, 3)], n_instances=2, seed=5)
+    assert len(filepaths) == 2
+    for k, filepath in enumerate(filepaths):
+        instance = PFSPWTIO.read(filepath)
+        expected = generate_instance(8, 3, seed=5+k)
+        assert np.array_equal(instance.p, expected.p)
+        assert np.array_equal(instance.d, expected.d)
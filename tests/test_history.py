@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# test_history.py: Tests of the history of objective values
+# author : Antoine Passemiers
+
+from pfspwt.optimizer import History
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('max_size', [2, 3, 10, 64])
+@pytest.mark.parametrize('n_evaluations', [1, 2, 9, 10, 11, 100, 1000])
+def test_downsample(max_size, n_evaluations):
+    history = History(1, mode='downsample', max_size=max_size, capacity=4)
+    strides = [history.stride]
+    for k in range(n_evaluations):
+        history.append((k,), is_improvement=False)
+        assert len(history) <= max_size
+        if history.stride != strides[-1]:
+            strides.append(history.stride)
+    values = history.objectives[:, 0]
+
+    # Stride doubles each time the history is full
+    assert strides == [2 ** k for k in range(len(strides))]
+    assert history.n_evaluations == n_evaluations
+
+    # First and last evaluations are recorded, along with
+    # every stride-th evaluation in between
+    assert values[0] == 0
+    assert values[-1] == n_evaluations - 1
+    assert np.all(values[:-1] % history.stride == 0)
+    assert np.all(np.diff(values[:-1]) == history.stride)
+    assert np.all(np.diff(history.timestamps) >= 0)
+
+
+def test_all():
+    history = History(2, capacity=2)
+    for k in range(100):
+        history.append((k, -k), is_improvement=(k % 3 == 0))
+    assert len(history) == 100
+    assert np.array_equal(history.objectives[:, 0], np.arange(100))
+    assert np.array_equal(history.objectives[:, 1], -np.arange(100))
+
+
+def test_improvements():
+    history = History(1, mode='improvements')
+    history.append((5,), is_improvement=False)
+    history.append((7,), is_improvement=False)
+    history.append((4,), is_improvement=True)
+    history.append((3,), is_improvement=True)
+    history.append((6,), is_improvement=False)
+    assert np.array_equal(history.objectives[:, 0], [5, 4, 3])
+    assert history.n_evaluations == 5
+
+
+@pytest.mark.parametrize('mode', History.MODES)
+def test_extend(mode):
+    a = History(1, mode=mode, max_size=16)
+    b = History(1, mode=mode, max_size=16)
+    b._t0 = a._t0
+    for k in range(50):
+        (a if k % 3 == 0 else b).append((50 - k,), is_improvement=True)
+    a.extend(b)
+    assert a.n_evaluations == 50
+    assert len(a) <= (16 if mode == 'downsample' else 50)
+    assert np.all(np.diff(a.timestamps) >= 0)
+    assert np.all(np.diff(a.objectives[:, 0]) < 0)
+    if mode != 'downsample':
+        assert len(a) == 50
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# test_io.py: Tests of the instance reader and of the bundles
+# author : Antoine Passemiers
+
+from pfspwt.io import PFSPWTIO, InstanceBundle
+
+import struct
+import numpy as np
+import pytest
+
+
+VALID = (b'2 2\n'
+         b'0 3 1 4\n'
+         b'0 5 1 2\n'
+         b'Reldue\n'
+         b'-1 10 -1 1\n'
+         b'-1 6 -1 2\n')
+
+
+def test_parse():
+    instance = PFSPWTIO.parse(VALID)
+    assert instance.n == 2 and instance.m == 2
+    assert np.array_equal(instance.p, [[3, 4], [5, 2]])
+    assert np.array_equal(instance.d, [10, 6])
+    assert np.array_equal(instance.w, [1, 2])
+
+
+@pytest.mark.parametrize('text', [
+    VALID.replace(b'Reldue', b''),
+    VALID.replace(b'0 3 1 4', b'0 4.5 1 4'),
+    VALID + b'x\n',
+    VALID.replace(b'2 2\n', b'0 2\n'),
+    VALID.replace(b'0 5 1 2\n', b''),
+    VALID.replace(b'-1 6 -1 2\n', b''),
+    VALID.replace(b'0 3 1 4', b'0 -3 1 4'),
+])
+def test_parse_malformed(text):
+    with pytest.raises(PFSPWTIO.PFSPException):
+        PFSPWTIO.parse(text)
+
+
+@pytest.fixture
+def bundle_path(tmp_path):
+    filepath = str(tmp_path / 'instances.bundle')
+    InstanceBundle.write(filepath, [('a', PFSPWTIO.parse(VALID))])
+    return filepath
+
+
+def test_bundle(bundle_path):
+    bundle = InstanceBundle(bundle_path)
+    assert bundle.names() == ['a']
+    instance = bundle['a']
+    assert np.array_equal(instance.p, [[3, 4], [5, 2]])
+    assert np.array_equal(instance.d, [10, 6])
+    assert np.array_equal(instance.w, [1, 2])
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda content: b'NOTABUND' + content[8:],
+    lambda content: content[:10],
+    lambda content: content[:-1],
+    lambda content: content[:-16] + struct.pack(
+            '<Q8s', len(content), InstanceBundle.MAGIC),
+    lambda content: content.replace(b'"a"', b'"a'),
+    lambda content: content.replace(b'[8, 2, 2]', b'[8, 2]   '),
+])
+def test_bundle_corrupted(bundle_path, corrupt):
+    with open(bundle_path, 'rb') as f:
+        content = f.read()
+    with open(bundle_path, 'wb') as f:
+        f.write(corrupt(content))
+    with pytest.raises(PFSPWTIO.PFSPException):
+        InstanceBundle(bundle_path)
+
+
+def test_bundle_out_of_bounds(bundle_path):
+    with open(bundle_path, 'rb') as f:
+        content = f.read()
+    with open(bundle_path, 'wb') as f:
+        f.write(content.replace(b'[8, 2, 2]', b'[8, 9, 9]'))
+    bundle = InstanceBundle(bundle_path)
+    with pytest.raises(PFSPWTIO.PFSPException):
+        bundle['a']
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# test_island.py: Tests of the island model
+# author : Antoine Passemiers
+
+from pfspwt.ant import Ant
+from pfspwt.aco import IslandModel, pack_ant, unpack_ant
+from pfspwt.generator import generate_instance
+from pfspwt.optimizer import Optimizer
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope='module')
+def instance():
+    return generate_instance(20, 5, seed=1)
+
+
+def n_records(instance, config, n_iterations):
+    """Number of evaluations of a single colony, without migrations."""
+    model = IslandModel([config], migration_interval=0,
+                        n_iterations=n_iterations, seed=1)
+    return len(model.run(instance).history)
+
+
+def test_pack_ant():
+    ant = Ant(np.array([3, 0, 2, 1], dtype=np.int32), objective=42.5)
+    received = unpack_ant(pack_ant(ant))
+    assert np.array_equal(received.asarray(), ant.asarray())
+    assert received.asarray().dtype == np.int32
+    assert received.objective == 42.5
+
+
+def test_migration(instance):
+    config = { 'method': 'MMAS', 'n_ants': 5 }
+    size = n_records(instance, config, 4)
+    model = IslandModel([config, dict(config, method='PACO')],
+                        migration_interval=1, n_iterations=4, seed=1)
+    optimizer = model.run(instance)
+
+    # Both histories are merged, along with the evaluations
+    # of the migrants that have been received
+    assert 2 * size <= len(optimizer.history) <= 2 * size + 2 * 4
+    assert optimizer.Zbest == optimizer.objective.min()
+    assert optimizer._n_iterations == 4
+
+
+def test_islands_are_seeded(instance):
+    config = { 'method': 'MMAS', 'n_ants': 5 }
+    model = IslandModel([config, config], migration_interval=0,
+                        n_iterations=5)
+    objectives = model.run(instance).objective
+
+    # Identical islands would record every value an even number of times
+    _, counts = np.unique(objectives, return_counts=True)
+    assert np.any(counts % 2 == 1)
+
+
+def test_failure(instance):
+    model = IslandModel([{ 'method': 'MMAS' }, { 'method': 'unknown' }],
+                        n_iterations=5, seed=1)
+    with pytest.raises(RuntimeError, match='Island 1 failed'):
+        model.run(instance)
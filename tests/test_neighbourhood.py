@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# test_neighbourhood.py: Tests of the neighbourhoods against brute force
+# author : Antoine Passemiers
+
+from pfspwt.instance import Instance
+from pfspwt.neighbourhood import LOCAL_SEARCHES
+from pfspwt.neighbourhood import swap_search
+from pfspwt.neighbourhood import interchange_search
+from pfspwt.neighbourhood import insertion_search
+from pfspwt.neighbourhood import descent
+from pfspwt.neighbourhood import local_search
+from pfspwt.objective import bounded_weighted_tardiness
+from pfspwt.objective import evaluate_batch
+from pfspwt.objective import partial_computation_times
+from pfspwt.objective import weighted_tardiness
+from pfspwt.objective import weighted_tardiness_prefix
+
+import numpy as np
+import pytest
+
+
+SIZES = [(2, 1), (2, 3), (3, 1), (5, 1), (6, 2), (7, 4), (9, 3)]
+
+SEEDS = range(5)
+
+
+def random_instance(n, m, seed):
+    """Creates a small random instance with tight due dates."""
+    state = np.random.RandomState(seed)
+    p = state.randint(1, 20, size=(n, m))
+    d = state.randint(0, int(p.sum(axis=1).mean() * n * 0.6) + 1, size=n)
+    w = state.randint(1, 10, size=n)
+    return Instance(p, d, w)
+
+
+def random_solution(n, seed):
+    return np.random.RandomState(seed).permutation(n).astype(np.int32)
+
+
+def swap_moves(solution):
+    for i in range(len(solution) - 1):
+        neighbour = solution.copy()
+        neighbour[i], neighbour[i+1] = neighbour[i+1], neighbour[i]
+        yield neighbour
+
+
+def interchange_moves(solution):
+    for i in range(len(solution) - 1):
+        for j in range(i + 1, len(solution)):
+            neighbour = solution.copy()
+            neighbour[i], neighbour[j] = neighbour[j], neighbour[i]
+            yield neighbour
+
+
+def insertion_moves(solution, backward_only=False):
+    n = len(solution)
+    for i in range(n):
+        for j in range(n):
+            if j == i or (backward_only and j > i):
+                continue
+            neighbour = list(solution)
+            neighbour.insert(j, neighbour.pop(i))
+            yield np.asarray(neighbour, dtype=np.int32)
+
+
+def backward_insertion_moves(solution):
+    return insertion_moves(solution, backward_only=True)
+
+
+NEIGHBOURHOODS = {
+    'swap': swap_moves,
+    'interchange': interchange_moves,
+    'insertion': insertion_moves
+}
+
+
+def best_neighbour(instance, solution, moves):
+    """Returns the weighted tardiness of the best neighbour, if any."""
+    neighbours = list(moves(solution))
+    if len(neighbours) == 0:
+        return np.inf
+    return evaluate_batch(instance, np.asarray(neighbours)).min()
+
+
+def evaluate(instance, solution):
+    return evaluate_batch(instance, solution)[0]
+
+
+@pytest.mark.parametrize('n,m', SIZES)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_bounded_weighted_tardiness(n, m, seed):
+    instance = random_instance(n, m, seed)
+    solution = random_solution(n, seed)
+    c = np.empty((n, m), dtype=np.int32)
+    row = np.empty(m, dtype=np.int32)
+    z = np.empty(n, dtype=np.float64)
+    w = instance.w.astype(np.float32)
+    partial_computation_times(c, instance.p, solution, 0)
+    Z = weighted_tardiness_prefix(c, instance.d, w, solution, z)
+    assert Z == pytest.approx(weighted_tardiness(instance, solution))
+    for neighbour in interchange_moves(solution):
+        diff = np.where(neighbour != solution)[0]
+        start, join = diff[0], diff[-1] + 1
+        exact = evaluate(instance, neighbour)
+        for bound in (np.inf, Z, exact, exact - 1):
+            value = bounded_weighted_tardiness(
+                    c, row, z, instance.p, instance.d, w, neighbour,
+                    start, join, 0, bound)
+            if exact <= bound:
+                assert value == pytest.approx(exact)
+            else:
+                assert bound < value <= exact
+
+
+@pytest.mark.parametrize('n,m', SIZES)
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('search,moves', [
+    (swap_search, swap_moves),
+    (interchange_search, interchange_moves),
+    (insertion_search, backward_insertion_moves)
+])
+def test_search(n, m, seed, search, moves):
+    instance = random_instance(n, m, seed)
+    solution = random_solution(n, seed)
+    initial = solution.copy()
+    Z = evaluate(instance, solution)
+    best = min(Z, best_neighbour(instance, solution, moves))
+    new_solution, improvement, objective = search(instance, solution)
+    assert np.array_equal(solution, initial)
+    assert improvement == (best < Z)
+    assert objective == pytest.approx(best)
+    assert objective == pytest.approx(evaluate(instance, new_solution))
+    assert sorted(new_solution) == list(range(n))
+
+
+@pytest.mark.parametrize('n,m', SIZES)
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('neighbourhood', ['swap', 'interchange', 'insertion'])
+@pytest.mark.parametrize('first_improvement', [True, False])
+def test_descent(n, m, seed, neighbourhood, first_improvement):
+    instance = random_instance(n, m, seed)
+    solution = random_solution(n, seed)
+    Z = evaluate(instance, solution)
+    new_solution, objective = descent(
+            instance, solution, neighbourhood=neighbourhood,
+            first_improvement=first_improvement)
+    assert sorted(new_solution) == list(range(n))
+    assert objective == pytest.approx(evaluate(instance, new_solution))
+    assert objective <= Z
+    moves = NEIGHBOURHOODS[neighbourhood]
+    assert best_neighbour(instance, new_solution, moves) >= objective
+
+
+@pytest.mark.parametrize('n,m', SIZES)
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('method', list(LOCAL_SEARCHES))
+def test_local_search(n, m, seed, method):
+    instance = random_instance(n, m, seed)
+    solution = random_solution(n, seed)
+    Z = evaluate(instance, solution)
+    new_solution, objective = local_search(instance, solution, method)
+    assert sorted(new_solution) == list(range(n))
+    assert objective == pytest.approx(evaluate(instance, new_solution))
+    assert objective <= Z
+    if method == 'none':
+        assert np.array_equal(new_solution, solution)
+    elif '-' in method:
+        # Methods running to a local optimum
+        moves = NEIGHBOURHOODS[method.split('-')[0]]
+        assert best_neighbour(instance, new_solution, moves) >= objective
+    else:
+        # The first pass applies the best move (the passes of
+        # insertion only move jobs backward)
+        moves = NEIGHBOURHOODS[method]
+        if method == 'insertion':
+            moves = backward_insertion_moves
+        best = min(Z, best_neighbour(instance, solution, moves))
+        assert objective <= best + 1e-9
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# test_objective.py: Tests of the objective functions
+# author : Antoine Passemiers
+
+from pfspwt.objective import count_kernel_call, count_kernel_calls
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_count_kernel_calls():
+    counts = dict()
+    count_kernel_calls(counts)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in executor.map(
+                    lambda k: [count_kernel_call('kernel%d' % (i % 2))
+                               for i in range(10000)], range(8)):
+                pass
+    finally:
+        count_kernel_calls(None)
+    count_kernel_call('kernel0')
+    assert counts == {'kernel0': 40000, 'kernel1': 40000}
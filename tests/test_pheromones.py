@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# test_pheromones.py: Tests of the pheromone trails against dense updates
+# author : Antoine Passemiers
+
+from pfspwt.aco.paco import _init_pheromones, _update_pheromones
+from pfspwt.aco.pheromones import BandedPheromoneTrails, PheromoneTrails
+from pfspwt.aco.pheromones import RENORMALISATION_THRESHOLD
+from pfspwt.aco.pheromones import _band_cumulative
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('n', [1, 2, 7, 20])
+@pytest.mark.parametrize('seed', range(3))
+def test_lazy_evaporation(n, seed):
+    state = np.random.RandomState(seed)
+    rho, n_updates = 0.5, 120
+    assert rho ** n_updates < RENORMALISATION_THRESHOLD ** 2
+
+    # MMAS bounds, which never decrease
+    Zbest = 1000.
+    tau_max = 1. / ((1. - rho) * Zbest)
+    trails = PheromoneTrails(n, tau_max)
+    tau = np.full((n, n), tau_max)
+
+    n_renormalisations = 0
+    for _ in range(n_updates):
+        solution = state.permutation(n).astype(np.int32)
+        Z = state.uniform(0.8, 1.2) * Zbest
+        Zbest = min(Z, Zbest)
+        tau_max = 1. / ((1. - rho) * Zbest)
+        tau_min = tau_max / 5.
+
+        # Eager update of all the trails
+        tau *= rho
+        tau[solution, np.arange(n)] += 1. / Z
+        tau = np.clip(tau, tau_min, tau_max)
+
+        scale = trails.scale
+        trails.update(solution, Z, rho, tau_min, tau_max)
+        n_renormalisations += trails.scale > scale
+
+        assert np.allclose(trails.asarray(), tau, rtol=1e-5)
+        assert np.allclose(trails.cumulative(), np.cumsum(tau, axis=1),
+                           rtol=1e-4)
+    assert n_renormalisations >= 2
+
+
+def paco_trails(h, Z):
+    """Initial PACO trails, stored densely."""
+    n = len(h)
+    diff = np.abs(h[:, np.newaxis] - np.arange(n)) + 1
+    tau = np.full((n, n), np.float32(1. / Z), dtype=np.float64)
+    tau[n / 4. < diff] /= 2.
+    tau[n / 2. <= diff] /= 2.
+    return tau
+
+
+def paco_update(tau, solution, best, Z, rho):
+    """Updates dense trails like in PACO."""
+    n = len(solution)
+    h = np.argsort(solution)
+    bound = 1 if (n <= 40) else 2
+    tau *= rho
+    for i in range(n):
+        for k in range(max(0, h[i] - bound), min(n, h[i] + bound + 1)):
+            tau[i, k] += 1. / (np.sqrt(abs(best[i] - k) + 1.) * Z)
+
+
+def cumulative(trails):
+    """Reads all the cumulative intensities of banded trails."""
+    n = len(trails.start)
+    return np.asarray([[_band_cumulative(trails.cumsum, trails.start,
+                                         trails.outer, trails.state, i, j)
+                        for j in range(n)] for i in range(n)])
+
+
+def run_paco_updates(trails, tau, n_updates, seed, check):
+    """Applies random PACO updates to banded and dense trails."""
+    state = np.random.RandomState(seed)
+    n = len(trails.start)
+    best = state.permutation(n).astype(np.int32)
+    for _ in range(n_updates):
+        solution = state.permutation(n).astype(np.int32)
+        Z = state.uniform(500., 1000.)
+        _update_pheromones(trails.raw, trails.outer, trails.cumsum,
+                           trails.start, trails.state, solution, best,
+                           Z, 0.5, np.empty(n, dtype=np.int32))
+        if tau is not None:
+            paco_update(tau, solution, best, Z, 0.5)
+        check()
+
+
+@pytest.mark.parametrize('n', [1, 2, 7, 45])
+@pytest.mark.parametrize('seed', range(3))
+def test_unbanded_trails(n, seed):
+    h = np.random.RandomState(seed).permutation(n).astype(np.int32)
+    trails = BandedPheromoneTrails(h, n)
+    _init_pheromones(trails.raw, trails.outer, trails.start, h, 1000.)
+    trails.refresh()
+    tau = paco_trails(h, 1000.)
+
+    def check():
+        assert np.allclose(trails.asarray(), tau, rtol=1e-5)
+        assert np.allclose(cumulative(trails), np.cumsum(tau, axis=1),
+                           rtol=1e-4)
+    check()
+    run_paco_updates(trails, tau, 60, seed, check)
+
+
+@pytest.mark.parametrize('n,width', [(2, 1), (7, 3), (45, 8), (45, 44)])
+@pytest.mark.parametrize('seed', range(3))
+def test_banded_cumulative(n, width, seed):
+    h = np.random.RandomState(seed).permutation(n).astype(np.int32)
+    trails = BandedPheromoneTrails(h, width)
+    assert np.all(trails.start >= 0)
+    assert np.all(trails.start + width <= n)
+    _init_pheromones(trails.raw, trails.outer, trails.start, h, 1000.)
+    trails.refresh()
+    n_renormalisations = [0]
+
+    def check():
+        # Incremental cumulative intensities match a full computation
+        cumsum = trails.cumsum.copy()
+        trails.refresh()
+        assert np.allclose(cumsum, trails.cumsum, rtol=1e-5)
+
+        # Cumulative intensities match the intensities of the trails
+        T = cumulative(trails)
+        tau = trails.asarray()
+        assert np.allclose(T[:, -1], tau.sum(axis=1), rtol=1e-4)
+        for i in range(n):
+            for j in range(trails.start[i], trails.start[i] + width):
+                assert np.isclose(T[i, j] - (T[i, j-1] if j > 0 else 0.),
+                                  tau[i, j], rtol=1e-3, atol=1e-9)
+        n_renormalisations[0] += trails.scale == 1.
+    run_paco_updates(trails, None, 120, seed, check)
+    assert n_renormalisations[0] >= 2
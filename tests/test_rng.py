@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# test_rng.py: Tests of the random number streams
+# author : Antoine Passemiers
+
+from pfspwt.rng import RandomStreams, _fill_uniform, _next_uniform
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2 ** 64 - 1])
+def test_reproducibility(seed):
+    a, b = RandomStreams(seed), RandomStreams(seed)
+    for n_streams in [1, 5, 3]:
+        assert np.array_equal(a.spawn(n_streams), b.spawn(n_streams))
+    assert np.array_equal(a.random_sample(100), b.random_sample(100))
+    states = a.spawn(4)
+    assert np.array_equal(a.uniform(states, 50), b.uniform(b.spawn(4), 50))
+
+    # Other seeds give other streams
+    assert not np.array_equal(
+            RandomStreams(seed).spawn(4),
+            RandomStreams((seed + 1) % 2 ** 64).spawn(4))
+
+
+def test_spawn():
+    a, b = RandomStreams(7), RandomStreams(7)
+    states = a.spawn(10)
+    assert np.array_equal(states, [b.spawn(1)[0] for _ in range(10)])
+    assert np.array_equal(a.state, b.state)
+    assert len(np.unique(states)) == len(states)
+
+
+def test_uniform():
+    streams = RandomStreams(3)
+    states = streams.spawn(8)
+    u = streams.uniform(np.copy(states), 10000)
+    assert u.shape == (8, 10000)
+    assert np.all(u >= 0.) and np.all(u < 1.)
+    assert np.all(np.abs(u.mean(axis=1) - 0.5) < 0.02)
+
+    # Drawing a block is the same as drawing one number at a time
+    for s in range(len(states)):
+        out = np.empty(100, dtype=np.float64)
+        _fill_uniform(states, s, out)
+        assert np.array_equal(out, u[s, :100])
+        assert _next_uniform(states, s) == u[s, 100]
+